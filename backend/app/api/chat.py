@@ -1,10 +1,17 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
+from typing import Any, AsyncIterator, Dict
 from app.models.chat import ChatRequest, ChatResponse
 from app.models.mcq import MCQResponse
 from app.services.llm import llm_service
+from app.services.response_cache import CACHE_DEFAULT
+from app.services.rate_limiter import QuotaExceededError
+from app.services.explanations import create_quiz
+from app.core.metrics import FALLBACKS
+from app.services.speculation import detect_intent_with_speculation, speculation_stats
+from app.api.mcq import mcq_event_stream, quota_exceeded_response, quota_exceeded_event
+from app.utils.sse import format_sse, create_sse_response
 import logging
-import traceback
 
 logger = logging.getLogger(__name__)
 # Define router with a prefix tag
@@ -14,27 +21,33 @@ router = APIRouter(tags=["chat"])
 async def process_chat(request: ChatRequest):
     """Process a chat message and return a response or MCQs"""
     try:
-        logger.debug(f"Received chat request: {request}")
+        logger.debug("Received chat request: %s", request)
         user_query = request.message
         
-        # Use LLM to detect MCQ intent
-        logger.debug("Using LLM to detect if request is for MCQs")
-        intent_result = await llm_service.detect_mcq_intent(user_query)
+        direct_answer, speculative_answer = None, None
+        if llm_service.chat_pipeline == "single_call":
+            # One completion either answers or asks for a quiz
+            logger.debug("Routing chat message in a single LLM call")
+            try:
+                intent_result, direct_answer = await llm_service.route_chat(user_query, request.cache_control)
+            except QuotaExceededError as e:
+                logger.warning("Chat request rejected: %s", e)
+                return quota_exceeded_response(e)
+        else:
+            # Use LLM to detect MCQ intent, possibly answering speculatively at the same time
+            logger.debug("Using LLM to detect if request is for MCQs")
+            try:
+                intent_result, speculative_answer = await detect_intent_with_speculation(user_query, request.cache_control)
+            except QuotaExceededError as e:
+                logger.warning("Chat request rejected: %s", e)
+                return quota_exceeded_response(e)
         
         if (intent_result["mcq_expected"] or intent_result["mcq_expected"] == 'true'):
             topic = intent_result["topic"]
-            logger.info(f"MCQ request detected for topic: {topic}")
+            logger.info("MCQ request detected for topic: %s", topic)
             
             # Get number of questions from intent response
-            num_questions = 4  # Default
-            if "num_questions" in intent_result:
-                try:
-                    extracted_num = int(intent_result["num_questions"])
-                    # Limit to a reasonable range
-                    num_questions = max(1, min(extracted_num, 10))
-                    logger.debug(f"Extracted request for {num_questions} questions from intent detection")
-                except (ValueError, TypeError):
-                    logger.debug(f"Could not convert num_questions to int: {intent_result['num_questions']}, using default")
+            num_questions = get_num_questions(intent_result)
             
             try:
                 # Generate MCQs directly
@@ -45,15 +58,19 @@ async def process_chat(request: ChatRequest):
                 
                 response_data = MCQResponse(
                     topic=topic,
-                    questions=questions
+                    questions=questions,
+                    quiz_id=create_quiz(topic, questions)
                 )
                 
                 # Return with explicit CORS headers
                 return create_cors_response(response_data.dict())
                 
+            except QuotaExceededError as e:
+                logger.warning("MCQ request rejected: %s", e)
+                return quota_exceeded_response(e)
             except Exception as e:
-                logger.error(f"Error generating MCQs: {str(e)}")
-                logger.exception("Full exception traceback:")
+                logger.exception("Error generating MCQs: %s", e)
+                FALLBACKS.labels("mcq_text_reply").inc()
                 
                 # Fallback to a text response
                 response_data = ChatResponse(
@@ -66,9 +83,16 @@ async def process_chat(request: ChatRequest):
         # For regular chat messages
         logger.debug("Processing regular chat message")
         try:
-            logger.debug("Calling LLM service to generate response")
-            response = await llm_service.generate_response(user_query)
-            logger.debug(f"LLM response received: {response[:50]}...")  # Log first 50 chars
+            if direct_answer is not None:
+                logger.debug("Using the answer from the routed call")
+                response = direct_answer
+            elif speculative_answer is not None:
+                logger.debug("Using speculative answer started during intent detection")
+                response = await speculative_answer
+            else:
+                logger.debug("Calling LLM service to generate response")
+                response = await llm_service.generate_response(user_query, cache_control=request.cache_control)
+            logger.debug("LLM response received: %.50s...", response)  # Log first 50 chars
             
             response_data = ChatResponse(
                 message=response,
@@ -79,15 +103,99 @@ async def process_chat(request: ChatRequest):
             # Return with explicit CORS headers
             return create_cors_response(response_data.dict())
             
+        except QuotaExceededError as e:
+            logger.warning("Chat request rejected: %s", e)
+            return quota_exceeded_response(e)
         except Exception as e:
-            logger.error(f"Error in LLM service: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error in LLM service: %s", e)
             raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
     except Exception as e:
-        logger.error(f"Unhandled error in process_chat: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Unhandled error in process_chat: %s", e)
         raise HTTPException(status_code=500, detail=f"Error processing chat request: {str(e)}")
 
+@router.get("/chat/speculation/stats")
+async def get_speculation_stats():
+    """Report wasted tokens versus latency saved by speculative answering"""
+    return speculation_stats.snapshot()
+
+@router.get("/chat/cache/stats")
+async def get_response_cache_stats():
+    """Report response cache hits and misses for sizing"""
+    if llm_service.response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **llm_service.response_cache.stats()}
+
+@router.get("/chat/scheduler/stats")
+async def get_scheduler_stats():
+    """Report LLM queue depth, quota wait times and 429 throttling"""
+    return llm_service.rate_limiter.stats()
+
+@router.get("/chat/router/stats")
+async def get_router_stats():
+    """Report per-deployment latency and error estimates and hedging outcomes"""
+    return llm_service.router.stats()
+
+@router.post("/chat/stream", response_model=None)
+async def stream_chat(request: ChatRequest):
+    """Process a chat message and stream the response as Server-Sent Events
+    
+    Events:
+        token: {"content": "..."} for each text delta of a regular answer
+        quiz, question: quiz request events, as sent by /api/mcq/generate/stream
+        error: {"detail": "..."} if generation fails mid-stream, with
+            "retry_after" seconds when the LLM quota is exhausted
+        done: sent once the response is complete
+    """
+    logger.debug("Received streaming chat request: %s", request)
+    return create_sse_response(chat_event_stream(request.message, request.cache_control))
+
+async def chat_event_stream(user_query: str, cache_control: str = CACHE_DEFAULT) -> AsyncIterator[str]:
+    """Yield SSE events for a chat message, mirroring process_chat"""
+    try:
+        if llm_service.chat_pipeline == "single_call":
+            async for kind, value in llm_service.stream_route_chat(user_query, cache_control=cache_control):
+                if kind == "quiz":
+                    logger.info("MCQ request detected for topic: %s", value["topic"])
+                    async for event in mcq_event_stream(value["topic"], get_num_questions(value)):
+                        yield event
+                    return
+                yield format_sse({"content": value}, event="token")
+            yield format_sse({}, event="done")
+            return
+        
+        intent_result = await llm_service.detect_mcq_intent(user_query)
+        
+        if (intent_result["mcq_expected"] or intent_result["mcq_expected"] == 'true'):
+            topic = intent_result["topic"]
+            logger.info("MCQ request detected for topic: %s", topic)
+            async for event in mcq_event_stream(topic, get_num_questions(intent_result)):
+                yield event
+            return
+        
+        async for delta in llm_service.stream_response(user_query, cache_control=cache_control):
+            yield format_sse({"content": delta}, event="token")
+        yield format_sse({}, event="done")
+    except QuotaExceededError as e:
+        logger.warning("Chat stream rejected: %s", e)
+        yield format_sse(quota_exceeded_event(e), event="error")
+    except Exception as e:
+        # Headers are already sent, so errors are reported in-band
+        logger.exception("Error in chat stream: %s", e)
+        yield format_sse({"detail": f"Error generating response: {str(e)}"}, event="error")
+
+def get_num_questions(intent_result: Dict[str, Any]) -> int:
+    """Read the requested question count from an intent result, clamped to 1-10"""
+    num_questions = 4  # Default
+    if "num_questions" in intent_result:
+        try:
+            extracted_num = int(intent_result["num_questions"])
+            # Limit to a reasonable range
+            num_questions = max(1, min(extracted_num, 10))
+            logger.debug("Extracted request for %s questions from intent detection", num_questions)
+        except (ValueError, TypeError):
+            logger.debug("Could not convert num_questions to int: %s, using default", intent_result['num_questions'])
+    return num_questions
+
 # Helper function to create a response with CORS headers
 def create_cors_response(content):
     response = JSONResponse(content=content)
@@ -99,6 +207,14 @@ def create_cors_response(content):
 # Add OPTIONS handler for CORS preflight requests
 @router.options("/chat")
 async def options_chat():
+    response = JSONResponse(content={})
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "POST, GET, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    return response
+
+@router.options("/chat/stream")
+async def options_chat_stream():
     response = JSONResponse(content={})
     response.headers["Access-Control-Allow-Origin"] = "*"
     response.headers["Access-Control-Allow-Methods"] = "POST, GET, OPTIONS"
@@ -1,7 +1,15 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
-from app.models.mcq import MCQRequest, MCQResponse, MCQSubmission, MCQEvaluation
+from typing import AsyncIterator, List
+from app.models.mcq import MCQRequest, MCQBatchRequest, MCQResponse, MCQSubmission, MCQEvaluation, MCQBulkSubmission, MCQBulkEvaluation
 from app.services.llm import llm_service
+from app.services.rate_limiter import QuotaExceededError, PRIORITY_BULK
+from app.services.quiz_store import quiz_store
+from app.services.explanations import create_quiz, ensure_explanations, explanation_stats
+from app.services.grading import encode_answers, grade_bulk
+from app.core.config import settings
+from app.utils.sse import format_sse, create_sse_response
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,26 +19,29 @@ router = APIRouter()
 async def generate_mcqs(request: MCQRequest):
     """Generate MCQs for a given topic"""
     try:
-        logger.info(f"MCQ generation request received for topic: {request.topic}")
-        logger.info(f"Requesting {request.num_questions} questions")
+        logger.info("MCQ generation request received for topic: %s", request.topic)
+        logger.info("Requesting %s questions", request.num_questions)
         
         questions = await llm_service.generate_mcqs(
             topic=request.topic,
             num_questions=request.num_questions
         )
         
-        logger.info(f"Successfully generated {len(questions)} MCQs")
+        logger.info("Successfully generated %s MCQs", len(questions))
         
         response_data = MCQResponse(
             topic=request.topic,
-            questions=questions
+            questions=questions,
+            quiz_id=create_quiz(request.topic, questions)
         )
         
         # Return with explicit CORS headers
         return create_cors_response(response_data.dict())
+    except QuotaExceededError as e:
+        logger.warning("MCQ generation rejected: %s", e)
+        return quota_exceeded_response(e)
     except Exception as e:
-        logger.error(f"Error generating MCQs: {str(e)}")
-        logger.exception("Full exception traceback:")
+        logger.exception("Error generating MCQs: %s", e)
         # Return a more detailed error message
         return JSONResponse(
             status_code=500,
@@ -46,9 +57,110 @@ async def generate_mcqs(request: MCQRequest):
             }
         )
 
+@router.post("/mcq/generate/stream", response_model=None)
+async def stream_mcqs(request: MCQRequest):
+    """Generate MCQs for a given topic, streaming each question as Server-Sent Events
+    
+    Events:
+        quiz: {"topic": ..., "num_questions": ...} before generation starts
+        question: {"index": i, "question": {...}} as soon as each question is complete
+        error: {"detail": "..."} if generation fails mid-stream, with
+            "retry_after" seconds when the LLM quota is exhausted
+        done: {"topic": ..., "count": n, "quiz_id": ...} once all questions have been sent
+    """
+    logger.info("Streaming MCQ generation request received for topic: %s", request.topic)
+    return create_sse_response(mcq_event_stream(request.topic, request.num_questions))
+
+async def mcq_event_stream(topic: str, num_questions: int) -> AsyncIterator[str]:
+    """Yield SSE events for each question of a generated quiz"""
+    yield format_sse({"topic": topic, "num_questions": num_questions}, event="quiz")
+    questions = []
+    count = 0
+    try:
+        async for question in llm_service.stream_mcqs(topic=topic, num_questions=num_questions):
+            yield format_sse({"index": count, "question": question}, event="question")
+            questions.append(question)
+            count += 1
+        yield format_sse({"topic": topic, "count": count, "quiz_id": create_quiz(topic, questions)}, event="done")
+    except QuotaExceededError as e:
+        logger.warning("MCQ stream rejected: %s", e)
+        yield format_sse({**quota_exceeded_event(e), "count": count}, event="error")
+    except Exception as e:
+        # Headers are already sent, so errors are reported in-band
+        logger.exception("Error streaming MCQs: %s", e)
+        yield format_sse({"detail": f"Error generating MCQs: {str(e)}", "count": count}, event="error")
+
+@router.post("/mcq/generate/batch", response_model=None)
+async def generate_mcq_batch(batch: MCQBatchRequest):
+    """Generate MCQs for many topics concurrently, streaming each topic as Server-Sent Events
+    
+    Events:
+        batch: {"count": n} before generation starts
+        result: {"index": i, "topic": ..., "questions": [...], "quiz_id": ...} as each topic finishes
+        failed: {"index": i, "topic": ..., "detail": "..."} for a topic that could not be generated
+        done: {"count": n, "succeeded": s, "failed": f} once every topic has been reported
+    
+    Results arrive in completion order; index refers to the position in the request.
+    """
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="Batch contains no topics")
+    if len(batch.requests) > settings.MCQ_BATCH_MAX_TOPICS:
+        raise HTTPException(status_code=400, detail=f"Batch holds at most {settings.MCQ_BATCH_MAX_TOPICS} topics")
+    logger.info("Batch MCQ generation request received for %s topics", len(batch.requests))
+    return create_sse_response(mcq_batch_event_stream(batch.requests))
+
+async def mcq_batch_event_stream(requests: List[MCQRequest]) -> AsyncIterator[str]:
+    """Yield SSE events for each topic of a batch as soon as it completes"""
+    semaphore = asyncio.Semaphore(max(1, settings.MCQ_BATCH_CONCURRENCY))
+    
+    async def run(index: int, request: MCQRequest):
+        async with semaphore:
+            try:
+                # Queued behind interactive chat when the deployment quota is tight
+                questions = await llm_service.generate_mcqs(topic=request.topic, num_questions=request.num_questions, priority=PRIORITY_BULK)
+                return index, request.topic, questions, None
+            except Exception as e:
+                # One failed topic is reported on its own and never fails the batch
+                logger.exception("Error generating MCQs for batch topic %s: %s", request.topic, e)
+                return index, request.topic, None, e
+    
+    yield format_sse({"count": len(requests)}, event="batch")
+    tasks = [asyncio.create_task(run(index, request)) for index, request in enumerate(requests)]
+    succeeded = failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, topic, questions, error = await next_done
+            if error is None:
+                succeeded += 1
+                quiz_id = create_quiz(topic, questions)
+                yield format_sse({"index": index, "topic": topic, "questions": questions, "quiz_id": quiz_id}, event="result")
+            else:
+                failed += 1
+                yield format_sse({"index": index, "topic": topic, "detail": f"Error generating MCQs: {str(error)}"}, event="failed")
+        yield format_sse({"count": len(requests), "succeeded": succeeded, "failed": failed}, event="done")
+    finally:
+        # Stop outstanding topics if the client disconnects mid-batch
+        for task in tasks:
+            task.cancel()
+
 @router.post("/mcq/evaluate", response_model=MCQEvaluation)
 async def evaluate_mcqs(submission: MCQSubmission):
-    """Evaluate submitted MCQ answers"""
+    """Evaluate submitted MCQ answers against a stored quiz's answer key"""
+    if submission.quiz_id is not None:
+        quiz = quiz_store.get(submission.quiz_id)
+        if quiz is None:
+            raise HTTPException(status_code=404, detail="Quiz not found or expired")
+        if len(submission.answers) == len(quiz):
+            # Lazily generated explanations are written, or finished, now
+            await ensure_explanations(quiz)
+        try:
+            evaluation = quiz.grade(submission.answers)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        logger.info("Graded quiz %s: %s/%s", quiz.quiz_id, evaluation["score"], evaluation["total"])
+        return create_cors_response(MCQEvaluation(**evaluation).dict())
+    
+    # Legacy clients post the questions, answer key included, back with their answers
     try:
         evaluation = await llm_service.evaluate_mcqs(
             questions=submission.questions,
@@ -60,9 +172,41 @@ async def evaluate_mcqs(submission: MCQSubmission):
         # Return with explicit CORS headers
         return create_cors_response(response_data.dict())
     except Exception as e:
-        logger.error(f"Error evaluating MCQs: {str(e)}")
+        logger.error("Error evaluating MCQs: %s", e)
         raise HTTPException(status_code=500, detail=f"Error evaluating MCQs: {str(e)}")
 
+@router.post("/mcq/evaluate/bulk", response_model=MCQBulkEvaluation)
+async def evaluate_mcqs_bulk(bulk: MCQBulkSubmission):
+    """Grade many answer sheets for one stored quiz, with per-question item statistics
+    
+    Returns each student's score in submission order, plus for every question
+    the percent correct, how often each option was chosen, blanks, and the
+    upper-lower discrimination index.
+    """
+    quiz = quiz_store.get(bulk.quiz_id)
+    if quiz is None:
+        raise HTTPException(status_code=404, detail="Quiz not found or expired")
+    
+    def grade():
+        return grade_bulk(quiz, encode_answers(bulk.submissions, len(quiz)))
+    
+    try:
+        # A class worth of sheets is CPU work; keep it off the event loop
+        evaluation = await asyncio.to_thread(grade)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return create_cors_response(MCQBulkEvaluation(**evaluation).dict())
+
+@router.get("/mcq/quiz/stats")
+async def get_quiz_store_stats():
+    """Report stored quiz sessions for sizing the TTL and capacity"""
+    return quiz_store.stats()
+
+@router.get("/mcq/explanations/stats")
+async def get_explanation_stats():
+    """Report how often lazily generated explanations were ready by the time a quiz was graded"""
+    return explanation_stats.snapshot()
+
 # Helper function to create a response with CORS headers
 def create_cors_response(content):
     response = JSONResponse(content=content)
@@ -71,6 +215,22 @@ def create_cors_response(content):
     response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
     return response
 
+def quota_exceeded_event(error: QuotaExceededError):
+    """SSE error payload for quota exhaustion once the stream's 200 has been sent"""
+    return {"detail": str(error), "type": "QuotaExceededError", "retry_after": round(error.retry_after, 1)}
+
+def quota_exceeded_response(error: QuotaExceededError):
+    """503 with Retry-After, so clients back off instead of treating quota exhaustion as a server fault"""
+    response = JSONResponse(
+        status_code=503,
+        content={"error": str(error), "type": "QuotaExceededError", "retry_after": round(error.retry_after, 1)}
+    )
+    response.headers["Retry-After"] = str(max(1, round(error.retry_after)))
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "POST, GET, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    return response
+
 # Add OPTIONS handlers for CORS preflight requests
 @router.options("/mcq/generate")
 async def options_generate():
@@ -80,6 +240,30 @@ async def options_generate():
     response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
     return response
 
+@router.options("/mcq/generate/stream")
+async def options_generate_stream():
+    response = JSONResponse(content={})
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "POST, GET, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    return response
+
+@router.options("/mcq/generate/batch")
+async def options_generate_batch():
+    response = JSONResponse(content={})
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "POST, GET, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    return response
+
+@router.options("/mcq/evaluate/bulk")
+async def options_evaluate_bulk():
+    response = JSONResponse(content={})
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "POST, GET, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    return response
+
 @router.options("/mcq/evaluate")
 async def options_evaluate():
     response = JSONResponse(content={})
@@ -10,6 +10,111 @@ class Settings(BaseSettings):
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:5173")
     LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "azure")
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # "json" or "text"
+    # Fraction of requests whose DEBUG records are written, overridable per route
+    LOG_DEBUG_SAMPLE_RATE: float = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+    LOG_DEBUG_SAMPLE_RATES: str = os.getenv("LOG_DEBUG_SAMPLE_RATES", "")  # e.g. "/api/chat=0.05,/api/mcq/generate=0.2"
+
+    # Shared HTTP connection pool used by the async LLM clients
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+    LLM_HTTP_MAX_KEEPALIVE: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+    LLM_HTTP2: bool = os.getenv("LLM_HTTP2", "true").lower() == "true"
+    LLM_REQUEST_TIMEOUT: float = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+    LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    LLM_WARMUP_CONNECTIONS: int = int(os.getenv("LLM_WARMUP_CONNECTIONS", "4"))
+    # LLM_PROVIDER=replay serves completions from a cassette file ("replay") or records real ones into it ("record")
+    LLM_REPLAY_MODE: str = os.getenv("LLM_REPLAY_MODE", "replay")
+    LLM_REPLAY_CASSETTE: str = os.getenv("LLM_REPLAY_CASSETTE", "cassettes/llm.jsonl")
+    LLM_REPLAY_SPEED: float = float(os.getenv("LLM_REPLAY_SPEED", "0"))  # 1 = recorded timing, 10 = ten times faster, 0 = no waiting
+    LLM_REPLAY_UPSTREAM: str = os.getenv("LLM_REPLAY_UPSTREAM", "azure")  # Provider recorded from in record mode
+    # Client-side scheduling against the deployment quotas; 0 leaves a quota unenforced
+    LLM_TOKENS_PER_MINUTE: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+    LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+    LLM_RATE_LIMIT_BURST_SECONDS: float = float(os.getenv("LLM_RATE_LIMIT_BURST_SECONDS", "10"))  # Azure enforces quotas over short windows
+    # Retries after 429 and transient provider errors; backoff doubles from the base delay unless Retry-After is sent
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "1"))
+    LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "30"))
+    # Extra deployments routed alongside the primary one, as a JSON list of
+    # {"name", "provider": "azure"|"openai", "endpoint", "api_version", "model", "api_key_env"}
+    LLM_DEPLOYMENTS: str = os.getenv("LLM_DEPLOYMENTS", "")
+    LLM_ROUTER_EWMA_ALPHA: float = float(os.getenv("LLM_ROUTER_EWMA_ALPHA", "0.2"))
+    LLM_ROUTER_EXPLORE_RATE: float = float(os.getenv("LLM_ROUTER_EXPLORE_RATE", "0.05"))  # Share of calls sent to a random deployment to refresh its estimates
+    # Duplicate a whole completion still running past this latency percentile of its deployment
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_QUANTILE: float = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+    LLM_HEDGE_MIN_DELAY: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+    # Per-operation model tiers: comma-separated deployment names ("primary" is the LLM_PROVIDER one), empty for the
+    # shared pool of deployments no tier names, and the per-request timeout in seconds (0 uses LLM_REQUEST_TIMEOUT)
+    LLM_INTENT_DEPLOYMENTS: str = os.getenv("LLM_INTENT_DEPLOYMENTS", "")
+    LLM_INTENT_TIMEOUT: float = float(os.getenv("LLM_INTENT_TIMEOUT", "0"))
+    LLM_INTENT_MAX_TOKENS: int = int(os.getenv("LLM_INTENT_MAX_TOKENS", "200"))
+    LLM_CHAT_DEPLOYMENTS: str = os.getenv("LLM_CHAT_DEPLOYMENTS", "")
+    LLM_CHAT_TIMEOUT: float = float(os.getenv("LLM_CHAT_TIMEOUT", "0"))
+    LLM_CHAT_MAX_TOKENS: int = int(os.getenv("LLM_CHAT_MAX_TOKENS", "800"))
+    LLM_MCQ_DEPLOYMENTS: str = os.getenv("LLM_MCQ_DEPLOYMENTS", "")  # Also writes lazy explanations; max_tokens is sized by MCQ_MAX_TOKENS_*
+    LLM_MCQ_TIMEOUT: float = float(os.getenv("LLM_MCQ_TIMEOUT", "0"))
+    
+    # Ask for provider JSON mode on JSON prompts (needs a model and API version that support response_format)
+    LLM_JSON_MODE: bool = os.getenv("LLM_JSON_MODE", "false").lower() == "true"
+    # Coalesce identical in-flight completions into one upstream call
+    LLM_SINGLE_FLIGHT_ENABLED: bool = os.getenv("LLM_SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    
+    # Seconds between background prompt file mtime checks; 0 disables hot reload
+    PROMPT_RELOAD_INTERVAL: float = float(os.getenv("PROMPT_RELOAD_INTERVAL", "5"))
+    
+    # "two_step" detects intent and then answers; "single_call" answers or calls a make_quiz tool in one completion
+    CHAT_PIPELINE: str = os.getenv("CHAT_PIPELINE", "two_step")
+    
+    # Local intent classifier answers obvious messages without an LLM round trip
+    INTENT_FAST_PATH_ENABLED: bool = os.getenv("INTENT_FAST_PATH_ENABLED", "true").lower() == "true"
+    INTENT_FAST_PATH_THRESHOLD: float = float(os.getenv("INTENT_FAST_PATH_THRESHOLD", "0.9"))
+    
+    # Start the chat answer alongside LLM intent detection: "never", "always" or "prior"
+    SPECULATIVE_CHAT_POLICY: str = os.getenv("SPECULATIVE_CHAT_POLICY", "never").lower()
+    # With the "prior" policy, speculate when the local MCQ probability is below this
+    SPECULATIVE_CHAT_PRIOR_MAX: float = float(os.getenv("SPECULATIVE_CHAT_PRIOR_MAX", "0.5"))
+    
+    # Persistent MCQ question bank served ahead of generate_mcqs
+    QUESTION_BANK_ENABLED: bool = os.getenv("QUESTION_BANK_ENABLED", "true").lower() == "true"
+    QUESTION_BANK_PATH: str = os.getenv("QUESTION_BANK_PATH", "/tmp/question_bank.db")
+    QUESTION_BANK_MAX_TOPICS: int = int(os.getenv("QUESTION_BANK_MAX_TOPICS", "500"))
+    QUESTION_BANK_MAX_PER_TOPIC: int = int(os.getenv("QUESTION_BANK_MAX_PER_TOPIC", "100"))
+    QUESTION_BANK_TTL_SECONDS: float = float(os.getenv("QUESTION_BANK_TTL_SECONDS", str(7 * 24 * 3600)))
+    # A topic is served from the bank once its pool holds this many times the questions asked for (at least 2)
+    QUESTION_BANK_POOL_FACTOR: int = int(os.getenv("QUESTION_BANK_POOL_FACTOR", "3"))
+    
+    # Cache of generate_response answers keyed on the normalized query
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+    RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    RESPONSE_CACHE_DISK_PATH: str = os.getenv("RESPONSE_CACHE_DISK_PATH", "")  # Empty disables the disk tier
+    
+    # MCQ output format asked of the model: "compact" positional arrays or "verbose" keyed objects
+    MCQ_WIRE_FORMAT: str = os.getenv("MCQ_WIRE_FORMAT", "compact")
+    # max_tokens for MCQ generation is sized from num_questions, times this headroom, up to the cap
+    MCQ_MAX_TOKENS_HEADROOM: float = float(os.getenv("MCQ_MAX_TOKENS_HEADROOM", "1.5"))
+    MCQ_MAX_TOKENS_CAP: int = int(os.getenv("MCQ_MAX_TOKENS_CAP", "4000"))
+    # Split large MCQ requests into concurrent shards; MCQ_SHARD_SIZE 0 sizes them from observed latency
+    MCQ_SHARDING_ENABLED: bool = os.getenv("MCQ_SHARDING_ENABLED", "true").lower() == "true"
+    MCQ_SHARD_SIZE: int = int(os.getenv("MCQ_SHARD_SIZE", "0"))
+    MCQ_SHARD_MIN_QUESTIONS: int = int(os.getenv("MCQ_SHARD_MIN_QUESTIONS", "10"))  # Smaller requests are one call
+    MCQ_MAX_SHARDS: int = int(os.getenv("MCQ_MAX_SHARDS", "4"))
+    MCQ_DUPLICATE_THRESHOLD: float = float(os.getenv("MCQ_DUPLICATE_THRESHOLD", "0.6"))  # Word overlap at which two questions count as the same
+    # Follow-up calls for just the questions a cut-off or partly invalid MCQ reply is missing
+    MCQ_REPAIR_ATTEMPTS: int = int(os.getenv("MCQ_REPAIR_ATTEMPTS", "2"))
+    # "inline" writes explanations with the questions; "on_submit" and "speculative" generate the questions
+    # without them and explain the whole quiz in one call when it is graded, or as soon as it is served
+    MCQ_EXPLANATIONS: str = os.getenv("MCQ_EXPLANATIONS", "inline")
+    MCQ_EXPLANATION_WAIT_SECONDS: float = float(os.getenv("MCQ_EXPLANATION_WAIT_SECONDS", "15"))  # Grading returns without them after this
+    # Served quizzes kept server-side so answers are graded by quiz ID
+    QUIZ_SESSION_TTL_SECONDS: float = float(os.getenv("QUIZ_SESSION_TTL_SECONDS", "7200"))
+    QUIZ_SESSION_MAX: int = int(os.getenv("QUIZ_SESSION_MAX", "10000"))
+    
+    # Topics generated concurrently per /api/mcq/generate/batch request, and the most one batch may hold
+    MCQ_BATCH_CONCURRENCY: int = int(os.getenv("MCQ_BATCH_CONCURRENCY", "8"))
+    MCQ_BATCH_MAX_TOPICS: int = int(os.getenv("MCQ_BATCH_MAX_TOPICS", "50"))
     
     class Config:
         env_file = ".env"
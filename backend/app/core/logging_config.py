@@ -0,0 +1,125 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Optional
+
+# Route of the request being handled, and whether its debug records are kept
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+debug_sampled: ContextVar[bool] = ContextVar("debug_sampled", default=True)
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "route"}
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, including any extra= fields passed to the log call"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        route = getattr(record, "route", None)
+        if route:
+            entry["route"] = route
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to the writer thread without formatting them
+
+    The stock QueueHandler formats every record (tracebacks included) in the
+    calling thread. Here only the message is resolved, so mutable arguments
+    are captured, and the rest of the formatting happens on the writer thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        record.route = current_route.get()
+        return record
+
+class DebugSampler(logging.Filter):
+    """Drop DEBUG records from requests that were not picked for debug sampling"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or debug_sampled.get()
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "/api/chat=0.1,/api/mcq/generate=0.5" into a route -> rate mapping"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, rate = item.partition("=")
+        rates[route.strip()] = float(rate)
+    return rates
+
+class RouteSampler:
+    """Decides once per request whether its DEBUG records are written"""
+
+    def __init__(self, default_rate: float = 1.0, rates: Optional[Dict[str, float]] = None):
+        self.default_rate = default_rate
+        self.rates = rates or {}
+
+    def start_request(self, route: str):
+        current_route.set(route)
+        rate = self.rates.get(route, self.default_rate)
+        debug_sampled.set(rate >= 1.0 or (rate > 0.0 and random.random() < rate))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def setup_logging(level: str = "INFO", log_file: Optional[Path] = None, log_format: str = "json") -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue to a background writer thread
+
+    Args:
+        level: Root log level name, e.g. "INFO"
+        log_file: Optional file written alongside stderr
+        log_format: "json" for structured records, "text" for the classic layout
+
+    Returns:
+        The running queue listener
+    """
+    global _listener
+    shutdown_logging()
+
+    if log_format == "json":
+        formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    handlers = [logging.StreamHandler()]
+    if log_file is not None:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+@atexit.register
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
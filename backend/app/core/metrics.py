@@ -0,0 +1,63 @@
+import functools
+import time
+from typing import Awaitable, Callable, TypeVar
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+T = TypeVar("T")
+
+# Buckets spanning cache hits (sub-millisecond) to long MCQ generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response starts (first byte for streams), by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled")
+
+STAGE_SECONDS = Histogram(
+    "llm_stage_duration_seconds",
+    "Time spent in each LLMService stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+COMPLETION_SECONDS = Histogram(
+    "llm_completion_duration_seconds",
+    "Upstream completion latency including quota waits and retries (time to first chunk for streams)",
+    ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_IN_FLIGHT = Gauge("llm_requests_in_flight", "Upstream completions currently outstanding", ["operation"])
+TOKENS = Counter("llm_tokens_total", "Tokens billed, from the completion usage field", ["operation", "kind"])
+PARSE_FAILURES = Counter("llm_parse_failures_total", "Model outputs or items that failed structured parsing", ["kind"])
+FALLBACKS = Counter("llm_fallbacks_total", "Requests answered by a fallback path instead of the intended one", ["reason"])
+MCQ_QUESTION_TOKENS = Histogram(
+    "llm_mcq_completion_tokens_per_question",
+    "Completion tokens per generated question, by MCQ output format",
+    ["format"],
+    buckets=(10, 20, 30, 40, 50, 60, 70, 80, 100, 120, 150, 200, 300)
+)
+MCQ_DUPLICATES = Counter("llm_mcq_duplicates_dropped_total", "Near-duplicate questions dropped when merging MCQ shards")
+MCQ_REGENERATED = Counter("llm_mcq_regenerated_questions_total", "Questions requested again because a reply came up short, cut off or with invalid items")
+HEDGES = Counter("llm_hedged_requests_total", "Completions duplicated on a second deployment, by which request answered", ["winner"])
+
+def timed_stage(stage: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Record how long each call of an async method takes under the given stage label"""
+    # Bound once here so each observation skips the label lookup
+    histogram = STAGE_SECONDS.labels(stage)
+    
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def render_metrics():
+    """The current metrics in Prometheus text format, with its content type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
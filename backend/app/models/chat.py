@@ -1,8 +1,10 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 
 class ChatRequest(BaseModel):
     message: str
+    # "no-cache" skips cached answers but stores the new one, "no-store" bypasses the cache entirely
+    cache_control: Literal["default", "no-cache", "no-store"] = "default"
     
 class ChatResponse(BaseModel):
     message: str
@@ -1,17 +1,65 @@
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+import re
+from pydantic import BaseModel, field_validator, model_validator
+from typing import List, Dict, Any, Literal, Optional
+
+OPTION_KEYS = ("A", "B", "C", "D")
+# The answer letter, after an optional "Option"/"Answer" label and opening bracket
+_ANSWER_LETTER = re.compile(r"^\s*(?:(?:correct\s+)?(?:option|answer|choice)\b\s*[:.\-]?\s*)?[(\[]?([A-D])\b", re.IGNORECASE)
+
+class MCQQuestion(BaseModel):
+    """One generated question, validated before it reaches clients or the question bank"""
+    question: str
+    options: Dict[str, str]
+    correct_answer: Literal["A", "B", "C", "D"]
+    explanation: Optional[str] = None
+    
+    @field_validator("question")
+    @classmethod
+    def stem_not_blank(cls, value: str) -> str:
+        if not value.strip():
+            raise ValueError("question is empty")
+        return value
+    
+    @field_validator("options")
+    @classmethod
+    def four_lettered_options(cls, value: Dict[str, str]) -> Dict[str, str]:
+        if sorted(value) != list(OPTION_KEYS) or not all(text.strip() for text in value.values()):
+            raise ValueError("options must be non-empty A, B, C and D")
+        return {key: value[key] for key in OPTION_KEYS}
+    
+    @field_validator("correct_answer", mode="before")
+    @classmethod
+    def answer_letter(cls, value: Any) -> Any:
+        # Models sometimes answer "b", "B)", "B. Paris" or "Option B" instead of "B"
+        if isinstance(value, str):
+            match = _ANSWER_LETTER.match(value)
+            if match:
+                return match.group(1).upper()
+        return value
 
 class MCQRequest(BaseModel):
     topic: str
     num_questions: int = 4
 
+class MCQBatchRequest(BaseModel):
+    requests: List[MCQRequest]
+
 class MCQResponse(BaseModel):
     topic: str
     questions: List[Dict[str, Any]]
+    quiz_id: Optional[str] = None
 
 class MCQSubmission(BaseModel):
-    questions: List[Dict[str, Any]]
+    """Answers for a stored quiz; posting the questions back is the legacy form"""
+    quiz_id: Optional[str] = None
     answers: List[str]
+    questions: Optional[List[Dict[str, Any]]] = None
+    
+    @model_validator(mode="after")
+    def quiz_or_questions(self) -> "MCQSubmission":
+        if self.quiz_id is None and self.questions is None:
+            raise ValueError("quiz_id is required")
+        return self
 
 class MCQResult(BaseModel):
     question: str
@@ -24,4 +72,25 @@ class MCQEvaluation(BaseModel):
     score: int
     total: int
     percentage: float
-    results: List[MCQResult]
\ No newline at end of file
+    results: List[MCQResult]
+
+class MCQBulkSubmission(BaseModel):
+    """Answer sheets from a whole class for one stored quiz"""
+    quiz_id: str
+    submissions: List[List[str]]
+
+class MCQItemStats(BaseModel):
+    question: str
+    correct_answer: str
+    percent_correct: float
+    option_counts: Dict[str, int]
+    blank: int
+    discrimination: float
+
+class MCQBulkEvaluation(BaseModel):
+    quiz_id: str
+    total: int
+    submissions: int
+    scores: List[int]
+    mean_score: float
+    items: List[MCQItemStats]
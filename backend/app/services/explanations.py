@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.services.llm import llm_service
+from app.services.quiz_store import StoredQuiz, quiz_store
+from app.services.rate_limiter import PRIORITY_BULK, PRIORITY_INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+class ExplanationStats:
+    """
+    Counters for judging lazy MCQ explanations
+
+    ready_at_submit counts quizzes whose explanations were already written
+    when they were graded; wait_seconds is the grading time spent on the
+    rest. Speculated quizzes that are never graded are pure cost, visible
+    as speculated minus graded.
+    """
+
+    def __init__(self):
+        self.speculated = 0
+        self.graded = 0
+        self.ready_at_submit = 0
+        self.wait_seconds = 0.0
+        self.failed = 0
+        self.timed_out = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "mode": llm_service.explanation_mode,
+            "speculated": self.speculated,
+            "graded": self.graded,
+            "ready_at_submit": self.ready_at_submit,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+        }
+
+explanation_stats = ExplanationStats()
+
+def create_quiz(topic: str, questions: List[Dict[str, Any]]) -> str:
+    """Store a served quiz and return its ID, starting its explanations now in speculative mode"""
+    quiz_id = quiz_store.create(topic, questions)
+    if llm_service.explanation_mode == "speculative":
+        quiz = quiz_store.get(quiz_id)
+        if quiz.unexplained:
+            explanation_stats.speculated += 1
+            # Background work: queued behind interactive calls when the quota is tight
+            start_explaining(quiz, PRIORITY_BULK)
+    return quiz_id
+
+def start_explaining(quiz: StoredQuiz, priority: int = PRIORITY_INTERACTIVE) -> Optional[asyncio.Task]:
+    """The task writing the quiz's missing explanations, started if it is not already running"""
+    if not quiz.unexplained:
+        return None
+    if quiz.explaining is None:
+        quiz.explaining = asyncio.create_task(_explain(quiz, priority))
+        quiz.explaining.add_done_callback(_discard)
+    return quiz.explaining
+
+async def _explain(quiz: StoredQuiz, priority: int):
+    indices = sorted(quiz.unexplained)
+    try:
+        explanations = await llm_service.explain_mcqs(quiz.topic, [quiz.unexplained[i] for i in indices], priority)
+    except Exception:
+        # A later grading may try again
+        quiz.explaining = None
+        raise
+    for i, explanation in zip(indices, explanations):
+        if explanation:
+            quiz.explanations[i] = explanation
+    quiz.unexplained = {}
+
+def _discard(task: asyncio.Task):
+    # Retrieve the result of a speculation nobody grades, or a call grading stopped waiting for,
+    # so asyncio does not warn about it
+    if not task.cancelled():
+        task.exception()
+
+async def ensure_explanations(quiz: StoredQuiz):
+    """
+    Fill in a quiz's missing explanations before it is graded
+
+    Waits for the speculative call if one is running, otherwise makes the
+    batched call now. Grading never fails on explanations: if they cannot
+    be written within MCQ_EXPLANATION_WAIT_SECONDS the results go out
+    without them, and the call keeps running for the next grading.
+    """
+    if llm_service.explanation_mode == "inline":
+        return
+    explanation_stats.graded += 1
+    if not quiz.unexplained:
+        explanation_stats.ready_at_submit += 1
+        return
+    task = start_explaining(quiz)
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.shield(task), settings.MCQ_EXPLANATION_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        explanation_stats.timed_out += 1
+        logger.warning("Grading quiz %s without explanations after %ss", quiz.quiz_id, settings.MCQ_EXPLANATION_WAIT_SECONDS)
+    except Exception as e:
+        explanation_stats.failed += 1
+        logger.error("Could not explain quiz %s: %s", quiz.quiz_id, e)
+    finally:
+        explanation_stats.wait_seconds += time.perf_counter() - start
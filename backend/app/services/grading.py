@@ -0,0 +1,101 @@
+import logging
+from typing import Any, Dict, List
+import numpy as np
+from app.models.mcq import OPTION_KEYS
+from app.services.quiz_store import OPTION_INDEX, StoredQuiz
+
+logger = logging.getLogger(__name__)
+
+# Answer code for a blank or unrecognised answer
+BLANK = -1
+# Fraction of the class forming the upper and lower groups of the discrimination index (Kelley's 27%)
+DISCRIMINATION_GROUP = 0.27
+
+# Maps a one-character answer to its option index: "A"/"a" -> 0 ... "D"/"d" -> 3, anything else -> BLANK
+_LOOKUP = np.full(128, BLANK, dtype=np.int8)
+for _index, _key in enumerate(OPTION_KEYS):
+    _LOOKUP[ord(_key)] = _LOOKUP[ord(_key.lower())] = _index
+
+def encode_answers(submissions: List[List[str]], num_questions: int) -> np.ndarray:
+    """
+    Encode answer sheets as an int8 matrix of option indices
+
+    Args:
+        submissions: One list of option letters per student
+        num_questions: Expected answers per sheet
+
+    Returns:
+        A (students, questions) matrix with 0-3 for A-D and BLANK elsewhere
+    """
+    for row, sheet in enumerate(submissions):
+        if len(sheet) != num_questions:
+            raise ValueError(f"Submission {row} has {len(sheet)} answers, expected {num_questions}")
+    if not submissions:
+        return np.empty((0, num_questions), dtype=np.int8)
+
+    answers = np.array(submissions, dtype=str).reshape(len(submissions), num_questions)
+    if answers.dtype.itemsize > 4:
+        # Some answer is longer than one character: normalise each distinct
+        # answer exactly as StoredQuiz.grade does, so " b" counts as B but
+        # "B) Paris" and "Banana" do not
+        values, inverse = np.unique(answers, return_inverse=True)
+        codes = np.array([OPTION_INDEX.get(value.strip().upper(), BLANK) for value in values], dtype=np.int8)
+        return codes[inverse].reshape(answers.shape)
+
+    # Every answer is at most one character; its code point indexes the lookup table
+    codes = answers.view(np.uint32)
+    encoded = np.full(codes.shape, BLANK, dtype=np.int8)
+    ascii_mask = codes < 128
+    encoded[ascii_mask] = _LOOKUP[codes[ascii_mask]]
+    return encoded
+
+def grade_bulk(quiz: StoredQuiz, responses: np.ndarray) -> Dict[str, Any]:
+    """
+    Grade every answer sheet for a quiz in one pass and compute item statistics
+
+    Args:
+        quiz: The stored quiz whose key is graded against
+        responses: Matrix from encode_answers
+
+    Returns:
+        A dict shaped like MCQBulkEvaluation
+    """
+    key = np.frombuffer(quiz.answer_key, dtype=np.uint8).astype(np.int8)
+    students, num_questions = responses.shape
+    correct = responses == key
+    scores = correct.sum(axis=1)
+
+    # Option counts per question: one row per option, plus a row for blanks
+    option_counts = np.stack([(responses == option).sum(axis=0) for option in range(len(OPTION_KEYS))])
+    blanks = (responses == BLANK).sum(axis=0)
+
+    if students:
+        percent_correct = correct.mean(axis=0) * 100
+        # Difference in proportion correct between the top and bottom scorers
+        group = max(1, int(round(DISCRIMINATION_GROUP * students)))
+        order = np.argsort(scores, kind="stable")
+        discrimination = correct[order[-group:]].mean(axis=0) - correct[order[:group]].mean(axis=0)
+    else:
+        percent_correct = np.zeros(num_questions)
+        discrimination = np.zeros(num_questions)
+
+    items = [
+        {
+            "question": quiz.stems[i],
+            "correct_answer": OPTION_KEYS[key[i]],
+            "percent_correct": round(float(percent_correct[i]), 2),
+            "option_counts": {option: int(option_counts[o, i]) for o, option in enumerate(OPTION_KEYS)},
+            "blank": int(blanks[i]),
+            "discrimination": round(float(discrimination[i]), 3)
+        }
+        for i in range(num_questions)
+    ]
+    logger.info("Bulk graded %s submission(s) for quiz %s", students, quiz.quiz_id)
+    return {
+        "quiz_id": quiz.quiz_id,
+        "total": num_questions,
+        "submissions": students,
+        "scores": scores.tolist(),
+        "mean_score": round(float(scores.mean()), 3) if students else 0.0,
+        "items": items
+    }
@@ -0,0 +1,115 @@
+import re
+from typing import Any, Dict, Optional, Tuple
+
+# Words that only show up when someone wants a quiz
+_QUIZ_TERMS = re.compile(r"\b(?:mcqs?|multiple[- ]choice|quiz(?:zes)?|quiz\s+me|test\s+me)\b", re.IGNORECASE)
+# "questions" alone is ambiguous ("I have questions about taxes"), so it needs more support
+_QUESTION_TERMS = re.compile(r"\bquestions?\b", re.IGNORECASE)
+_REQUEST_VERBS = re.compile(
+    r"\b(?:give|generate|create|make|ask|show|prepare|write|send|set|need|want|can\s+you|could\s+you|please)\b",
+    re.IGNORECASE
+)
+# Messages opening like a question about the concept itself ("what is a quiz?")
+_INFO_OPENERS = re.compile(r"^\s*(?:what|why|how|when|where|who|which|explain|define|describe|tell me about)\b", re.IGNORECASE)
+# Short pleasantries that never ask for anything
+_SMALL_TALK = re.compile(
+    r"^\s*(?:hi|hello|hey|thanks|thank\s+you|thx|ok(?:ay)?|cool|great|bye|goodbye|good\s+(?:morning|afternoon|evening|night))\b",
+    re.IGNORECASE
+)
+# Words a quiz request can use without any quiz vocabulary ("test my knowledge", "practice problems")
+_PRACTICE_TERMS = re.compile(r"\b(?:test|tests|testing|practi[cs]e|exercises?|problems?|drills?|revis(?:e|ion)|assess|check\s+my)\b", re.IGNORECASE)
+# "for", "in" and "from" name an audience or a time far more often than a subject
+# ("a quiz for me", "for my students", "for tomorrow"), so they do not anchor a topic
+_TOPIC = re.compile(r"\b(?:on|about|regarding|covering|related\s+to)\s+(?:the\s+topics?\s+(?:of\s+)?)?(.+)$", re.IGNORECASE)
+_TOPIC_TRAILER = re.compile(r"(?:\s+(?:please|pls|for\s+me|thanks|thank\s+you))+\s*$", re.IGNORECASE)
+# Topics that name a person, a time or someone's things rather than a subject
+_VAGUE_TOPIC = re.compile(
+    r"^(?:(?:me|us|you|him|her|them|it|this|that|these|those|today|tonight|tomorrow|now|later)$"
+    r"|(?:my|our|your|his|her|their|its|next|this|last)\s)",
+    re.IGNORECASE
+)
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "a couple of": 2, "a couple": 2, "couple of": 2, "a few": 3, "few": 3,
+}
+_COUNT = re.compile(
+    r"\b(\d{1,3}|one|two|three|four|five|six|seven|eight|nine|ten|a\s+couple(?:\s+of)?|couple\s+of|a\s+few|few)"
+    r"\s+(?:[a-z-]+\s+){0,2}?(?:mcqs?|multiple[- ]choice|quiz|questions?)\b",
+    re.IGNORECASE
+)
+
+DEFAULT_NUM_QUESTIONS = 4
+
+NOT_MCQ = {"mcq_expected": False, "topic": "", "num_questions": DEFAULT_NUM_QUESTIONS}
+
+def _extract_count(message: str) -> Optional[int]:
+    match = _COUNT.search(message)
+    if not match:
+        return None
+    word = " ".join(match.group(1).lower().split())
+    if word.isdigit():
+        return int(word)
+    return _NUMBER_WORDS.get(word)
+
+def _extract_topic(text: str) -> str:
+    match = _TOPIC.search(text)
+    if not match:
+        return ""
+    topic = match.group(1).strip().rstrip("?!.,;:")
+    topic = _TOPIC_TRAILER.sub("", topic).strip().rstrip("?!.,;:")
+    return topic.strip("\"'")
+
+def classify_intent(message: str) -> Tuple[Dict[str, Any], float]:
+    """
+    Cheap local MCQ intent detection for obvious messages
+    
+    Args:
+        message: The raw user message
+        
+    Returns:
+        The intent result in the same shape as LLMService.detect_mcq_intent,
+        and a confidence between 0 and 1. Callers should only trust results
+        above their threshold and otherwise ask the LLM.
+    """
+    quiz_match = _QUIZ_TERMS.search(message)
+    question_match = _QUESTION_TERMS.search(message)
+    
+    if not quiz_match and not question_match:
+        # No quiz vocabulary at all. Only greetings and plain questions are
+        # safe to answer without the LLM: "test my knowledge of physics" asks
+        # for a quiz in other words.
+        if _PRACTICE_TERMS.search(message):
+            return dict(NOT_MCQ), 0.4
+        if _SMALL_TALK.search(message) and len(message.split()) <= 6:
+            return dict(NOT_MCQ), 0.97
+        if _INFO_OPENERS.search(message):
+            return dict(NOT_MCQ), 0.95
+        return dict(NOT_MCQ), 0.7
+    
+    count = _extract_count(message)
+    anchor = quiz_match or question_match
+    topic = _extract_topic(message[anchor.end():])
+    asks_for_something = bool(_REQUEST_VERBS.search(message))
+    reads_like_info_question = bool(_INFO_OPENERS.search(message))
+    
+    result = {
+        "mcq_expected": True,
+        "topic": topic,
+        "num_questions": count if count is not None else DEFAULT_NUM_QUESTIONS
+    }
+    
+    if quiz_match:
+        if not topic or _VAGUE_TOPIC.search(topic):
+            # "What is an MCQ?", "quiz me" or "a quiz on my notes": let the LLM decide
+            return result, 0.5
+        if reads_like_info_question:
+            # "How do I write good MCQs for my students?" is about quizzes, not a request for one
+            return result, 0.6
+        return result, 0.95 if asks_for_something else 0.9
+    
+    # Only the word "questions": a quiz request needs a count or an explicit ask
+    if topic and not _VAGUE_TOPIC.search(topic) and count is not None and asks_for_something and not reads_like_info_question:
+        return result, 0.9
+    return result, 0.4
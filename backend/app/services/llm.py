@@ -1,12 +1,24 @@
 import os
+import asyncio
 import json
-import yaml
-import re
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 import logging
-import traceback
-from app.utils.prompt_loader import load_prompt
+import httpx
+from openai import APIConnectionError, InternalServerError, RateLimitError
+from app.utils.prompt_loader import prompt_registry
+from app.utils.json_stream import JSONArrayStreamParser
+from app.utils.structured_output import parse_intent, parse_quiz_call, parse_mcqs, parse_explanations, validate_questions, StructuredOutputError
+from app.utils.singleflight import SingleFlight
+from app.services.intent_classifier import classify_intent
+from app.services.question_bank import QuestionBank
+from app.services.response_cache import ResponseCache, make_cache_key, CACHE_DEFAULT, CACHE_NO_STORE
+from app.services.replay import Cassette, ReplayClient, RecordingClient, RECORD_MODE
+from app.services.router import PRIMARY, Deployment, DeploymentRouter
+from app.services.mcq_sharding import SHARD_FOCUSES, ShardLatencyModel, merge_questions, spare_questions, split_evenly
+from app.services.rate_limiter import RateLimiter, QuotaExceededError, PRIORITY_INTERACTIVE, estimate_tokens, retry_after_seconds, backoff_delay
 from app.core.config import settings
+from app.core.metrics import STAGE_SECONDS, COMPLETION_SECONDS, LLM_IN_FLIGHT, TOKENS, PARSE_FAILURES, FALLBACKS, MCQ_QUESTION_TOKENS, MCQ_DUPLICATES, MCQ_REGENERATED, timed_stage
 from dotenv import load_dotenv
 
 # Load environment variables from .env file if it exists
@@ -14,22 +26,170 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+_INTENT_PARSE_STAGE = STAGE_SECONDS.labels("intent_parse")
+_MCQ_PARSE_STAGE = STAGE_SECONDS.labels("mcq_parse")
+
+# Prompt directory, question list key and p95 completion tokens per question
+# (measured by benchmarks/mcq_wire_format.py) of each MCQ output format
+_MCQ_FORMATS = {
+    "compact": ("formulate_mcqs_compact", "q", 66),
+    "verbose": ("formulate_mcqs", "questions", 116),
+    # Compact without explanations, used when they are generated lazily
+    "brief": ("formulate_mcqs_brief", "q", 47),
+}
+# p95 completion tokens of one explain_mcqs explanation, measured the same way
+_EXPLANATION_TOKENS = 21
+# Model tier each operation label is routed as
+_OPERATION_TIERS = {
+    "intent": "intent",
+    "chat": "chat",
+    "chat_stream": "chat",
+    "chat_route": "chat",
+    "chat_route_stream": "chat",
+    "mcqs": "mcq",
+    "mcqs_stream": "mcq",
+    "explanations": "mcq",
+}
+# How a chat turn is handled: intent detection, then the answer or quiz, or one
+# completion that answers directly or calls make_quiz
+CHAT_PIPELINES = ("two_step", "single_call")
+# Sent unchanged on every single_call turn so the tools and system prompt form a cacheable prefix
+_MAKE_QUIZ_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "make_quiz",
+        "description": "Create a multiple-choice quiz for the user on a topic.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "topic": {"type": "string", "description": "What the quiz is about"},
+                "num_questions": {"type": "integer", "description": "How many questions the user asked for, 4 if they did not say"}
+            },
+            "required": ["topic", "num_questions"]
+        }
+    }
+}
+# When MCQ explanations are written: with the questions, in one batched call when the quiz is
+# submitted, or by that batched call started in the background as soon as the quiz is served
+EXPLANATION_MODES = ("inline", "on_submit", "speculative")
+# Completion tokens outside the questions: the wrapping object, plus a fence or preamble some models add
+_MCQ_OVERHEAD_TOKENS = 30
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def mcq_max_tokens(num_questions: int, wire_format: str) -> int:
+    """Completion budget for num_questions in the given format, with headroom over the measured p95"""
+    budget = settings.MCQ_MAX_TOKENS_HEADROOM * (_MCQ_OVERHEAD_TOKENS + num_questions * _MCQ_FORMATS[wire_format][2])
+    return min(settings.MCQ_MAX_TOKENS_CAP, int(budget))
+
+def explanation_max_tokens(num_questions: int) -> int:
+    budget = settings.MCQ_MAX_TOKENS_HEADROOM * (_MCQ_OVERHEAD_TOKENS + num_questions * _EXPLANATION_TOKENS)
+    return min(settings.MCQ_MAX_TOKENS_CAP, int(budget))
+
+def build_http_client(http2: bool) -> httpx.AsyncClient:
+    """
+    Build the shared HTTP connection pool used by the async LLM clients.
+    
+    Connections are kept alive between calls so each completion skips the
+    TCP/TLS handshake, and the pool size bounds concurrent upstream sockets.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY
+    )
+    timeout = httpx.Timeout(settings.LLM_REQUEST_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+    logger.info("Creating LLM HTTP pool (max_connections=%s, keepalive=%s, http2=%s)", limits.max_connections, limits.max_keepalive_connections, http2)
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
 class LLMService:
     def __init__(self):
         logger.debug("Initializing LLM Service")
         
+        # One pooled HTTP client shared by every completion call
+        self.http2 = settings.LLM_HTTP2 and _http2_available()
+        self.http_client = build_http_client(self.http2)
+        
+        # Calls are routed across deployments; the provider set up below is the primary one
+        self.router = DeploymentRouter(
+            [Deployment()],
+            alpha=settings.LLM_ROUTER_EWMA_ALPHA,
+            explore_rate=settings.LLM_ROUTER_EXPLORE_RATE,
+            hedge=settings.LLM_HEDGE_ENABLED,
+            hedge_quantile=settings.LLM_HEDGE_QUANTILE,
+            hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY
+        )
+        
         # Determine which LLM provider to use
         self.provider = os.getenv("LLM_PROVIDER", "azure").lower()
         
         if self.provider == "azure":
             self._init_azure_openai()
+        elif self.provider == "replay":
+            self._init_replay()
         else:
             self._init_openai()
+        if self.provider != "replay":
+            self._init_deployments()
+        self._init_tiers()
+        
+        self.mcq_format = settings.MCQ_WIRE_FORMAT.lower()
+        if self.mcq_format not in _MCQ_FORMATS:
+            logger.warning("Unknown MCQ_WIRE_FORMAT %r, using compact", settings.MCQ_WIRE_FORMAT)
+            self.mcq_format = "compact"
+        self.explanation_mode = settings.MCQ_EXPLANATIONS.lower()
+        if self.explanation_mode not in EXPLANATION_MODES:
+            logger.warning("Unknown MCQ_EXPLANATIONS %r, generating them inline", settings.MCQ_EXPLANATIONS)
+            self.explanation_mode = "inline"
+        self.chat_pipeline = settings.CHAT_PIPELINE.lower()
+        if self.chat_pipeline not in CHAT_PIPELINES:
+            logger.warning("Unknown CHAT_PIPELINE %r, using two_step", settings.CHAT_PIPELINE)
+            self.chat_pipeline = "two_step"
+        if self.explanation_mode != "inline":
+            # Time to quiz is spent on stems, options and keys only
+            self.mcq_format = "brief"
+        # Fitted MCQ completion latency, used to size shards
+        self.mcq_latency = ShardLatencyModel()
+        
+        self.question_bank = self._init_question_bank()
+        self.response_cache = self._init_response_cache()
+        # Identical concurrent completions share one upstream call
+        self.single_flight = SingleFlight() if settings.LLM_SINGLE_FLIGHT_ENABLED else None
+        # Every upstream call waits its turn against the deployment quotas
+        self.rate_limiter = RateLimiter(
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            burst_seconds=settings.LLM_RATE_LIMIT_BURST_SECONDS
+        )
+    
+    @property
+    def client(self):
+        """Client of the primary deployment"""
+        return self.router.primary.client
+    
+    @client.setter
+    def client(self, client):
+        self.router.primary.client = client
+    
+    @property
+    def deployment_name(self) -> Optional[str]:
+        """Model or Azure deployment name of the primary deployment"""
+        return self.router.primary.model
+    
+    @deployment_name.setter
+    def deployment_name(self, name: str):
+        self.router.primary.model = name
             
     def _init_azure_openai(self):
         """Initialize Azure OpenAI client"""
         try:
-            from openai import AzureOpenAI
+            from openai import AsyncAzureOpenAI
             
             # Check if required Azure OpenAI environment variables are set
             api_base = settings.AZURE_OPENAI_API_BASE
@@ -58,36 +218,37 @@ class LLMService:
                     # Additional validation - make sure it's ASCII-only to avoid encoding issues
                     api_base = api_base.encode('ascii', errors='ignore').decode('ascii')
                         
-                    logger.info(f"Using API base URL: {api_base}")
+                    logger.info("Using API base URL: %s", api_base)
                 except Exception as e:
-                    logger.error(f"Error sanitizing API base URL: {str(e)}")
-                    logger.error(traceback.format_exc())
+                    logger.exception("Error sanitizing API base URL: %s", e)
                     self._init_openai()
                     return
             
             # Initialize the Azure OpenAI client
-            self.client = AzureOpenAI(
+            self.client = AsyncAzureOpenAI(
                 api_key=api_key,
                 api_version=api_version,
-                azure_endpoint=api_base
+                azure_endpoint=api_base,
+                http_client=self.http_client,
+                # Retries are scheduled by _complete so they respect the rate limiter
+                max_retries=0
             )
             
             self.deployment_name = deployment_name
             self.provider = "azure"
             
             # Log successful Azure OpenAI initialization
-            logger.info(f"Successfully initialized Azure OpenAI client with deployment: {self.deployment_name}")
+            logger.info("Successfully initialized Azure OpenAI client with deployment: %s", self.deployment_name)
             
         except Exception as e:
-            logger.error(f"Error initializing Azure OpenAI client: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error initializing Azure OpenAI client: %s", e)
             logger.info("Falling back to regular OpenAI...")
             self._init_openai()
     
     def _init_openai(self):
         """Initialize regular OpenAI client as fallback"""
         try:
-            from openai import OpenAI
+            from openai import AsyncOpenAI
             
             # Check if OpenAI API key is set
             api_key = os.getenv("OPENAI_API_KEY")
@@ -96,270 +257,851 @@ class LLMService:
                 raise ValueError("Missing OpenAI API key. Please set OPENAI_API_KEY environment variable.")
             
             # Initialize the regular OpenAI client
-            self.client = OpenAI(
-                api_key=api_key
+            self.client = AsyncOpenAI(
+                api_key=api_key,
+                http_client=self.http_client,
+                max_retries=0
             )
             
             # Use gpt-4 as the default model
             self.deployment_name = os.getenv("OPENAI_MODEL", "gpt-4")
             self.provider = "openai"
             
-            logger.info(f"Successfully initialized regular OpenAI client with model: {self.deployment_name}")
+            logger.info("Successfully initialized regular OpenAI client with model: %s", self.deployment_name)
             
         except Exception as e:
-            logger.error(f"Error initializing OpenAI client: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error initializing OpenAI client: %s", e)
             raise
     
+    def _init_replay(self):
+        """Serve completions from a cassette, or record real ones into it"""
+        cassette = Cassette(settings.LLM_REPLAY_CASSETTE)
+        if settings.LLM_REPLAY_MODE.lower() == RECORD_MODE:
+            if settings.LLM_REPLAY_UPSTREAM.lower() == "azure":
+                self._init_azure_openai()
+            else:
+                self._init_openai()
+            self.client = RecordingClient(self.client, cassette)
+            logger.info("Recording %s completions to %s", self.provider, cassette.path)
+        else:
+            # No network and no API key needed
+            self.client = ReplayClient(cassette, speed=settings.LLM_REPLAY_SPEED)
+            self.deployment_name = os.getenv("OPENAI_MODEL", "replay")
+            logger.info("Replaying completions from %s (speed %s)", cassette.path, settings.LLM_REPLAY_SPEED)
+        self.provider = "replay"
+    
+    def _init_deployments(self):
+        """Add the extra deployments listed in LLM_DEPLOYMENTS to the router"""
+        if not settings.LLM_DEPLOYMENTS.strip():
+            return
+        from openai import AsyncAzureOpenAI, AsyncOpenAI
+        try:
+            specs = json.loads(settings.LLM_DEPLOYMENTS)
+        except json.JSONDecodeError as e:
+            logger.error("LLM_DEPLOYMENTS is not valid JSON, routing to the primary deployment only: %s", e)
+            return
+        if not isinstance(specs, list):
+            logger.error("LLM_DEPLOYMENTS is not a JSON list, routing to the primary deployment only")
+            return
+        
+        for spec in specs:
+            if not isinstance(spec, dict):
+                logger.error("Skipping deployment %r: not a JSON object", spec)
+                continue
+            try:
+                model = spec["model"]
+                api_key = os.getenv(spec["api_key_env"]) if "api_key_env" in spec else spec.get("api_key")
+                if spec.get("provider", "azure").lower() == "azure":
+                    client = AsyncAzureOpenAI(
+                        api_key=api_key,
+                        api_version=spec.get("api_version", settings.AZURE_OPENAI_API_VERSION),
+                        azure_endpoint=spec["endpoint"].rstrip("/"),
+                        http_client=self.http_client,
+                        max_retries=0
+                    )
+                else:
+                    client = AsyncOpenAI(
+                        api_key=api_key,
+                        base_url=spec.get("endpoint"),
+                        http_client=self.http_client,
+                        max_retries=0
+                    )
+            except KeyError as e:
+                logger.error("Skipping deployment %s: missing %s", spec.get("name", spec.get("model")), e)
+                continue
+            except Exception as e:
+                logger.error("Skipping deployment %s: %s", spec.get("name", spec.get("model")), e)
+                continue
+            deployment = Deployment(client, model, spec.get("name"))
+            self.router.deployments.append(deployment)
+            logger.info("Routing across deployment %s (%s)", deployment.name, spec.get("provider", "azure"))
+    
+    def _init_tiers(self):
+        """Pin each operation's model tier to the deployments named in its settings"""
+        configured = {
+            "intent": (settings.LLM_INTENT_DEPLOYMENTS, settings.LLM_INTENT_TIMEOUT),
+            "chat": (settings.LLM_CHAT_DEPLOYMENTS, settings.LLM_CHAT_TIMEOUT),
+            "mcq": (settings.LLM_MCQ_DEPLOYMENTS, settings.LLM_MCQ_TIMEOUT),
+        }
+        known = {PRIMARY} | {d.name for d in self.router.deployments}
+        self.tier_timeouts = {}
+        for tier, (names, timeout) in configured.items():
+            names = [name.strip() for name in names.split(",") if name.strip()]
+            unknown = [name for name in names if name not in known]
+            if unknown:
+                logger.warning("Model tier %s names unknown deployment(s) %s", tier, ", ".join(unknown))
+            self.router.tiers[tier] = [name for name in names if name in known]
+            # None keeps the pool-wide LLM_REQUEST_TIMEOUT
+            self.tier_timeouts[tier] = timeout or None
+        logger.info("Model tiers: %s", self.router.stats()["tiers"])
+    
+    def _init_question_bank(self) -> Optional[QuestionBank]:
+        """Open the persistent MCQ question bank, if enabled"""
+        if not settings.QUESTION_BANK_ENABLED:
+            return None
+        try:
+            return QuestionBank(
+                settings.QUESTION_BANK_PATH,
+                max_topics=settings.QUESTION_BANK_MAX_TOPICS,
+                max_per_topic=settings.QUESTION_BANK_MAX_PER_TOPIC,
+                ttl_seconds=settings.QUESTION_BANK_TTL_SECONDS,
+                pool_factor=settings.QUESTION_BANK_POOL_FACTOR
+            )
+        except Exception as e:
+            logger.error("Could not open question bank, generating every quiz from scratch: %s", e)
+            return None
+    
+    def _init_response_cache(self) -> Optional[ResponseCache]:
+        """Create the chat answer cache, if enabled"""
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return None
+        try:
+            return ResponseCache(
+                max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+                disk_path=settings.RESPONSE_CACHE_DISK_PATH or None
+            )
+        except Exception as e:
+            logger.error("Could not create response cache, answering every query from scratch: %s", e)
+            return None
+    
+    async def warmup(self, connections: Optional[int] = None):
+        """Open pooled connections to the LLM endpoint before the first request"""
+        connections = settings.LLM_WARMUP_CONNECTIONS if connections is None else connections
+        # A replayed client has no endpoint to connect to
+        if connections <= 0 or isinstance(self.client, ReplayClient):
+            return
+        
+        # Any HTTP response (even 401/404) leaves a live keep-alive connection in the pool.
+        # With HTTP/2 a single connection is multiplexed, so one request is enough.
+        if self.http2:
+            connections = 1
+        urls = {str(d.client.base_url) for d in self.router.deployments}
+        logger.info("Pre-warming %s connection(s) to each of %s", connections, ", ".join(sorted(urls)))
+        
+        async def _touch(url):
+            try:
+                await self.http_client.head(url)
+            except httpx.HTTPError as e:
+                logger.warning("Connection warm-up failed: %s", e)
+        
+        await asyncio.gather(*(_touch(url) for url in urls for _ in range(connections)))
+    
+    async def aclose(self):
+        """Close the shared HTTP connection pool and the question bank"""
+        await self.http_client.aclose()
+        if self.question_bank is not None:
+            self.question_bank.close()
+        if self.response_cache is not None:
+            self.response_cache.close()
+    
+    async def _complete(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int, stream: bool = False, json_mode: bool = False, priority: int = PRIORITY_INTERACTIVE, operation: str = "chat", tools: Optional[List[Dict[str, Any]]] = None):
+        """
+        Run a single chat completion on the deployment picked by the router
+        
+        The call is queued behind the rate limiter at the given priority.
+        Whole completions may be hedged onto a second deployment; hedges
+        and failovers are charged to the limiter like the first request.
+        A 429 pauses all callers for the Retry-After period and the call is
+        retried; connection errors and 5xx responses are retried with
+        exponential backoff. QuotaExceededError is raised once retries run out.
+        operation labels the call's latency and token usage metrics, and
+        picks the model tier whose deployments and timeout the call uses.
+        With tools, the model may call one of them instead of answering.
+        """
+        extra = {}
+        if json_mode and settings.LLM_JSON_MODE:
+            # Provider-side JSON mode guarantees a syntactically valid object
+            extra["response_format"] = {"type": "json_object"}
+        if tools:
+            extra["tools"] = tools
+            extra["tool_choice"] = "auto"
+        tier = _OPERATION_TIERS.get(operation)
+        if self.tier_timeouts.get(tier):
+            extra["timeout"] = self.tier_timeouts[tier]
+        cost = estimate_tokens(messages, max_tokens)
+        in_flight = LLM_IN_FLIGHT.labels(operation)
+        
+        async def create():
+            start = time.perf_counter()
+            in_flight.inc()
+            try:
+                response = await attempts()
+            finally:
+                in_flight.dec()
+                COMPLETION_SECONDS.labels(operation).observe(time.perf_counter() - start)
+            # Streams carry no usage field
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                TOKENS.labels(operation, "prompt").inc(usage.prompt_tokens)
+                TOKENS.labels(operation, "completion").inc(usage.completion_tokens)
+            return response
+        
+        requests = 0
+        
+        async def send(deployment: Deployment):
+            nonlocal requests
+            requests += 1
+            if requests > 1:
+                # A hedge or failover is another upstream request against the same quota
+                await self.rate_limiter.acquire(cost, priority)
+            return await deployment.client.chat.completions.create(
+                model=deployment.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=stream,
+                **extra
+            )
+        
+        async def attempts():
+            nonlocal requests
+            for attempt in range(settings.LLM_MAX_RETRIES + 1):
+                waited = await self.rate_limiter.acquire(cost, priority)
+                requests = 0
+                if waited:
+                    logger.debug("Waited %.2fs for LLM quota (priority %s)", waited, priority)
+                try:
+                    return await self.router.call(send, hedge=not stream, pool=self.router.pool(tier), operation=operation, timed=not stream)
+                except RateLimitError as e:
+                    delay = backoff_delay(attempt, retry_after_seconds(e), settings.LLM_RETRY_BASE_DELAY, settings.LLM_RETRY_MAX_DELAY)
+                    self.rate_limiter.pause(delay)
+                    if attempt == settings.LLM_MAX_RETRIES:
+                        raise QuotaExceededError(delay) from e
+                    logger.warning("LLM quota exceeded, retrying in %.1fs (attempt %s)", delay, attempt + 1)
+                except (APIConnectionError, InternalServerError) as e:
+                    if attempt == settings.LLM_MAX_RETRIES:
+                        raise
+                    delay = backoff_delay(attempt, None, settings.LLM_RETRY_BASE_DELAY, settings.LLM_RETRY_MAX_DELAY)
+                    logger.warning("LLM call failed (%s), retrying in %.1fs (attempt %s)", e, delay, attempt + 1)
+                    await asyncio.sleep(delay)
+        
+        # A stream can only be consumed once, so only whole completions are shared
+        if stream or self.single_flight is None:
+            return await create()
+        key = (self.deployment_name, temperature, max_tokens, bool(extra), tuple((m["role"], m["content"]) for m in messages))
+        return await self.single_flight.do(key, create)
+    
+    @timed_stage("intent")
     async def detect_mcq_intent(self, user_query: str) -> Dict[str, Any]:
         """Detect if the user is asking for MCQs and extract the topic"""
-        logger.debug(f"Detecting MCQ intent for query: {user_query[:50]}...")
+        logger.debug("Detecting MCQ intent for query: %.50s...", user_query)
+        
+        if settings.INTENT_FAST_PATH_ENABLED:
+            result, confidence = classify_intent(user_query)
+            if confidence >= settings.INTENT_FAST_PATH_THRESHOLD:
+                logger.debug("Local intent classifier decided with confidence %.2f: %s", confidence, result)
+                return result
+            logger.debug("Local intent classifier unsure (%.2f), asking the LLM", confidence)
         
         try:
-            logger.debug("Loading system and user prompts for MCQ intent detection")
-            system_prompt = load_prompt("detect_mcq_intent/system.txt")
-            user_prompt = load_prompt("detect_mcq_intent/prompt.txt").format(user_query=user_query)
-            
-            logger.debug(f"Using {self.provider} for MCQ intent detection")
-            
-            if self.provider == "azure":
-                response = self.client.chat.completions.create(
-                    model=self.deployment_name,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=0.1,  # Lower temperature for more deterministic responses
-                    max_tokens=200
-                )
-            else:
-                # Regular OpenAI client
-                response = self.client.chat.completions.create(
-                    model=self.deployment_name,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=0.1,
-                    max_tokens=200
-                )
+            logger.debug("Building system and user prompts for MCQ intent detection")
+            system_prompt = prompt_registry.get("detect_mcq_intent/system.txt").text
+            user_prompt = prompt_registry.get("detect_mcq_intent/prompt.txt").format(user_query=user_query)
+            
+            logger.debug("Using %s for MCQ intent detection", self.provider)
+            
+            response = await self._complete(
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.1,  # Lower temperature for more deterministic responses
+                max_tokens=settings.LLM_INTENT_MAX_TOKENS,
+                operation="intent"
+            )
             
             # Get the raw content from the response
             content = response.choices[0].message.content
-            logger.debug(f"Raw response content: {content}")
+            logger.debug("Raw response content: %s", content)
             
-            # Manual extraction and parsing of YAML content
             try:
-                # First, try to use regex to extract content between markdown code blocks
-                cleaned_content = content
-                yaml_pattern = r"```(?:yaml)?(.*?)```"
-                match = re.search(yaml_pattern, content, re.DOTALL)
-                
-                if match:
-                    # Extract content inside code block
-                    cleaned_content = match.group(1).strip()
-                    logger.debug(f"Content extracted with regex: {cleaned_content}")
-                elif "```" in content:
-                    # Fallback: manual string manipulation
-                    parts = content.split("```")
-                    if len(parts) >= 3:
-                        middle_part = parts[1]
-                        if middle_part.startswith("yaml"):
-                            middle_part = middle_part[4:].strip()
-                        cleaned_content = middle_part.strip()
-                    else:
-                        cleaned_content = content.replace("```yaml", "").replace("```", "").strip()
-                
-                logger.debug(f"Cleaned content: {cleaned_content}")
-                
-                # Replace string boolean values with Python booleans
-                cleaned_content = cleaned_content.replace("true", "True").replace("false", "False")
-                
-                # Manual parsing of YAML content as fallback
-                if "mcq_expected:" in cleaned_content and "topic:" in cleaned_content:
-                    lines = cleaned_content.strip().split("\n")
-                    mcq_expected = False
-                    topic = ""
-                    num_questions = 4  # Default to 4 questions
-                    
-                    for line in lines:
-                        line = line.strip()
-                        if line.startswith("mcq_expected:"):
-                            value = line.split("mcq_expected:")[1].strip().lower()
-                            mcq_expected = (value in ["true", "yes", "1"])
-                        elif line.startswith("topic:"):
-                            topic = line.split("topic:")[1].strip()
-                            # Remove any quotes around the topic
-                            if topic.startswith('"') and topic.endswith('"'):
-                                topic = topic[1:-1]
-                            elif topic.startswith("'") and topic.endswith("'"):
-                                topic = topic[1:-1]
-                        elif line.startswith("num_questions:"):
-                            try:
-                                num_str = line.split("num_questions:")[1].strip()
-                                # Try to convert to integer
-                                num_questions = int(num_str)
-                            except (ValueError, TypeError):
-                                # Keep default if conversion fails
-                                logger.debug(f"Could not convert num_questions to int: {num_str}, using default")
-                    
-                    logger.debug(f"Manual parsing result: mcq_expected={mcq_expected}, topic={topic}, num_questions={num_questions}")
-                    return {
-                        "mcq_expected": mcq_expected, 
-                        "topic": topic,
-                        "num_questions": num_questions
-                    }
-                else:
-                    # If can't manually parse, try using PyYAML
-                    result = yaml.safe_load(cleaned_content)
-                    logger.debug(f"YAML parsing result: {result}")
-                    
-                    # Convert string booleans to actual booleans
-                    mcq_expected = result.get("mcq_expected", False)
-                    if isinstance(mcq_expected, str):
-                        mcq_expected = mcq_expected.lower() in ["true", "yes", "1"]
-                        
-                    return {
-                        "mcq_expected": mcq_expected,
-                        "topic": result.get("topic", ""),
-                        "num_questions": result.get("num_questions", 4)
-                    }
-            except Exception as yaml_error:
-                logger.error(f"Error parsing YAML response: {str(yaml_error)}")
-                logger.error(traceback.format_exc())
-                # Hard-coded detection as last resort
-                if "true" in content.lower() and any(keyword in content.lower() for keyword in ["javascript", "python", "physics"]):
-                    # Extract potential topics
-                    potential_topics = re.findall(r"topic:\s*([A-Za-z0-9 ]+)", content)
-                    topic = potential_topics[0] if potential_topics else ""
-                    logger.debug(f"Hard-coded detection: topic={topic}")
-                    return {"mcq_expected": True, "topic": topic, "num_questions": 4}
-                    
-            # Default to no MCQ intent if all parsing methods fail
-            return {"mcq_expected": False, "topic": "", "num_questions": 4}
+                with _INTENT_PARSE_STAGE.time():
+                    intent = parse_intent(content)
+            except StructuredOutputError as e:
+                logger.warning("Could not parse intent output (%s): %.200s", e, content)
+                PARSE_FAILURES.labels("intent").inc()
+                FALLBACKS.labels("intent_unparsed").inc()
+                return {"mcq_expected": False, "topic": "", "num_questions": 4}
             
+            logger.debug("Parsed intent: %s", intent)
+            return intent
+            
+        except QuotaExceededError:
+            # Callers answer with 503 and Retry-After rather than a chat reply
+            raise
         except Exception as e:
-            logger.error(f"Error detecting MCQ intent: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error detecting MCQ intent: %s", e)
+            FALLBACKS.labels("intent_error").inc()
             # Return default response in case of error
             return {"mcq_expected": False, "topic": "", "num_questions": 4}
     
-    async def generate_response(self, user_query: str) -> str:
+    def _simple_request_messages(self, user_query: str) -> Tuple[List[Dict[str, str]], str]:
+        """Build the chat messages for a plain question, with a version hash of the prompt templates"""
+        messages = [
+            {"role": "system", "content": prompt_registry.get("simple_request/system.txt").text},
+            {"role": "user", "content": prompt_registry.get("simple_request/prompt.txt").format(user_query=user_query)}
+        ]
+        return messages, prompt_registry.bundle_version("simple_request")
+    
+    async def _cached_response(self, user_query: str, prompt_version: str, cache_control: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up a cached answer according to the request's cache directive
+        
+        Returns:
+            The cached answer (or None), and the key to store a fresh answer under (or None)
+        """
+        if self.response_cache is None or cache_control == CACHE_NO_STORE:
+            return None, None
+        # Keyed by the chat tier's models, so re-pointing the tier does not serve the old model's answers
+        models = ",".join(sorted({str(d.model) for d in self.router.pool("chat")}))
+        cache_key = make_cache_key(user_query, prompt_version, models)
+        if cache_control != CACHE_DEFAULT:
+            return None, cache_key
+        return await self.response_cache.get(cache_key), cache_key
+    
+    @timed_stage("generate_response")
+    async def generate_response(self, user_query: str, cache_control: str = CACHE_DEFAULT) -> str:
         """Generate a simple response to user query"""
-        logger.debug(f"Generating response for query: {user_query[:50]}...")
+        logger.debug("Generating response for query: %.50s...", user_query)
         
         try:
-            logger.debug("Loading system and user prompts")
-            system_prompt = load_prompt("simple_request/system.txt")
-            user_prompt = load_prompt("simple_request/prompt.txt").format(user_query=user_query)
-            
-            logger.debug(f"Using {self.provider} for generating response")
-            
-            if self.provider == "azure":
-                response = self.client.chat.completions.create(
-                    model=self.deployment_name,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=800,
-                )
-            else:
-                # Regular OpenAI client
-                response = self.client.chat.completions.create(
-                    model=self.deployment_name,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=800,
-                )
+            messages, prompt_version = self._simple_request_messages(user_query)
+            cached, cache_key = await self._cached_response(user_query, prompt_version, cache_control)
+            if cached is not None:
+                logger.debug("Serving response from cache")
+                return cached
+            
+            logger.debug("Using %s for generating response", self.provider)
+            
+            response = await self._complete(
+                messages=messages,
+                temperature=0.7,
+                max_tokens=settings.LLM_CHAT_MAX_TOKENS,
+                operation="chat"
+            )
             
             logger.debug("Processing API response")
             content = response.choices[0].message.content
-            logger.debug(f"Response content (first 50 chars): {content[:50]}...")
+            logger.debug("Response content (first 50 chars): %.50s...", content)
+            if cache_key is not None and content:
+                await self.response_cache.set(cache_key, content)
             return content
             
         except Exception as e:
-            logger.error(f"Error in generate_response: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error in generate_response: %s", e)
             raise
     
-    async def generate_mcqs(self, topic: str, num_questions: int = 4) -> List[Dict[str, Any]]:
-        """Generate MCQs for a given topic"""
-        logger.debug(f"Generating {num_questions} MCQs for topic: {topic}")
+    async def stream_response(self, user_query: str, cache_control: str = CACHE_DEFAULT) -> AsyncIterator[str]:
+        """Generate a simple response to user query, yielding text deltas as they arrive"""
+        logger.debug("Streaming response for query: %.50s...", user_query)
         
         try:
-            logger.debug("Loading system and user prompts for MCQ generation")
-            system_prompt = load_prompt("formulate_mcqs/system.txt")
-            user_prompt = load_prompt("formulate_mcqs/prompt.txt").format(
-                topic=topic, 
-                num_questions=num_questions
+            messages, prompt_version = self._simple_request_messages(user_query)
+            cached, cache_key = await self._cached_response(user_query, prompt_version, cache_control)
+            if cached is not None:
+                logger.debug("Serving streamed response from cache")
+                yield cached
+                return
+            
+            logger.debug("Using %s for streaming response", self.provider)
+            
+            stream = await self._complete(
+                messages=messages,
+                temperature=0.7,
+                max_tokens=settings.LLM_CHAT_MAX_TOKENS,
+                stream=True,
+                operation="chat_stream"
             )
             
-            logger.debug(f"System prompt (first 50 chars): {system_prompt[:50]}...")
-            logger.debug(f"User prompt (first 50 chars): {user_prompt[:50]}...")
+            parts = []
+            async for chunk in stream:
+                # Azure sends a leading chunk with prompt filter results and no choices
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
             
-            logger.debug(f"Using {self.provider} for MCQ generation")
+            logger.debug("Response stream finished")
+            # Only complete answers are cached; an abandoned stream never gets here
+            if cache_key is not None and parts:
+                await self.response_cache.set(cache_key, "".join(parts))
             
-            if self.provider == "azure":
-                response = self.client.chat.completions.create(
-                    model=self.deployment_name,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=2000
-                )
-            else:
-                # Regular OpenAI client
-                response = self.client.chat.completions.create(
-                    model=self.deployment_name,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
+        except Exception as e:
+            logger.exception("Error in stream_response: %s", e)
+            raise
+    
+    def _route_messages(self, user_query: str) -> Tuple[List[Dict[str, str]], str]:
+        """
+        Build the single-call chat messages, with a version hash of the prompt templates
+        
+        The system prompt is fixed and the raw message comes last, so the
+        tools and system prompt are an identical prefix on every turn for
+        provider-side prompt caching.
+        """
+        messages = [
+            {"role": "system", "content": prompt_registry.get("route_chat/system.txt").text},
+            {"role": "user", "content": user_query}
+        ]
+        return messages, prompt_registry.bundle_version("route_chat")
+    
+    def _fast_route(self, user_query: str) -> Optional[Dict[str, Any]]:
+        """The local intent classifier's result when it is confident, otherwise None"""
+        if not settings.INTENT_FAST_PATH_ENABLED:
+            return None
+        result, confidence = classify_intent(user_query)
+        if confidence < settings.INTENT_FAST_PATH_THRESHOLD:
+            return None
+        logger.debug("Local intent classifier decided with confidence %.2f: %s", confidence, result)
+        return result
+    
+    async def _route_fallback(self, user_query: str, reason: str) -> Dict[str, Any]:
+        """Detect intent the two-step way when the single call did not settle it"""
+        FALLBACKS.labels(reason).inc()
+        return await self.detect_mcq_intent(user_query)
+    
+    @timed_stage("route_chat")
+    async def route_chat(self, user_query: str, cache_control: str = CACHE_DEFAULT) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Answer a chat message or recognise a quiz request in one completion
+        
+        The model either answers directly or calls the make_quiz tool, which
+        saves plain messages the intent detection round trip.
+        
+        Returns:
+            The MCQ intent, and the answer when the message is not a quiz
+            request (None when the caller still has to generate it)
+        """
+        logger.debug("Routing chat message: %.50s...", user_query)
+        
+        result = self._fast_route(user_query)
+        if result is not None:
+            return result, None
+        
+        messages, prompt_version = self._route_messages(user_query)
+        cached, cache_key = await self._cached_response(user_query, prompt_version, cache_control)
+        if cached is not None:
+            logger.debug("Serving routed response from cache")
+            return {"mcq_expected": False, "topic": "", "num_questions": 4}, cached
+        
+        try:
+            response = await self._complete(
+                messages=messages,
+                temperature=0.7,
+                max_tokens=settings.LLM_CHAT_MAX_TOKENS,
+                operation="chat_route",
+                tools=[_MAKE_QUIZ_TOOL]
+            )
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            logger.exception("Error in route_chat: %s", e)
+            return await self._route_fallback(user_query, "route_error"), None
+        
+        message = response.choices[0].message
+        for call in getattr(message, "tool_calls", None) or []:
+            if call.function.name != "make_quiz":
+                continue
+            try:
+                intent = parse_quiz_call(call.function.arguments)
+            except StructuredOutputError as e:
+                logger.warning("Could not parse make_quiz call (%s): %.200s", e, call.function.arguments)
+                PARSE_FAILURES.labels("route").inc()
+                return await self._route_fallback(user_query, "route_unparsed"), None
+            logger.debug("Routed to make_quiz: %s", intent)
+            return intent, None
+        
+        content = message.content
+        if not content:
+            return await self._route_fallback(user_query, "route_empty"), None
+        logger.debug("Routed response content (first 50 chars): %.50s...", content)
+        if cache_key is not None:
+            await self.response_cache.set(cache_key, content)
+        return {"mcq_expected": False, "topic": "", "num_questions": 4}, content
+    
+    async def stream_route_chat(self, user_query: str, cache_control: str = CACHE_DEFAULT) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a chat answer or recognise a quiz request in one completion
+        
+        Yields ("token", text delta) while the model answers, or one
+        ("quiz", MCQ intent) when it calls make_quiz.
+        """
+        logger.debug("Streaming routed chat message: %.50s...", user_query)
+        
+        intent = self._fast_route(user_query)
+        if intent is None:
+            messages, prompt_version = self._route_messages(user_query)
+            cached, cache_key = await self._cached_response(user_query, prompt_version, cache_control)
+            if cached is not None:
+                logger.debug("Serving streamed routed response from cache")
+                yield "token", cached
+                return
+            
+            parts, calls = [], {}
+            try:
+                stream = await self._complete(
+                    messages=messages,
                     temperature=0.7,
-                    max_tokens=2000
+                    max_tokens=settings.LLM_CHAT_MAX_TOKENS,
+                    stream=True,
+                    operation="chat_route_stream",
+                    tools=[_MAKE_QUIZ_TOOL]
                 )
+                async for chunk in stream:
+                    # Azure sends a leading chunk with prompt filter results and no choices
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    # Tool call names and arguments arrive in fragments, keyed by call index
+                    for call in getattr(delta, "tool_calls", None) or []:
+                        entry = calls.setdefault(call.index, {"name": "", "arguments": ""})
+                        if call.function is not None:
+                            entry["name"] += call.function.name or ""
+                            entry["arguments"] += call.function.arguments or ""
+                    if delta.content:
+                        parts.append(delta.content)
+                        yield "token", delta.content
+            except QuotaExceededError:
+                raise
+            except Exception as e:
+                # Once the answer has started it cannot be taken back
+                if parts:
+                    raise
+                logger.exception("Error in stream_route_chat: %s", e)
+                intent = await self._route_fallback(user_query, "route_error")
+            
+            quiz_calls = [call["arguments"] for call in calls.values() if call["name"] == "make_quiz"]
+            if quiz_calls:
+                try:
+                    intent = parse_quiz_call(quiz_calls[0])
+                except StructuredOutputError as e:
+                    logger.warning("Could not parse make_quiz call (%s): %.200s", e, quiz_calls[0])
+                    PARSE_FAILURES.labels("route").inc()
+                    intent = await self._route_fallback(user_query, "route_unparsed")
+            elif parts:
+                logger.debug("Routed response stream finished")
+                if cache_key is not None:
+                    await self.response_cache.set(cache_key, "".join(parts))
+                return
+            elif intent is None:
+                intent = await self._route_fallback(user_query, "route_empty")
+        
+        if intent["mcq_expected"]:
+            yield "quiz", intent
+            return
+        async for delta in self.stream_response(user_query, cache_control):
+            yield "token", delta
+    
+    def _mcq_messages(self, topic: str, num_questions: int, guidance: str = "") -> List[Dict[str, str]]:
+        """Build the chat messages for MCQ generation in the configured output format, with optional extra guidance"""
+        logger.debug("Building system and user prompts for MCQ generation")
+        prompt_dir = _MCQ_FORMATS[self.mcq_format][0]
+        system_prompt = prompt_registry.get(f"{prompt_dir}/system.txt").text
+        user_prompt = prompt_registry.get(f"{prompt_dir}/prompt.txt").format(
+            topic=topic, 
+            num_questions=num_questions
+        )
+        if guidance:
+            user_prompt = f"{user_prompt}\n\n{guidance}"
+        
+        logger.debug("System prompt (first 50 chars): %.50s...", system_prompt)
+        logger.debug("User prompt (first 50 chars): %.50s...", user_prompt)
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    @timed_stage("question_bank")
+    async def _sample_question_bank(self, topic: str, num_questions: int) -> Optional[List[Dict[str, Any]]]:
+        """Serve questions from the bank, or None if it cannot cover the request"""
+        if self.question_bank is None:
+            return None
+        try:
+            questions = await self.question_bank.sample(topic, num_questions)
+        except Exception as e:
+            logger.error("Question bank lookup failed: %s", e)
+            return None
+        if questions is not None:
+            logger.info("Serving %s MCQs for topic '%s' from the question bank", num_questions, topic)
+        return questions
+    
+    async def _top_up_question_bank(self, topic: str, questions: List[Dict[str, Any]]):
+        """Add freshly generated questions to the topic's pool"""
+        if self.question_bank is None or not questions:
+            return
+        try:
+            added = await self.question_bank.add(topic, questions)
+            logger.debug("Added %s new question(s) to the bank for topic '%s'", added, topic)
+        except Exception as e:
+            logger.error("Could not store questions in the bank: %s", e)
+    
+    @timed_stage("generate_mcqs")
+    async def generate_mcqs(self, topic: str, num_questions: int = 4, priority: int = PRIORITY_INTERACTIVE) -> List[Dict[str, Any]]:
+        """Generate MCQs for a given topic, sampling from the question bank when its pool is large enough"""
+        banked = await self._sample_question_bank(topic, num_questions)
+        if banked is not None:
+            return banked
+        
+        shard_size = self._mcq_shard_size(num_questions)
+        if shard_size < num_questions:
+            questions = await self._generate_mcqs_sharded(topic, num_questions, shard_size, priority)
+        else:
+            questions = await self._generate_mcqs(topic, num_questions, priority)
+        await self._top_up_question_bank(topic, questions)
+        return questions
+    
+    def _mcq_shard_size(self, num_questions: int) -> int:
+        """Questions per concurrent generation; num_questions or more means no sharding"""
+        if not settings.MCQ_SHARDING_ENABLED or num_questions < settings.MCQ_SHARD_MIN_QUESTIONS:
+            # A small quiz gains little latency and would pay a prompt and spare questions per shard
+            return num_questions
+        if settings.MCQ_SHARD_SIZE > 0:
+            return settings.MCQ_SHARD_SIZE
+        return self.mcq_latency.shard_size(num_questions + spare_questions(num_questions), settings.MCQ_MAX_SHARDS)
+    
+    async def _generate_mcqs_sharded(self, topic: str, num_questions: int, shard_size: int, priority: int = PRIORITY_INTERACTIVE) -> List[Dict[str, Any]]:
+        """
+        Generate MCQs as concurrent shards, each focused on a different angle of the topic
+        
+        Shards ask for a few spare questions between them, so the merge can
+        drop near-duplicates without coming up short; spares the quiz does
+        not need go to the question bank. The quiz fails only if every shard
+        fails; questions still missing after the merge are regenerated in
+        one more call.
+        """
+        sizes = split_evenly(num_questions + spare_questions(num_questions), shard_size)
+        focus = prompt_registry.get("formulate_mcqs_hints/focus.txt")
+        logger.debug("Generating %s MCQs for topic '%s' as %s shard(s)", num_questions, topic, len(sizes))
+        results = await asyncio.gather(*(
+            self._generate_mcqs(topic, size, priority, guidance=focus.format(part=i + 1, parts=len(sizes), focus=SHARD_FOCUSES[i % len(SHARD_FOCUSES)]), repair=False)
+            for i, size in enumerate(sizes)
+        ), return_exceptions=True)
+        shards = [result for result in results if not isinstance(result, BaseException)]
+        if not shards:
+            raise results[0]
+        
+        # Merged without a limit, so the distinct spares past the quiz can be banked
+        distinct, dropped = merge_questions(shards, sum(sizes), settings.MCQ_DUPLICATE_THRESHOLD)
+        questions, spares = distinct[:num_questions], distinct[num_questions:]
+        if dropped:
+            MCQ_DUPLICATES.inc(dropped)
+        logger.info("Merged %s of %s MCQ shard(s) into %s question(s), dropping %s near-duplicate(s)", len(shards), len(sizes), len(questions), dropped)
+        await self._top_up_question_bank(topic, spares)
+        if len(questions) < num_questions:
+            questions += await self._regenerate_missing(topic, questions, num_questions - len(questions), priority)
+        return questions
+    
+    async def _regenerate_missing(self, topic: str, kept: List[Dict[str, Any]], missing: int, priority: int = PRIORITY_INTERACTIVE) -> List[Dict[str, Any]]:
+        """
+        Generate only the questions a quiz is short of, steering away from the ones it kept
+        
+        Each round asks for what is still missing, for up to
+        MCQ_REPAIR_ATTEMPTS rounds. Returns whatever could be generated,
+        possibly nothing; failures are logged rather than raised so the
+        kept questions are still served.
+        """
+        added: List[Dict[str, Any]] = []
+        for _ in range(settings.MCQ_REPAIR_ATTEMPTS):
+            MCQ_REGENERATED.inc(missing)
+            seen = kept + added
+            avoid = prompt_registry.get("formulate_mcqs_hints/avoid.txt").format(stems="\n".join(f"- {q['question']}" for q in seen))
+            try:
+                extra = await self._generate_mcqs(topic, missing, priority, guidance=avoid, repair=False)
+            except Exception as e:
+                logger.warning("Could not regenerate %s missing MCQ(s) for topic '%s': %s", missing, topic, e)
+                continue
+            extra, dropped = merge_questions([extra], missing, settings.MCQ_DUPLICATE_THRESHOLD, seen=seen)
+            if dropped:
+                MCQ_DUPLICATES.inc(dropped)
+            added += extra
+            missing -= len(extra)
+            if not missing:
+                break
+        return added
+    
+    async def _generate_mcqs(self, topic: str, num_questions: int, priority: int = PRIORITY_INTERACTIVE, guidance: str = "", repair: bool = True) -> List[Dict[str, Any]]:
+        """
+        Generate MCQs for a given topic with the LLM
+        
+        Every complete, valid question is kept, including those before the
+        point where a reply was cut off by max_tokens. With repair, a reply
+        that comes up short, even with nothing usable, is followed by calls
+        for just the missing questions rather than a full regeneration.
+        """
+        logger.debug("Generating %s MCQs for topic: %s", num_questions, topic)
+        
+        try:
+            messages = self._mcq_messages(topic, num_questions, guidance)
+            
+            logger.debug("Using %s for MCQ generation", self.provider)
+            
+            start = time.perf_counter()
+            response = await self._complete(
+                messages=messages,
+                temperature=0.7,
+                max_tokens=mcq_max_tokens(num_questions, self.mcq_format),
+                json_mode=True,
+                priority=priority,
+                operation="mcqs"
+            )
+            self.mcq_latency.observe(num_questions, time.perf_counter() - start)
             
             # Parse the JSON response
             logger.debug("Processing API response for MCQ generation")
             content = response.choices[0].message.content
-            logger.debug(f"Raw response content (first 100 chars): {content[:100]}...")
-            
-            # Try to extract JSON from the response
-            content = content.strip()
-            # If the response contains markdown code blocks, extract the JSON content
-            if "```json" in content:
-                logger.debug("Extracting JSON from markdown code block with json annotation")
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                logger.debug("Extracting JSON from markdown code block")
-                content = content.split("```")[1].split("```")[0].strip()
-                
-            logger.debug(f"Cleaned content (first 100 chars): {content[:100]}...")
-            logger.debug("Parsing JSON content")
-            mcqs = json.loads(content)
-            questions = mcqs.get("questions", [])
-            logger.info(f"Successfully generated {len(questions)} MCQs")
-            return questions
+            logger.debug("Raw response content (first 100 chars): %.100s...", content)
+            if getattr(response.choices[0], "finish_reason", None) == "length":
+                logger.warning("MCQ reply for topic '%s' was cut off at max_tokens", topic)
+                PARSE_FAILURES.labels("mcqs_truncated").inc()
+            
+            try:
+                with _MCQ_PARSE_STAGE.time():
+                    questions, rejected = parse_mcqs(content)
+            except StructuredOutputError as e:
+                logger.error("Response content causing parse error: %s", content)
+                PARSE_FAILURES.labels("mcqs").inc()
+                if not repair:
+                    raise Exception(f"Failed to parse LLM response as JSON: {str(e)}")
+                questions, rejected = [], 0
+            if rejected:
+                PARSE_FAILURES.labels("mcq_question").inc(rejected)
+            if not questions and not repair:
+                raise Exception(f"LLM response contained no valid MCQs ({rejected} rejected)")
+            
+            usage = getattr(response, "usage", None)
+            if usage is not None and questions:
+                MCQ_QUESTION_TOKENS.labels(self.mcq_format).observe(usage.completion_tokens / (len(questions) + rejected))
+            
+            logger.info("Successfully generated %s MCQs (%s rejected)", len(questions), rejected)
             
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing error: {e}")
-            logger.error(f"Response content causing JSON error: {content}")
-            raise Exception(f"Failed to parse LLM response as JSON: {str(e)}")
         except Exception as e:
-            logger.error(f"Error generating MCQs: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error generating MCQs: %s", e)
             raise
+        
+        if repair and len(questions) < num_questions:
+            questions += await self._regenerate_missing(topic, questions, num_questions - len(questions), priority)
+            if not questions:
+                raise Exception(f"No valid MCQs for topic '{topic}' after {settings.MCQ_REPAIR_ATTEMPTS} regeneration attempt(s)")
+        return questions
+            
+    async def stream_mcqs(self, topic: str, num_questions: int = 4) -> AsyncIterator[Dict[str, Any]]:
+        """Generate MCQs for a given topic, yielding each question as soon as it is complete"""
+        banked = await self._sample_question_bank(topic, num_questions)
+        if banked is not None:
+            for question in banked:
+                yield question
+            return
+        
+        logger.debug("Streaming %s MCQs for topic: %s", num_questions, topic)
+        
+        generated = []
+        try:
+            messages = self._mcq_messages(topic, num_questions)
+            
+            logger.debug("Using %s for streaming MCQ generation", self.provider)
+            
+            stream = await self._complete(
+                messages=messages,
+                temperature=0.7,
+                max_tokens=mcq_max_tokens(num_questions, self.mcq_format),
+                stream=True,
+                json_mode=True,
+                operation="mcqs_stream"
+            )
+            
+            parser = JSONArrayStreamParser(key=_MCQ_FORMATS[self.mcq_format][1])
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                valid, rejected = validate_questions(parser.feed(delta))
+                if rejected:
+                    PARSE_FAILURES.labels("mcq_question").inc(rejected)
+                for question in valid:
+                    generated.append(question)
+                    yield question
+            
+            logger.info("Streamed %s MCQs (%s malformed)", len(generated), parser.items_seen - len(generated))
+            if not generated:
+                raise Exception("Failed to parse any MCQs from the streamed LLM response")
+            
+        except Exception as e:
+            logger.exception("Error streaming MCQs: %s", e)
+            raise
+        
+        # A stream cut off at max_tokens, or with malformed items, is completed with just the missing questions
+        if len(generated) < num_questions:
+            for question in await self._regenerate_missing(topic, generated, num_questions - len(generated)):
+                generated.append(question)
+                yield question
+        
+        await self._top_up_question_bank(topic, generated)
+    
+    @timed_stage("explain_mcqs")
+    async def explain_mcqs(self, topic: str, questions: List[Dict[str, Any]], priority: int = PRIORITY_INTERACTIVE) -> List[str]:
+        """
+        Write the explanations for already generated questions in one call
+        
+        Returns:
+            One explanation per question, in order; empty where the model gave none
+        """
+        logger.debug("Explaining %s MCQs for topic: %s", len(questions), topic)
+        listing = "\n\n".join(
+            f"{i}. {q['question']}\n" + "\n".join(f"{key}) {text}" for key, text in q["options"].items()) + f"\nCorrect answer: {q['correct_answer']}"
+            for i, q in enumerate(questions, 1)
+        )
+        messages = [
+            {"role": "system", "content": prompt_registry.get("explain_mcqs/system.txt").text},
+            {"role": "user", "content": prompt_registry.get("explain_mcqs/prompt.txt").format(num_questions=len(questions), topic=topic, questions=listing)}
+        ]
+        response = await self._complete(
+            messages=messages,
+            temperature=0.3,
+            max_tokens=explanation_max_tokens(len(questions)),
+            json_mode=True,
+            priority=priority,
+            operation="explanations"
+        )
+        content = response.choices[0].message.content
+        try:
+            explanations = parse_explanations(content, len(questions))
+        except StructuredOutputError as e:
+            logger.error("Response content causing parse error: %s", content)
+            PARSE_FAILURES.labels("explanations").inc()
+            raise Exception(f"Failed to parse LLM response as JSON: {str(e)}")
+        missing = explanations.count("")
+        if missing:
+            PARSE_FAILURES.labels("explanation").inc(missing)
+        logger.info("Explained %s of %s MCQs", len(questions) - missing, len(questions))
+        return explanations
             
     async def evaluate_mcqs(self, questions: List[Dict], user_answers: List[str]) -> Dict:
         """Evaluate user's MCQ answers"""
-        logger.debug(f"Evaluating {len(questions)} MCQs with {len(user_answers)} user answers")
+        logger.debug("Evaluating %s MCQs with %s user answers", len(questions), len(user_answers))
         
         try:
             correct_count = 0
@@ -367,7 +1109,7 @@ class LLMService:
             
             for i, question in enumerate(questions):
                 is_correct = user_answers[i] == question["correct_answer"]
-                logger.debug(f"Q{i+1}: User answer: {user_answers[i]}, Correct: {question['correct_answer']}, Result: {is_correct}")
+                logger.debug("Q%s: User answer: %s, Correct: %s, Result: %s", i+1, user_answers[i], question['correct_answer'], is_correct)
                 
                 if is_correct:
                     correct_count += 1
@@ -387,12 +1129,11 @@ class LLMService:
                 "results": results
             }
             
-            logger.info(f"Evaluation complete. Score: {correct_count}/{len(questions)} ({evaluation_result['percentage']:.2f}%)")
+            logger.info("Evaluation complete. Score: %s/%s (%.2f%%)", correct_count, len(questions), evaluation_result['percentage'])
             return evaluation_result
             
         except Exception as e:
-            logger.error(f"Error evaluating MCQs: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error evaluating MCQs: %s", e)
             raise
 
 llm_service = LLMService()
\ No newline at end of file
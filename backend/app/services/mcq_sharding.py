@@ -0,0 +1,120 @@
+import math
+import re
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+# Angles given to concurrent shards so each covers a different part of the topic
+SHARD_FOCUSES = (
+    "core definitions and key concepts",
+    "how it works: mechanisms, processes and causes",
+    "real-world applications and worked examples",
+    "history, notable people and context",
+    "comparisons, distinctions and common misconceptions",
+    "problem solving, calculations and edge cases",
+)
+
+# Extra questions requested across shards to replace near-duplicates dropped when merging
+SPARE_FRACTION = 0.2
+
+_WORD = re.compile(r"\w+")
+_STOPWORDS = frozenset((
+    "a", "an", "the", "of", "in", "on", "to", "for", "and", "or", "is", "are", "was", "were", "be", "by",
+    "with", "which", "what", "who", "when", "where", "why", "how", "does", "do", "did", "that", "this",
+    "these", "those", "it", "its", "as", "at", "from", "following", "best", "most", "known", "called",
+))
+
+def split_evenly(num_questions: int, shard_size: int) -> List[int]:
+    """Shard sizes adding up to num_questions, none larger than shard_size and differing by at most one"""
+    shards = max(1, math.ceil(num_questions / max(1, shard_size)))
+    base, extra = divmod(num_questions, shards)
+    return [base + (i < extra) for i in range(shards)]
+
+def spare_questions(num_questions: int) -> int:
+    return math.ceil(num_questions * SPARE_FRACTION)
+
+def question_words(question: Dict[str, Any]) -> FrozenSet[str]:
+    """Content words of a question's stem and correct option, for near-duplicate detection"""
+    text = question["question"] + " " + question["options"].get(question["correct_answer"], "")
+    return frozenset(w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS)
+
+def _similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return float(a == b)
+    return len(a & b) / len(a | b)
+
+def merge_questions(shards: List[List[Dict[str, Any]]], limit: int, threshold: float,
+                    seen: List[Dict[str, Any]] = ()) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Interleave shard results into one quiz, dropping near-duplicates
+
+    Questions are taken round-robin across shards so a short quiz still
+    spans every shard's focus. A question counts as a near-duplicate when
+    the word overlap (Jaccard) of its stem and correct option with an
+    already accepted or seen question reaches threshold.
+
+    Returns:
+        Up to limit questions, and how many near-duplicates were dropped
+    """
+    accepted: List[Dict[str, Any]] = []
+    kept_words = [question_words(q) for q in seen]
+    dropped = 0
+    for rank in range(max((len(s) for s in shards), default=0)):
+        for shard in shards:
+            if rank >= len(shard) or len(accepted) == limit:
+                continue
+            words = question_words(shard[rank])
+            if any(_similarity(words, other) >= threshold for other in kept_words):
+                dropped += 1
+                continue
+            accepted.append(shard[rank])
+            kept_words.append(words)
+    return accepted, dropped
+
+class ShardLatencyModel:
+    """
+    Online fit of MCQ completion time as fixed + per_question * num_questions
+
+    Observations are weighted exponentially so the fit follows the
+    deployment as it speeds up or slows down. Until calls of at least two
+    different sizes have been seen, the priors are used.
+    """
+
+    def __init__(self, fixed: float = 0.5, per_question: float = 1.0, alpha: float = 0.05):
+        self.prior = (fixed, per_question)
+        self.alpha = alpha
+        self._w = self._x = self._y = self._xx = self._xy = 0.0
+
+    def observe(self, num_questions: int, seconds: float):
+        decay = 1 - self.alpha
+        self._w = self._w * decay + 1
+        self._x = self._x * decay + num_questions
+        self._y = self._y * decay + seconds
+        self._xx = self._xx * decay + num_questions * num_questions
+        self._xy = self._xy * decay + num_questions * seconds
+
+    def fit(self) -> Tuple[float, float]:
+        """The current (fixed seconds, seconds per question) estimate"""
+        denominator = self._w * self._xx - self._x * self._x
+        if denominator <= 1e-9 * max(1.0, self._w * self._xx):
+            return self.prior
+        per_question = (self._w * self._xy - self._x * self._y) / denominator
+        fixed = (self._y - per_question * self._x) / self._w
+        if per_question <= 0 or fixed < 0:
+            return self.prior
+        return fixed, per_question
+
+    def shard_size(self, num_questions: int, max_shards: int) -> int:
+        """
+        Questions per shard for a request of num_questions
+
+        Past the size at which a shard spends as long generating as it
+        waits for its first token, halving shards again saves less than the
+        fixed latency each extra call costs in prompt tokens and quota, so
+        that is the target, within max_shards shards.
+        """
+        fixed, per_question = self.fit()
+        size = max(1, math.ceil(fixed / per_question))
+        return min(num_questions, max(size, math.ceil(num_questions / max(1, max_shards))))
+
+    def stats(self) -> Dict[str, Any]:
+        fixed, per_question = self.fit()
+        return {"fixed_seconds": round(fixed, 3), "seconds_per_question": round(per_question, 3), "observations": round(self._w, 1)}
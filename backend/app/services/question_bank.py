@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.utils.structured_output import is_valid_question
+
+logger = logging.getLogger(__name__)
+
+def normalize_topic(topic: str) -> str:
+    """Map trivially different topic spellings ("Python", " the python. ") to one key"""
+    topic = re.sub(r"[^\w\s+#-]", " ", topic.lower())
+    topic = re.sub(r"^(?:the|a|an)\s+", "", " ".join(topic.split()))
+    return topic
+
+def _stem_hash(question: Dict[str, Any]) -> str:
+    stem = " ".join(question["question"].lower().split())
+    return hashlib.sha1(stem.encode("utf-8")).hexdigest()
+
+class QuestionBank:
+    """
+    Persistent pool of validated MCQs keyed by normalized topic
+    
+    Requests are served by sampling from a topic's pool, so popular topics
+    stop costing a completion per request. A topic is only sampled once
+    its pool holds pool_factor times the questions asked for; until then
+    requests miss and their fresh questions grow the pool. Each draw skips
+    the questions served most recently, so consecutive quizzes on a topic
+    never share a question. Questions expire after a TTL,
+    each topic keeps at most max_per_topic questions, and once more than
+    max_topics topics are stored the least recently used ones are evicted.
+    SQLite calls run in a worker thread to keep the event loop free.
+    """
+    
+    def __init__(self, path: str, max_topics: int = 500, max_per_topic: int = 100, ttl_seconds: float = 7 * 24 * 3600, pool_factor: int = 3):
+        self.path = path
+        self.max_topics = max_topics
+        self.max_per_topic = max_per_topic
+        self.ttl_seconds = ttl_seconds
+        # Below two, the questions just served would have to be drawn again
+        self.pool_factor = max(2, pool_factor)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS topics (
+                topic TEXT PRIMARY KEY,
+                last_used REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                stem_hash TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_served REAL NOT NULL DEFAULT 0,
+                UNIQUE (topic, stem_hash)
+            );
+            CREATE INDEX IF NOT EXISTS idx_questions_topic ON questions (topic, created_at);
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(questions)")}
+        if "last_served" not in columns:
+            # Banks written before draws were rotated
+            self._conn.execute("ALTER TABLE questions ADD COLUMN last_served REAL NOT NULL DEFAULT 0")
+        self._conn.commit()
+        logger.info("Question bank opened at %s", path)
+    
+    async def sample(self, topic: str, num_questions: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Draw num_questions distinct questions for a topic
+        
+        The draw is random among all but the num_questions most recently
+        served questions of the topic.
+        
+        Returns:
+            The questions, or None when the pool holds fewer than
+            pool_factor * num_questions and needs topping up
+        """
+        questions = await asyncio.to_thread(self._sample, normalize_topic(topic), num_questions)
+        if questions is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return questions
+    
+    async def add(self, topic: str, questions: List[Dict[str, Any]]) -> int:
+        """Store the valid questions of a fresh generation, returning how many were new"""
+        return await asyncio.to_thread(self._add, normalize_topic(topic), questions)
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            topics = self._conn.execute("SELECT COUNT(*) FROM topics").fetchone()[0]
+            questions = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        return {"topics": topics, "questions": questions, "hits": self.hits, "misses": self.misses}
+    
+    def _sample(self, key: str, num_questions: int) -> Optional[List[Dict[str, Any]]]:
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload FROM questions WHERE topic = ? AND created_at >= ? ORDER BY last_served, id",
+                (key, now - self.ttl_seconds)
+            ).fetchall()
+            if len(rows) < self.pool_factor * num_questions:
+                return None
+            drawn = random.sample(rows[:len(rows) - num_questions], num_questions)
+            self._conn.executemany("UPDATE questions SET last_served = ? WHERE id = ?", [(now, row_id) for row_id, _ in drawn])
+            self._conn.execute("UPDATE topics SET last_used = ? WHERE topic = ?", (now, key))
+            self._conn.commit()
+        return [json.loads(payload) for _, payload in drawn]
+    
+    def _add(self, key: str, questions: List[Dict[str, Any]]) -> int:
+        now = time.time()
+        valid = [q for q in questions if is_valid_question(q)]
+        if len(valid) < len(questions):
+            logger.warning("Not banking %s invalid question(s) for topic '%s'", len(questions) - len(valid), key)
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO topics (topic, last_used) VALUES (?, ?) ON CONFLICT(topic) DO UPDATE SET last_used = excluded.last_used",
+                (key, now)
+            )
+            added = self._conn.executemany(
+                "INSERT OR IGNORE INTO questions (topic, stem_hash, payload, created_at) VALUES (?, ?, ?, ?)",
+                [(key, _stem_hash(q), json.dumps(q), now) for q in valid]
+            ).rowcount
+            self._evict(key, now)
+            self._conn.commit()
+        return added
+    
+    def _evict(self, key: str, now: float):
+        """Apply TTL, per-topic and topic-count bounds; caller holds the lock"""
+        self._conn.execute("DELETE FROM questions WHERE created_at < ?", (now - self.ttl_seconds,))
+        # Keep the newest max_per_topic questions of the topic just written
+        self._conn.execute(
+            """DELETE FROM questions WHERE topic = ? AND id NOT IN (
+                   SELECT id FROM questions WHERE topic = ? ORDER BY created_at DESC, id DESC LIMIT ?)""",
+            (key, key, self.max_per_topic)
+        )
+        # Least recently used topics beyond the limit lose their whole pool
+        self._conn.execute(
+            "DELETE FROM topics WHERE topic NOT IN (SELECT topic FROM topics ORDER BY last_used DESC LIMIT ?)",
+            (self.max_topics,)
+        )
+        self._conn.execute("DELETE FROM questions WHERE topic NOT IN (SELECT topic FROM topics)")
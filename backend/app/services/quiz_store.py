@@ -0,0 +1,119 @@
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.models.mcq import OPTION_KEYS
+
+logger = logging.getLogger(__name__)
+
+OPTION_INDEX = {key: index for index, key in enumerate(OPTION_KEYS)}
+
+class StoredQuiz:
+    """
+    A served quiz reduced to what grading needs
+
+    The answer key is one byte per question (0-3 for A-D); stems and
+    explanations are kept apart from it and only read to build results.
+    Questions served without an explanation are kept whole in unexplained
+    until explanations are filled in, and explaining holds the task
+    writing them, if one has started.
+    """
+
+    __slots__ = ("quiz_id", "topic", "answer_key", "stems", "explanations", "unexplained", "explaining", "expires_at")
+
+    def __init__(self, quiz_id: str, topic: str, questions: List[Dict[str, Any]], expires_at: float):
+        self.quiz_id = quiz_id
+        self.topic = topic
+        self.answer_key = bytes(OPTION_INDEX[q["correct_answer"]] for q in questions)
+        self.stems = tuple(q["question"] for q in questions)
+        self.explanations = [q.get("explanation") or "" for q in questions]
+        self.unexplained = {i: q for i, q in enumerate(questions) if not self.explanations[i]}
+        self.explaining = None
+        self.expires_at = expires_at
+
+    def __len__(self) -> int:
+        return len(self.answer_key)
+
+    def grade(self, answers: List[str]) -> Dict[str, Any]:
+        """
+        Grade one answer sheet against the stored key
+
+        Args:
+            answers: One option letter per question, in order
+
+        Returns:
+            A dict shaped like MCQEvaluation
+        """
+        if len(answers) != len(self.answer_key):
+            raise ValueError(f"Expected {len(self.answer_key)} answers, got {len(answers)}")
+
+        correct_count = 0
+        results = []
+        for i, (answer, key) in enumerate(zip(answers, self.answer_key)):
+            is_correct = OPTION_INDEX.get(answer.strip().upper()) == key
+            correct_count += is_correct
+            results.append({
+                "question": self.stems[i],
+                "user_answer": answer,
+                "correct_answer": OPTION_KEYS[key],
+                "is_correct": is_correct,
+                "explanation": self.explanations[i]
+            })
+        return {
+            "score": correct_count,
+            "total": len(self.answer_key),
+            "percentage": (correct_count / len(self.answer_key)) * 100 if self.answer_key else 0,
+            "results": results
+        }
+
+class QuizStore:
+    """
+    Quizzes handed to clients, kept server-side under a random ID with a TTL
+
+    Clients grade by quiz ID instead of posting the questions and answer key
+    back. Entries live in memory in LRU order and are only touched from the
+    event loop, so no lock is needed.
+    """
+
+    def __init__(self, max_quizzes: int = 10000, ttl_seconds: float = 7200):
+        self.max_quizzes = max_quizzes
+        self.ttl_seconds = ttl_seconds
+        self._quizzes: "OrderedDict[str, StoredQuiz]" = OrderedDict()
+        self.created = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def create(self, topic: str, questions: List[Dict[str, Any]]) -> str:
+        """Store a quiz and return its ID"""
+        quiz_id = secrets.token_urlsafe(12)
+        self._quizzes[quiz_id] = StoredQuiz(quiz_id, topic, questions, time.time() + self.ttl_seconds)
+        self.created += 1
+        while len(self._quizzes) > self.max_quizzes:
+            self._quizzes.popitem(last=False)
+            self.evictions += 1
+        return quiz_id
+
+    def get(self, quiz_id: str) -> Optional[StoredQuiz]:
+        """The stored quiz, or None if it never existed or has expired"""
+        quiz = self._quizzes.get(quiz_id)
+        if quiz is None:
+            return None
+        if quiz.expires_at < time.time():
+            del self._quizzes[quiz_id]
+            self.expired += 1
+            return None
+        self._quizzes.move_to_end(quiz_id)
+        return quiz
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "quizzes": len(self._quizzes),
+            "max_quizzes": self.max_quizzes,
+            "created": self.created,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+quiz_store = QuizStore(max_quizzes=settings.QUIZ_SESSION_MAX, ttl_seconds=settings.QUIZ_SESSION_TTL_SECONDS)
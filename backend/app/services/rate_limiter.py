@@ -0,0 +1,209 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BULK: "bulk"}
+
+# Fraction of a backoff delay added at random so retrying clients do not return in lockstep
+_JITTER = 0.25
+
+class QuotaExceededError(Exception):
+    """The provider kept rejecting a call for quota after every retry"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM quota exceeded, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """
+    Estimate the quota a completion will be charged
+
+    Azure charges tokens-per-minute up front from the prompt size and
+    max_tokens, not from the tokens actually generated, so the same rough
+    estimate (about four characters per token) is what the limiter spends.
+    """
+    prompt_chars = sum(len(m["content"]) for m in messages)
+    return prompt_chars // 4 + 4 * len(messages) + max_tokens
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the Retry-After delay from a provider error response, if it sent one"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, retry_after: Optional[float], base_delay: float, max_delay: float) -> float:
+    """Seconds to wait before retry number attempt + 1, honouring Retry-After when present"""
+    if retry_after is not None:
+        delay = retry_after
+    else:
+        delay = min(max_delay, base_delay * 2 ** attempt)
+    return delay * (1 + random.uniform(0, _JITTER))
+
+class TokenBucket:
+    """A bucket refilled continuously at a per-minute rate; a rate of 0 never runs dry"""
+
+    __slots__ = ("rate", "capacity", "level", "updated")
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60
+        self.capacity = self.rate * burst_seconds
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken"""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float):
+        if not self.unlimited:
+            self.level -= min(amount, self.capacity)
+
+class RateLimiter:
+    """
+    Client-side scheduler for the deployment's token and request quotas
+
+    Each call takes its estimated tokens from a tokens-per-minute bucket and
+    one unit from a requests-per-minute bucket. When either bucket is short,
+    callers wait in a priority queue (interactive before bulk, then arrival
+    order) and are released as the buckets refill. A 429 from the provider
+    pauses every caller for the Retry-After period, since the quota is
+    shared. Everything runs on the event loop; no locks are needed.
+    """
+
+    def __init__(self, tokens_per_minute: float = 0, requests_per_minute: float = 0, burst_seconds: float = 10):
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds)
+        self.requests = TokenBucket(requests_per_minute, burst_seconds)
+        self._queue: List[list] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._waits = {priority: deque(maxlen=1000) for priority in PRIORITY_NAMES}
+        self.granted = 0
+        self.throttled = 0
+
+    async def acquire(self, tokens: int, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """
+        Wait until the quotas allow a call costing tokens
+
+        Args:
+            tokens: Estimated token cost, see estimate_tokens
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BULK
+
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.monotonic()
+        if not self._queue and self._delay(tokens, start) == 0:
+            self._grant(tokens, priority, 0.0)
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, [priority, next(self._seq), tokens, future, start])
+        self._pump()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The cancelled entry is skipped by _pump; let the next caller through
+            self._pump()
+            raise
+        return time.monotonic() - start
+
+    def pause(self, seconds: float):
+        """Hold every caller for seconds after the provider returned 429"""
+        self.throttled += 1
+        # The provider's view of the quota wins over our estimate: start refilling from empty
+        self.tokens.level = min(self.tokens.level, 0.0)
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._pump()
+
+    def _delay(self, tokens: int, now: float) -> float:
+        return max(self._paused_until - now, self.tokens.delay(tokens, now), self.requests.delay(1, now))
+
+    def _grant(self, tokens: int, priority: int, waited: float):
+        self.tokens.take(tokens)
+        self.requests.take(1)
+        self.granted += 1
+        self._waits.setdefault(priority, deque(maxlen=1000)).append(waited)
+
+    def _pump(self):
+        """Release queued callers in priority order while the quotas allow, then re-arm the timer"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        while self._queue:
+            priority, _, tokens, future, enqueued = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            delay = self._delay(tokens, now)
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
+                return
+            heapq.heappop(self._queue)
+            self._grant(tokens, priority, now - enqueued)
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        # Bring the bucket levels up to date before reporting them
+        self.tokens.delay(0, now)
+        self.requests.delay(0, now)
+        waiting = [entry for entry in self._queue if not entry[3].done()]
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for entry in waiting:
+            name = PRIORITY_NAMES.get(entry[0], str(entry[0]))
+            depth[name] = depth.get(name, 0) + 1
+        waits = {}
+        for priority, samples in self._waits.items():
+            ordered = sorted(samples)
+            waits[PRIORITY_NAMES.get(priority, str(priority))] = {
+                "mean": round(sum(ordered) / len(ordered), 4) if ordered else 0.0,
+                "p95": round(ordered[int(0.95 * (len(ordered) - 1))], 4) if ordered else 0.0,
+                "max": round(ordered[-1], 4) if ordered else 0.0,
+            }
+        return {
+            "queue_depth": len(waiting),
+            "queue_depth_by_priority": depth,
+            "oldest_wait": round(now - min(entry[4] for entry in waiting), 4) if waiting else 0.0,
+            "wait_seconds": waits,
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "paused_for": round(max(0.0, self._paused_until - now), 4),
+            "tokens_available": None if self.tokens.unlimited else int(self.tokens.level),
+            "requests_available": None if self.requests.unlimited else int(self.requests.level),
+        }
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REPLAY_MODE = "replay"
+RECORD_MODE = "record"
+
+class ReplayMissError(LookupError):
+    """The cassette holds no completion for a request"""
+
+def interaction_key(messages: List[Dict[str, str]], temperature: float, max_tokens: int, response_format: Optional[Dict[str, Any]] = None, tools: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    Identify a completion request independently of model and streaming
+
+    Leaving the model out lets a cassette recorded on one deployment replay
+    on another; leaving stream out lets a streamed recording answer a plain
+    call and the other way round.
+    """
+    request = [[(m["role"], m["content"]) for m in messages], temperature, max_tokens, response_format]
+    if tools:
+        # Only tool-calling requests carry it, so older recordings keep their keys
+        request.append(tools)
+    raw = json.dumps(request, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+def _tool_calls(calls: Optional[List[Dict[str, str]]]):
+    if not calls:
+        return None
+    return [
+        SimpleNamespace(index=i, id=f"call_{i}", type="function", function=SimpleNamespace(name=call["name"], arguments=call["arguments"]))
+        for i, call in enumerate(calls)
+    ]
+
+def _completion(content: str, usage: Optional[Dict[str, int]], tool_calls: Optional[List[Dict[str, str]]] = None):
+    """A ChatCompletion-shaped object with just the fields the service reads"""
+    message = SimpleNamespace(role="assistant", content=(content or None) if tool_calls else content, tool_calls=_tool_calls(tool_calls))
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, finish_reason="tool_calls" if tool_calls else "stop")],
+        usage=SimpleNamespace(**usage) if usage else None
+    )
+
+def _chunk(content: Optional[str], tool_calls: Optional[List[Dict[str, str]]] = None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=_tool_calls(tool_calls)), finish_reason=None)])
+
+class Cassette:
+    """
+    Recorded completions, one JSON object per line
+
+    Each interaction stores its text as chunks of [seconds since the
+    previous chunk, text] (a plain completion is a single chunk), with the
+    time to first chunk folded into the first entry, and any tool calls as
+    [{"name", "arguments"}] under tool_calls. Repeated requests keep
+    every recording and are replayed in recorded order.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._interactions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        interaction = json.loads(line)
+                        self._interactions[interaction["key"]].append(interaction)
+        logger.info("Loaded %s recorded completion(s) from %s", sum(map(len, self._interactions.values())), self.path)
+
+    def next(self, key: str) -> Dict[str, Any]:
+        """The next recording for key, cycling when the recordings run out"""
+        recordings = self._interactions.get(key)
+        if not recordings:
+            raise ReplayMissError(f"No recorded completion for request {key} in {self.path}; record it with LLM_REPLAY_MODE=record")
+        index = self._cursor[key]
+        self._cursor[key] = index + 1
+        return recordings[index % len(recordings)]
+
+    def append(self, interaction: Dict[str, Any]):
+        self._interactions[interaction["key"]].append(interaction)
+        line = json.dumps(interaction, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+class _ReplayCompletions:
+    def __init__(self, cassette: Cassette, speed: float):
+        self.cassette = cassette
+        self.speed = speed
+
+    async def _pause(self, seconds: float):
+        if self.speed > 0 and seconds > 0:
+            await asyncio.sleep(seconds / self.speed)
+
+    async def create(self, messages, temperature, max_tokens, stream=False, response_format=None, tools=None, **kwargs):
+        interaction = self.cassette.next(interaction_key(messages, temperature, max_tokens, response_format, tools))
+        if stream:
+            return self._stream(interaction["chunks"], interaction.get("tool_calls"))
+        await self._pause(sum(delay for delay, _ in interaction["chunks"]))
+        return _completion("".join(text for _, text in interaction["chunks"]), interaction.get("usage"), interaction.get("tool_calls"))
+
+    async def _stream(self, chunks, tool_calls) -> AsyncIterator[Any]:
+        for delay, text in chunks:
+            await self._pause(delay)
+            yield _chunk(text)
+        if tool_calls:
+            yield _chunk(None, tool_calls)
+
+class ReplayClient:
+    """
+    Offline stand-in for the OpenAI client, serving completions from a cassette
+
+    speed scales recorded timing: 1 replays at recorded speed, 10 ten times
+    faster, and 0 without any waiting.
+    """
+
+    def __init__(self, cassette: Cassette, speed: float = 0):
+        self.chat = SimpleNamespace(completions=_ReplayCompletions(cassette, speed))
+
+class _RecordingCompletions:
+    def __init__(self, inner, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    async def create(self, messages, temperature, max_tokens, stream=False, response_format=None, tools=None, **kwargs):
+        key = interaction_key(messages, temperature, max_tokens, response_format, tools)
+        start = time.perf_counter()
+        response = await self.inner.create(
+            messages=messages, temperature=temperature, max_tokens=max_tokens, stream=stream,
+            **({"response_format": response_format} if response_format is not None else {}),
+            **({"tools": tools} if tools is not None else {}), **kwargs
+        )
+        if stream:
+            return self._record_stream(key, response, start)
+        usage = getattr(response, "usage", None)
+        message = response.choices[0].message
+        interaction = {
+            "key": key,
+            "chunks": [[round(time.perf_counter() - start, 4), message.content or ""]],
+            "usage": {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens} if usage else None
+        }
+        calls = getattr(message, "tool_calls", None)
+        if calls:
+            interaction["tool_calls"] = [{"name": call.function.name, "arguments": call.function.arguments} for call in calls]
+        self.cassette.append(interaction)
+        return response
+
+    async def _record_stream(self, key: str, stream, start: float) -> AsyncIterator[Any]:
+        chunks = []
+        calls: Dict[int, Dict[str, str]] = {}
+        last = start
+        async for chunk in stream:
+            delta = chunk.choices[0].delta if chunk.choices else None
+            if delta is not None and delta.content:
+                now = time.perf_counter()
+                chunks.append([round(now - last, 4), delta.content])
+                last = now
+            # Tool calls arrive in fragments and are replayed whole after the text
+            for call in getattr(delta, "tool_calls", None) or []:
+                entry = calls.setdefault(call.index, {"name": "", "arguments": ""})
+                if call.function is not None:
+                    entry["name"] += call.function.name or ""
+                    entry["arguments"] += call.function.arguments or ""
+            yield chunk
+        # Only complete streams are recorded; an abandoned one never gets here
+        interaction = {"key": key, "chunks": chunks, "usage": None}
+        if calls:
+            if not chunks:
+                # Keeps the time to the call for a reply that is only a tool call
+                chunks.append([round(time.perf_counter() - start, 4), ""])
+            interaction["tool_calls"] = [calls[index] for index in sorted(calls)]
+        self.cassette.append(interaction)
+
+class RecordingClient:
+    """Wraps a real client, appending every completion it returns to a cassette"""
+
+    def __init__(self, inner, cassette: Cassette):
+        self._inner = inner
+        self.chat = SimpleNamespace(completions=_RecordingCompletions(inner.chat.completions, cassette))
+
+    def __getattr__(self, name):
+        # base_url and the rest of the real client stay reachable, e.g. for connection warm-up
+        return getattr(self._inner, name)
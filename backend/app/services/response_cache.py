@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-request cache directives, following HTTP Cache-Control semantics
+CACHE_DEFAULT = "default"
+CACHE_NO_CACHE = "no-cache"  # Skip lookup but store the fresh answer
+CACHE_NO_STORE = "no-store"  # Neither read nor write the cache
+CACHE_CONTROLS = (CACHE_DEFAULT, CACHE_NO_CACHE, CACHE_NO_STORE)
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+def normalize_query(user_query: str) -> str:
+    """Fold case, whitespace and trailing punctuation so trivially different questions share a key"""
+    return _TRAILING_PUNCTUATION.sub("", " ".join(user_query.lower().split()))
+
+def make_cache_key(user_query: str, prompt_version: str, model: str) -> str:
+    raw = f"{model}\x00{prompt_version}\x00{normalize_query(user_query)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class _DiskTier:
+    """SQLite-backed second tier that survives restarts"""
+    
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+        self._conn.commit()
+    
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0], row[1]
+    
+    def set(self, key: str, value: str, expires_at: float):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at))
+            self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of chat answers with a TTL and an optional disk tier
+    
+    The memory tier is only touched from the event loop, so it needs no lock;
+    disk lookups and writes run in a worker thread.
+    """
+    
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._disk = _DiskTier(disk_path) if disk_path else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] >= time.time():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            del self._entries[key]
+        
+        if self._disk is not None:
+            entry = await asyncio.to_thread(self._disk.get, key)
+            if entry is not None:
+                self._remember(key, *entry)
+                self.disk_hits += 1
+                return entry[0]
+        
+        self.misses += 1
+        return None
+    
+    async def set(self, key: str, value: str):
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, value, expires_at)
+    
+    def _remember(self, key: str, value: str, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
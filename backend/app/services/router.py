@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from openai import APIConnectionError, APIStatusError, RateLimitError
+from app.core.metrics import HEDGES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Latency samples kept per deployment for the hedge delay percentile
+_WINDOW = 200
+# Samples needed before a deployment's own percentile is trusted as the hedge delay
+_MIN_SAMPLES = 20
+# Name that always refers to the first deployment, the one set up by LLM_PROVIDER
+PRIMARY = "primary"
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether another deployment might succeed where this one failed
+
+    Timeouts, connection failures, 429 and 5xx responses are; 4xx
+    responses and errors raised before the request was sent describe the
+    request itself and would fail the same way anywhere.
+    """
+    if isinstance(error, (APIConnectionError, RateLimitError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+class Deployment:
+    """
+    One model deployment the router can send calls to, with its running health estimates
+
+    Latency is tracked per operation, since an intent call and an MCQ
+    generation differ several times over; the error rate is shared.
+    """
+
+    def __init__(self, client: Any = None, model: Optional[str] = None, name: Optional[str] = None):
+        self.client = client
+        self.model = model
+        self._name = name
+        self.ewma_latency: Dict[Optional[str], float] = {}
+        self.ewma_error = 0.0
+        self.latencies: Dict[Optional[str], deque] = defaultdict(lambda: deque(maxlen=_WINDOW))
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+
+    @property
+    def name(self) -> str:
+        return self._name or self.model or "default"
+
+    def score(self, operation: Optional[str] = None) -> float:
+        """Expected seconds per successful call of operation; lower is better, unmeasured deployments go first"""
+        latency = self.ewma_latency.get(operation)
+        if latency is None:
+            return 0.0
+        return latency / max(1.0 - self.ewma_error, 0.05)
+
+    def percentile(self, quantile: float, operation: Optional[str] = None) -> Optional[float]:
+        samples = self.latencies.get(operation)
+        if samples is None or len(samples) < _MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(quantile * (len(ordered) - 1))]
+
+class DeploymentRouter:
+    """
+    Send each completion to the deployment with the best latency/error EWMA
+
+    A call failing with a retryable error (see is_retryable) is retried
+    once on the next best deployment; other errors are raised at once and
+    do not count against the deployment. With hedging on, a call still
+    running after the chosen deployment's latency percentile for the same
+    operation is duplicated on the next best deployment (or the same one
+    if it is the only one) and the first result wins; the other is
+    cancelled. Only whole completions are timed: a stream returns as soon
+    as its first byte arrives. Calls of a model tier only use that tier's
+    pool of deployments.
+    """
+
+    def __init__(self, deployments: List[Deployment], alpha: float = 0.2, explore_rate: float = 0.05,
+                 hedge: bool = False, hedge_quantile: float = 0.95, hedge_min_delay: float = 0.5):
+        self.deployments = deployments
+        self.alpha = alpha
+        self.explore_rate = explore_rate
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        # Model tier name -> names of the deployments it is pinned to
+        self.tiers: Dict[str, List[str]] = {}
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    @property
+    def primary(self) -> Deployment:
+        return self.deployments[0]
+
+    def _named(self, index: int, deployment: Deployment, names) -> bool:
+        return deployment.name in names or (index == 0 and PRIMARY in names)
+
+    def pool(self, tier: Optional[str] = None) -> List[Deployment]:
+        """
+        The deployments calls of a model tier may use
+
+        A tier pinned to deployments gets those. Any other tier shares the
+        deployments no tier is pinned to, or all of them if none are left.
+        """
+        names = self.tiers.get(tier)
+        if names:
+            pinned = [d for i, d in enumerate(self.deployments) if self._named(i, d, names)]
+            if pinned:
+                return pinned
+        reserved = {name for names in self.tiers.values() for name in names}
+        return [d for i, d in enumerate(self.deployments) if not self._named(i, d, reserved)] or self.deployments
+
+    def pick(self, exclude: Optional[Deployment] = None, pool: Optional[List[Deployment]] = None, operation: Optional[str] = None) -> Deployment:
+        """The best deployment of pool (all of them by default) for operation other than exclude, or exclude itself if it is the only one"""
+        pool = pool or self.deployments
+        candidates = [d for d in pool if d is not exclude] or pool
+        if len(candidates) > 1 and random.random() < self.explore_rate:
+            # Keep estimates of the slower deployments fresh so they can win back traffic
+            return random.choice(candidates)
+        return min(candidates, key=lambda d: d.score(operation))
+
+    def _record(self, deployment: Deployment, ok: bool, operation: Optional[str] = None, latency: Optional[float] = None):
+        deployment.calls += 1
+        deployment.ewma_error += self.alpha * ((0.0 if ok else 1.0) - deployment.ewma_error)
+        if not ok:
+            deployment.errors += 1
+        elif latency is not None:
+            deployment.latencies[operation].append(latency)
+            previous = deployment.ewma_latency.get(operation)
+            deployment.ewma_latency[operation] = latency if previous is None else previous + self.alpha * (latency - previous)
+
+    async def _run(self, deployment: Deployment, fn: Callable[[Deployment], Awaitable[T]], operation: Optional[str], timed: bool) -> T:
+        start = time.perf_counter()
+        deployment.in_flight += 1
+        try:
+            result = await fn(deployment)
+        except asyncio.CancelledError:
+            # A cancelled hedge loser says nothing about the deployment's health
+            raise
+        except Exception as e:
+            if is_retryable(e):
+                self._record(deployment, False)
+            raise
+        finally:
+            deployment.in_flight -= 1
+        self._record(deployment, True, operation, time.perf_counter() - start if timed else None)
+        return result
+
+    def _hedge_delay(self, deployment: Deployment, operation: Optional[str]) -> Optional[float]:
+        """Seconds before hedging a call of operation on deployment, or None until its latency is known"""
+        observed = deployment.percentile(self.hedge_quantile, operation)
+        return None if observed is None else max(self.hedge_min_delay, observed)
+
+    async def call(self, fn: Callable[[Deployment], Awaitable[T]], hedge: bool = True, pool: Optional[List[Deployment]] = None,
+                   operation: Optional[str] = None, timed: bool = True) -> T:
+        """
+        Run fn(deployment) on the best deployment
+
+        Args:
+            fn: Makes the call against the given deployment. It is called
+                again for a failover or hedge, so it must charge any quota
+                those extra requests use.
+            hedge: Whether this call may be hedged (only safe for calls whose
+                result is complete when fn returns, i.e. not streams)
+            pool: The deployments this call may use, all of them by default
+            operation: The kind of call, whose latency is tracked separately
+            timed: Whether fn returning means the completion is whole; a
+                stream's time to first byte is not recorded as its latency
+
+        Returns:
+            The first successful result
+        """
+        pool = pool or self.deployments
+        primary = self.pick(pool=pool, operation=operation)
+        delay = self._hedge_delay(primary, operation) if hedge and self.hedge else None
+        if delay is None:
+            try:
+                return await self._run(primary, fn, operation, timed)
+            except Exception as e:
+                if len(pool) == 1 or not is_retryable(e):
+                    raise
+                fallback = self.pick(exclude=primary, pool=pool, operation=operation)
+                self.failovers += 1
+                logger.warning("Deployment %s failed (%s), failing over to %s", primary.name, e, fallback.name)
+                return await self._run(fallback, fn, operation, timed)
+
+        first = asyncio.ensure_future(self._run(primary, fn, operation, timed))
+        second = None
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done and (first.exception() is None or not is_retryable(first.exception())):
+                return first.result()
+            secondary = self.pick(exclude=primary, pool=pool, operation=operation)
+            if done:
+                self.failovers += 1
+                logger.warning("Deployment %s failed (%s), failing over to %s", primary.name, first.exception(), secondary.name)
+                return await self._run(secondary, fn, operation, timed)
+
+            # Still running past the usual latency: race a second request against it
+            self.hedged += 1
+            second = asyncio.ensure_future(self._run(secondary, fn, operation, timed))
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        HEDGES.labels("hedge" if task is second else "primary").inc()
+                        return task.result()
+                    if not is_retryable(error):
+                        # The request itself is at fault; the other copy will fail the same way
+                        raise error
+            # Both failed; surface the primary's error
+            return first.result()
+        finally:
+            for task in (first, second):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedging": self.hedge,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "tiers": {tier: [d.name for d in self.pool(tier)] for tier in self.tiers},
+            "deployments": [
+                {
+                    "name": d.name,
+                    "ewma_latency": {operation: round(latency, 4) for operation, latency in d.ewma_latency.items()},
+                    "ewma_error": round(d.ewma_error, 4),
+                    "p95": {operation: d.percentile(0.95, operation) for operation in d.latencies},
+                    "in_flight": d.in_flight,
+                    "calls": d.calls,
+                    "errors": d.errors,
+                }
+                for d in self.deployments
+            ],
+        }
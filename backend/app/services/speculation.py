@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from app.services.intent_classifier import classify_intent
+from app.services.llm import llm_service
+from app.services.response_cache import CACHE_DEFAULT
+
+logger = logging.getLogger(__name__)
+
+SPECULATION_POLICIES = ("never", "always", "prior")
+
+class SpeculationStats:
+    """
+    Counters for judging whether speculative answers pay for themselves
+    
+    Each cancelled speculation also costs one billed prompt on top of the
+    completion tokens it streamed before being cancelled.
+    """
+    
+    def __init__(self):
+        self.speculated = 0
+        self.used = 0
+        self.cancelled = 0
+        self.wasted_completion_tokens = 0
+        self.latency_saved_seconds = 0.0
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "policy": settings.SPECULATIVE_CHAT_POLICY,
+            "speculated": self.speculated,
+            "used": self.used,
+            "cancelled": self.cancelled,
+            "wasted_completion_tokens": self.wasted_completion_tokens,
+            "latency_saved_seconds": round(self.latency_saved_seconds, 3),
+        }
+
+speculation_stats = SpeculationStats()
+
+def should_speculate(user_query: str) -> bool:
+    """Decide whether to start answering before intent detection finishes"""
+    policy = settings.SPECULATIVE_CHAT_POLICY
+    if policy not in SPECULATION_POLICIES:
+        logger.warning("Unknown SPECULATIVE_CHAT_POLICY '%s', not speculating", policy)
+        return False
+    if policy == "never":
+        return False
+    
+    result, confidence = classify_intent(user_query)
+    if settings.INTENT_FAST_PATH_ENABLED and confidence >= settings.INTENT_FAST_PATH_THRESHOLD:
+        # Intent is decided locally with no round trip, so there is nothing to overlap
+        return False
+    if policy == "always":
+        return True
+    
+    # "prior": only bet on a plain answer when the local classifier leans that way
+    mcq_probability = confidence if result["mcq_expected"] else 1 - confidence
+    return mcq_probability < settings.SPECULATIVE_CHAT_PRIOR_MAX
+
+async def _speculative_answer(user_query: str, cache_control: str, progress: Dict[str, int]) -> str:
+    """Stream the answer so a cancelled speculation stops generating upstream"""
+    parts = []
+    async for delta in llm_service.stream_response(user_query, cache_control=cache_control):
+        parts.append(delta)
+        progress["chunks"] += 1  # Roughly one token per streamed chunk
+    return "".join(parts)
+
+def _discard(task: asyncio.Task):
+    # Retrieve the result of an abandoned speculation so asyncio does not warn about it
+    if not task.cancelled():
+        task.exception()
+
+async def detect_intent_with_speculation(user_query: str, cache_control: str = CACHE_DEFAULT) -> Tuple[Dict[str, Any], Optional[asyncio.Task]]:
+    """
+    Detect MCQ intent, speculatively starting the chat answer in parallel
+    
+    Args:
+        user_query: The user's chat message
+        cache_control: Cache directive passed on to the speculative answer
+        
+    Returns:
+        The intent result, and the task producing the chat answer if one was
+        started and the message turned out not to be a quiz request
+    """
+    if not should_speculate(user_query):
+        return await llm_service.detect_mcq_intent(user_query), None
+    
+    speculation_stats.speculated += 1
+    progress = {"chunks": 0}
+    answer_task = asyncio.create_task(_speculative_answer(user_query, cache_control, progress))
+    start = time.perf_counter()
+    
+    try:
+        intent_result = await llm_service.detect_mcq_intent(user_query)
+    except BaseException:
+        answer_task.cancel()
+        answer_task.add_done_callback(_discard)
+        raise
+    
+    if intent_result["mcq_expected"]:
+        answer_task.cancel()
+        answer_task.add_done_callback(_discard)
+        speculation_stats.cancelled += 1
+        speculation_stats.wasted_completion_tokens += progress["chunks"]
+        logger.debug("Cancelled speculative answer after %s chunks", progress['chunks'])
+        return intent_result, None
+    
+    # The answer has been generating for as long as intent detection took
+    speculation_stats.used += 1
+    speculation_stats.latency_saved_seconds += time.perf_counter() - start
+    return intent_result, answer_task
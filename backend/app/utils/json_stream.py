@@ -0,0 +1,125 @@
+import json
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class JSONArrayStreamParser:
+    """
+    Incrementally extract the elements of an array held under a top-level key
+    of a streamed JSON object, e.g. each entry of {"questions": [...]}.
+    
+    Text is fed in arbitrary chunks as the model produces it. Every object
+    or array element is returned from feed() as soon as it closes,
+    so callers can forward it before the rest of the document exists.
+    Each character is scanned once; anything before the root object (such
+    as a ```json fence) or after it is ignored.
+    """
+    
+    def __init__(self, key: str = "questions"):
+        self.key = key
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._in_array = False
+        self._item_start: Optional[int] = None
+        self._finished = False
+        self.items_seen = 0
+        self.items_invalid = 0
+    
+    @property
+    def finished(self) -> bool:
+        """True once the root object has closed"""
+        return self._finished
+    
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Consume the next piece of streamed text
+        
+        Args:
+            chunk: Newly received text
+            
+        Returns:
+            Array elements completed by this chunk, in order
+        """
+        if self._finished or not chunk:
+            return []
+        
+        self._text += chunk
+        text = self._text
+        completed = []
+        
+        i = self._pos
+        end = len(text)
+        while i < end:
+            c = text[i]
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = text[self._string_start + 1:i]
+                    self._string_start = None
+            elif c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == "{" or c == "[":
+                if self._depth == 1 and c == "[" and self._pending_key == self.key:
+                    self._in_array = True
+                    self._depth += 1
+                elif self._in_array and self._depth == 2:
+                    self._item_start = i
+                    self._depth += 1
+                else:
+                    self._depth += 1
+            elif c == "}" or c == "]":
+                if self._depth > 0:
+                    self._depth -= 1
+                if self._in_array and self._depth == 2 and self._item_start is not None:
+                    completed.extend(self._decode_item(text[self._item_start:i + 1]))
+                    self._item_start = None
+                elif self._in_array and self._depth == 1 and c == "]":
+                    self._in_array = False
+                elif self._depth == 0 and c == "}":
+                    self._finished = True
+                    break
+            elif c == ":" and self._depth == 1:
+                self._pending_key = self._last_string
+            elif c == "," and self._depth == 1:
+                self._pending_key = None
+            i += 1
+        
+        self._pos = i
+        self._compact()
+        return completed
+    
+    def _decode_item(self, raw: str) -> List[Any]:
+        self.items_seen += 1
+        try:
+            return [json.loads(raw)]
+        except json.JSONDecodeError as e:
+            self.items_invalid += 1
+            logger.warning("Skipping malformed array element #%s: %s", self.items_seen, e)
+            return []
+    
+    def _compact(self):
+        """Drop scanned text that no open item or string still needs"""
+        starts = [p for p in (self._item_start, self._string_start) if p is not None]
+        keep_from = min(starts) if starts else self._pos
+        if keep_from == 0:
+            return
+        self._text = self._text[keep_from:]
+        self._pos -= keep_from
+        if self._item_start is not None:
+            self._item_start -= keep_from
+        if self._string_start is not None:
+            self._string_start -= keep_from
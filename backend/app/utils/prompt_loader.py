@@ -1,21 +1,138 @@
+import asyncio
+import hashlib
+import logging
 import os
+import threading
 from pathlib import Path
+from string import Formatter
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
+
+class Prompt:
+    """A prompt file held in memory, with its template fields parsed once at load time"""
+
+    __slots__ = ("name", "text", "version", "fields", "mtime")
+
+    def __init__(self, name: str, text: str, mtime: float):
+        self.name = name
+        self.text = text
+        self.mtime = mtime
+        # Content hash, so caches keyed on it are invalidated by prompt edits
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        # Raises ValueError on malformed templates when loading instead of mid-request
+        self.fields = frozenset(field for _, field, _, _ in Formatter().parse(text) if field)
+
+    def format(self, **kwargs) -> str:
+        """Fill in the template; prompts without placeholders are returned as-is"""
+        if not self.fields:
+            return self.text
+        return self.text.format(**kwargs)
+
+class PromptRegistry:
+    """
+    All prompts under app/prompts, loaded once and served from memory
+
+    Requests never touch the filesystem. refresh() compares file mtimes and
+    reloads only what changed; watch() runs it periodically in the
+    background so edited prompts are picked up without a restart.
+    """
+
+    def __init__(self, base_dir: Path = PROMPTS_DIR):
+        self.base_dir = base_dir
+        self._prompts: Dict[str, Prompt] = {}
+        self._bundle_versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        self.refresh()
+
+    def get(self, prompt_path: str) -> Prompt:
+        """
+        Look up a prompt by its path relative to the prompts directory
+
+        Args:
+            prompt_path: e.g. "simple_request/system.txt"
+
+        Returns:
+            The loaded prompt
+        """
+        try:
+            return self._prompts[prompt_path]
+        except KeyError:
+            raise ValueError(f"Prompt file not found: {self.base_dir / prompt_path}")
+
+    def bundle_version(self, prompt_dir: str) -> str:
+        """Combined version of every prompt file in one prompt directory"""
+        return self._bundle_versions[prompt_dir]
+
+    def refresh(self) -> int:
+        """Reload prompt files whose mtime changed, returning how many were (re)loaded"""
+        with self._lock:
+            prompts = dict(self._prompts)
+            seen = set()
+            reloaded = 0
+            for path in self.base_dir.glob("*/*.txt"):
+                name = path.relative_to(self.base_dir).as_posix()
+                seen.add(name)
+                mtime = os.stat(path).st_mtime
+                current = prompts.get(name)
+                if current is not None and current.mtime == mtime:
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    prompts[name] = Prompt(name, f.read().strip(), mtime)
+                reloaded += 1
+            for name in set(prompts) - seen:
+                del prompts[name]
+                reloaded += 1
+
+            if reloaded:
+                self._bundle_versions = self._compute_bundle_versions(prompts)
+                # Swap in whole dicts so readers never see a half-updated registry
+                self._prompts = prompts
+                logger.info("Loaded %s prompt file(s) from %s", reloaded, self.base_dir)
+            return reloaded
+
+    @staticmethod
+    def _compute_bundle_versions(prompts: Dict[str, Prompt]) -> Dict[str, str]:
+        bundles: Dict[str, list] = {}
+        for name in sorted(prompts):
+            bundles.setdefault(name.split("/", 1)[0], []).append(prompts[name].version)
+        return {
+            directory: hashlib.sha256("".join(versions).encode("utf-8")).hexdigest()[:12]
+            for directory, versions in bundles.items()
+        }
+
+    def watch(self, interval: float):
+        """Start polling prompt mtimes every interval seconds on the running event loop"""
+        if interval <= 0 or self._watch_task is not None:
+            return
+        self._watch_task = asyncio.create_task(self._watch(interval))
+
+    async def stop(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def _watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error("Error reloading prompts: %s", e)
+
+prompt_registry = PromptRegistry()
 
 def load_prompt(prompt_path: str) -> str:
     """
     Load a prompt from the prompts directory
-    
+
     Args:
         prompt_path: Path relative to the prompts directory
-        
+
     Returns:
         The prompt content as a string
     """
-    base_dir = Path(__file__).resolve().parent.parent
-    prompt_file = base_dir / "prompts" / prompt_path
-    
-    try:
-        with open(prompt_file, "r", encoding="utf-8") as f:
-            return f.read().strip()
-    except FileNotFoundError:
-        raise ValueError(f"Prompt file not found: {prompt_file}")
\ No newline at end of file
+    return prompt_registry.get(prompt_path).text
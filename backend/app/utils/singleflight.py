@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+class _Call:
+    __slots__ = ("task", "waiters")
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one execution
+    
+    The first caller for a key starts the work; callers arriving while it
+    is in flight await the same task and receive the same result or
+    exception. A caller being cancelled does not affect the others, and the
+    shared work is cancelled only once every waiter has gone. Nothing is
+    cached: the key is released as soon as the call finishes.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() for key, or join an identical call already in flight
+        
+        Args:
+            key: Identifies calls that are interchangeable
+            fn: Zero-argument coroutine function doing the actual work
+            
+        Returns:
+            The shared result of fn()
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _, key=key, call=call: self._forget(key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        
+        call.waiters += 1
+        try:
+            # shield() keeps one waiter's cancellation from cancelling the shared task
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Everyone gave up: stop the upstream work and let new callers start afresh
+                self._forget(key, call)
+                call.task.cancel()
+    
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+    
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._calls), "executions": self.executions, "coalesced": self.coalesced}
@@ -0,0 +1,30 @@
+import json
+from typing import Any, AsyncIterator, Optional
+from fastapi.responses import StreamingResponse
+
+def format_sse(data: Any, event: Optional[str] = None) -> str:
+    """
+    Format a single Server-Sent Events message
+    
+    Args:
+        data: JSON-serializable payload for the data field
+        event: Optional event name
+        
+    Returns:
+        The encoded event, terminated by a blank line
+    """
+    payload = json.dumps(data, ensure_ascii=False)
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
+
+
+def create_sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap an async iterator of encoded events in a streaming response with CORS headers"""
+    response = StreamingResponse(events, media_type="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # Stop proxies from buffering the stream
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "POST, GET, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    return response
@@ -0,0 +1,301 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List, Tuple
+from pydantic import ValidationError
+from app.models.mcq import MCQQuestion, OPTION_KEYS
+from app.utils.json_stream import JSONArrayStreamParser
+
+logger = logging.getLogger(__name__)
+
+class StructuredOutputError(ValueError):
+    """The model output did not contain the expected structure"""
+
+_FENCE = "```"
+_INTENT_KEYS = ("mcq_expected", "topic", "num_questions")
+_TRUE_WORDS = ("true", "yes", "1", "y")
+_NULL_WORDS = ("", "null", "none", "~")
+_YAML_COMMENT = re.compile(r"\s+#.*$")
+_decoder = json.JSONDecoder()
+# Keys the question list may be held under: verbose and compact MCQ formats
+_QUESTION_LIST_KEYS = ("questions", "q")
+_QUESTION_FIELDS = frozenset(("question", "options", "correct_answer", "explanation"))
+
+def extract_payload(text: str) -> str:
+    """
+    Return the body of the first fenced code block, or the whole text
+    
+    Handles ```json / ```yaml language tags and an unterminated final fence,
+    which is what a completion cut off by max_tokens looks like.
+    """
+    start = text.find(_FENCE)
+    if start == -1:
+        return text.strip()
+    body_start = text.find("\n", start)
+    if body_start == -1:
+        return ""
+    end = text.find(_FENCE, body_start)
+    return text[body_start + 1:end if end != -1 else len(text)].strip()
+
+def _strip_json_noise(text: str) -> str:
+    """Drop // comments, doubled commas and trailing commas outside strings in one pass"""
+    out = []
+    i, n = 0, len(text)
+    in_string = escape = False
+    while i < n:
+        c = text[i]
+        if in_string:
+            out.append(c)
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+            out.append(c)
+        elif c == "/" and text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = n if newline == -1 else newline
+            continue
+        elif c == "," and out and out[-1] == ",":
+            pass
+        elif c in "}]":
+            # Remove a comma left dangling before the closing bracket
+            j = len(out) - 1
+            while j >= 0 and out[j].isspace():
+                j -= 1
+            if j >= 0 and out[j] == ",":
+                del out[j]
+            out.append(c)
+        else:
+            out.append(c)
+        i += 1
+    return "".join(out)
+
+def loads_tolerant(text: str) -> Any:
+    """
+    Decode the first JSON value in text, ignoring surrounding prose
+    
+    Strict decoding is tried first; comments and trailing commas, which
+    models copy from example schemas, are only stripped if that fails.
+    """
+    starts = [p for p in (text.find("{"), text.find("[")) if p != -1]
+    if not starts:
+        raise StructuredOutputError("No JSON value found in model output")
+    start = min(starts)
+    try:
+        return _decoder.raw_decode(text, start)[0]
+    except json.JSONDecodeError:
+        pass
+    try:
+        return _decoder.raw_decode(_strip_json_noise(text[start:]))[0]
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Invalid JSON in model output: {e}") from e
+
+def _scalar(value: str) -> str:
+    value = value.strip()
+    if "#" in value:
+        value = _YAML_COMMENT.sub("", value)
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        value = value[1:-1]
+    return value.strip()
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _TRUE_WORDS
+
+def _to_int(value: Any, default: int) -> int:
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return default
+
+def parse_intent(text: str) -> Dict[str, Any]:
+    """
+    Parse detect_mcq_intent output given as YAML or JSON
+    
+    YAML is read line by line as flat "key: value" pairs, so the optional
+    "response:" wrapper and indentation do not matter. Values are converted
+    per field, leaving topics such as "true crime" untouched.
+    
+    Returns:
+        The intent in the shape detect_mcq_intent returns
+        
+    Raises:
+        StructuredOutputError: If no mcq_expected field is present
+    """
+    payload = extract_payload(text)
+    data: Dict[str, Any] = {}
+    if payload.lstrip().startswith("{"):
+        decoded = loads_tolerant(payload)
+        if isinstance(decoded, dict):
+            data = decoded.get("response", decoded) if isinstance(decoded.get("response"), dict) else decoded
+    else:
+        for line in payload.splitlines():
+            key, sep, value = line.partition(":")
+            key = key.strip().strip("\"'-").strip().lower()
+            if sep and key in _INTENT_KEYS and key not in data:
+                data[key] = _scalar(value)
+    
+    if "mcq_expected" not in data:
+        raise StructuredOutputError("mcq_expected missing from intent output")
+    topic = data.get("topic")
+    topic = "" if topic is None or str(topic).strip().lower() in _NULL_WORDS else str(topic).strip()
+    return {
+        "mcq_expected": _to_bool(data["mcq_expected"]),
+        "topic": topic,
+        "num_questions": _to_int(data.get("num_questions"), 4)
+    }
+
+def parse_quiz_call(arguments: str) -> Dict[str, Any]:
+    """
+    Parse the JSON arguments of a make_quiz tool call into a quiz intent
+    
+    Raises:
+        StructuredOutputError: If the arguments are not a JSON object with a topic
+    """
+    data = loads_tolerant(arguments or "")
+    if not isinstance(data, dict) or not str(data.get("topic") or "").strip():
+        raise StructuredOutputError("make_quiz call without a topic")
+    return {"mcq_expected": True, "topic": str(data["topic"]).strip(), "num_questions": _to_int(data.get("num_questions"), 4)}
+
+def expand_compact_question(item: Any) -> Any:
+    """
+    Expand a compact [question, A, B, C, D, answer, explanation] array into a question object
+    
+    The explanation is optional. Anything else is returned unchanged for
+    validation to accept or reject.
+    """
+    if not isinstance(item, list) or not 6 <= len(item) <= 7:
+        return item
+    question = {"question": item[0], "options": dict(zip(OPTION_KEYS, item[1:5])), "correct_answer": item[5]}
+    if len(item) == 7:
+        question["explanation"] = item[6]
+    return question
+
+def _is_canonical(question: Any) -> bool:
+    """
+    True if a question dict is already exactly what MCQQuestion validation returns
+    
+    Most replies follow the prompt to the letter, and checking that directly
+    costs a fraction of running the model's validators and model_dump.
+    """
+    try:
+        return (
+            question.keys() <= _QUESTION_FIELDS
+            and tuple(question["options"]) == OPTION_KEYS
+            and question["correct_answer"] in OPTION_KEYS
+            and bool(str.strip(question["question"]))
+            and all(map(str.strip, question["options"].values()))
+            and type(question.get("explanation", "")) is str
+        )
+    except (AttributeError, KeyError, TypeError):
+        # Not a dict, a missing field, or a value that is not a string
+        return False
+
+def validate_questions(items: List[Any]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Validate raw question objects, expanding compact question arrays
+    
+    Returns:
+        The valid questions as the dicts used by the API contract, and how
+        many items were rejected
+    """
+    valid = []
+    for item in items:
+        question = expand_compact_question(item)
+        if _is_canonical(question):
+            valid.append(question)
+            continue
+        try:
+            valid.append(MCQQuestion.model_validate(question).model_dump(exclude_none=True))
+        except ValidationError as e:
+            logger.warning("Rejected malformed question: %s", e.errors()[0].get("msg") if e.errors() else e)
+    return valid, len(items) - len(valid)
+
+def is_valid_question(item: Any) -> bool:
+    question = expand_compact_question(item)
+    if _is_canonical(question):
+        return True
+    try:
+        MCQQuestion.model_validate(question)
+        return True
+    except ValidationError:
+        return False
+
+def salvage_questions(text: str) -> Tuple[List[Any], int]:
+    """
+    The complete items of a question list that cannot be decoded as a whole
+    
+    Covers replies cut off by max_tokens and lists with a malformed item:
+    every element that closes and decodes on its own is returned, in order.
+    
+    Returns:
+        The decoded items, and how many closed items failed to decode
+    """
+    start = min((p for p in (text.find("{"), text.find("[")) if p != -1), default=-1)
+    if start == -1:
+        return [], 0
+    text = text[start:]
+    if text[0] == "[":
+        # A bare list: give it the root object the stream parser expects
+        text = '{"questions":' + text
+    for key in _QUESTION_LIST_KEYS:
+        parser = JSONArrayStreamParser(key=key)
+        items = parser.feed(text)
+        if parser.items_seen:
+            return items, parser.items_invalid
+    return [], 0
+
+def parse_mcqs(text: str) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Parse formulate_mcqs output into validated questions
+    
+    Accepts {"questions": [...]}, the compact {"q": [[...], ...]} or a bare
+    list, fenced or surrounded by prose. Decoding starts at the first bracket rather than inside a fence,
+    so code blocks quoted within question text cannot split the payload.
+    A list that cannot be decoded whole, such as a reply cut off by
+    max_tokens, still yields its complete items.
+    
+    Returns:
+        The valid questions, and how many items were rejected
+        
+    Raises:
+        StructuredOutputError: If no question list or item can be decoded
+    """
+    try:
+        decoded = loads_tolerant(text)
+    except StructuredOutputError:
+        items, undecodable = salvage_questions(text)
+        if not items:
+            raise
+        valid, rejected = validate_questions(items)
+        return valid, rejected + undecodable
+    items = decoded
+    if isinstance(decoded, dict):
+        items = next((decoded[key] for key in _QUESTION_LIST_KEYS if key in decoded), None)
+    if not isinstance(items, list):
+        raise StructuredOutputError("No questions list in model output")
+    return validate_questions(items)
+
+def parse_explanations(text: str, expected: int) -> List[str]:
+    """
+    Parse explain_mcqs output into one explanation per question
+    
+    Accepts {"e": [...]} or a bare list. Missing or non-string entries
+    become empty strings, and extra ones are dropped, so the result always
+    lines up with the questions that were asked about.
+    
+    Raises:
+        StructuredOutputError: If no explanation list can be decoded
+    """
+    decoded = loads_tolerant(text)
+    if isinstance(decoded, dict):
+        decoded = decoded.get("e", decoded.get("explanations"))
+    if not isinstance(decoded, list):
+        raise StructuredOutputError("No explanations list in model output")
+    explanations = [item.strip() if isinstance(item, str) else "" for item in decoded[:expected]]
+    return explanations + [""] * (expected - len(explanations))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Wall-clock time of a multi-topic quiz build, one topic at a time vs batched.
+
+Runs N generate_mcqs calls back to back, the way the browser used to
+build a weekly quiz, and then the same topics through the batch event
+stream behind /api/mcq/generate/batch. The stubbed client answers each
+topic after a random latency and fails every Kth topic, so the run also
+checks that a failed topic is reported without failing the batch. The
+question bank is disabled so every topic goes upstream.
+
+Usage:
+    python -m benchmarks.batch_mcq --topics 20 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["QUESTION_BANK_ENABLED"] = "false"
+
+from app.api.mcq import mcq_batch_event_stream
+from app.core.config import settings
+from app.models.mcq import MCQRequest
+from app.services.llm import llm_service
+from benchmarks.stubs import StubCompletions, stub_client
+
+MCQ_REPLY = json.dumps({"questions": [{
+    "question": f"Question {i}?",
+    "options": {"A": "a", "B": "b", "C": "c", "D": "d"},
+    "correct_answer": "A",
+    "explanation": "Because."
+} for i in range(4)]})
+
+class TopicStub(StubCompletions):
+    def __init__(self, min_latency: float, max_latency: float, fail_every: int, seed: int):
+        super().__init__()
+        self.latencies = {}
+        self.min_latency = min_latency
+        self.max_latency = max_latency
+        self.fail_every = fail_every
+        self.rng = random.Random(seed)
+
+    @staticmethod
+    def topic_index(messages) -> int:
+        return int(messages[-1]["content"].split("benchmark topic ")[1].split()[0])
+
+    def latency(self, topic_index: int) -> float:
+        # Same latency per topic in both runs so the comparison is fair
+        if topic_index not in self.latencies:
+            self.latencies[topic_index] = self.rng.uniform(self.min_latency, self.max_latency)
+        return self.latencies[topic_index]
+
+    def reply(self, messages, tools):
+        return MCQ_REPLY
+
+    def delay(self, messages, tokens):
+        return self.latency(self.topic_index(messages))
+
+    async def create(self, messages, **kwargs):
+        response = await super().create(messages, **kwargs)
+        topic_index = self.topic_index(messages)
+        if self.fail_every and topic_index % self.fail_every == self.fail_every - 1:
+            raise RuntimeError("injected upstream failure")
+        return response
+
+async def sequential(requests):
+    failed = 0
+    for request in requests:
+        try:
+            await llm_service.generate_mcqs(request.topic, request.num_questions)
+        except Exception:
+            failed += 1
+    return failed
+
+async def batched(requests):
+    failed = 0
+    async for event in mcq_batch_event_stream(requests):
+        if event.startswith("event: failed"):
+            failed += 1
+    return failed
+
+async def run(args):
+    completions = TopicStub(args.min_latency, args.max_latency, args.fail_every, args.seed)
+    llm_service.client = stub_client(completions)
+    settings.MCQ_BATCH_CONCURRENCY = args.concurrency
+    requests = [MCQRequest(topic=f"benchmark topic {i} ", num_questions=4) for i in range(args.topics)]
+    for i in range(args.topics):
+        completions.latency(i)
+    slowest = max(completions.latencies.values())
+    
+    for name, fn in (("sequential", sequential), ("batch", batched)):
+        start = time.perf_counter()
+        failed = await fn(requests)
+        elapsed = time.perf_counter() - start
+        print(f"{name:10s}: {elapsed:6.2f}s for {args.topics} topics ({failed} failed)")
+    print(f"slowest single topic: {slowest:.2f}s, concurrency {args.concurrency}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=settings.MCQ_BATCH_CONCURRENCY)
+    parser.add_argument("--min-latency", type=float, default=0.2, help="Seconds per stubbed completion, lower bound")
+    parser.add_argument("--max-latency", type=float, default=0.6, help="Seconds per stubbed completion, upper bound")
+    parser.add_argument("--fail-every", type=int, default=7, help="Fail every Kth topic; 0 disables failures")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
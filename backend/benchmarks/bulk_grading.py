@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Grading a class worth of answer sheets: per-sheet loop vs one vectorized pass.
+
+Builds a stored quiz and N simulated answer sheets (students of varying
+ability, some blanks), then grades them the old way, one
+StoredQuiz.grade() call per sheet followed by item statistics computed in
+Python, and with encode_answers + grade_bulk. Checks both agree on every
+score and percent correct, and reports the time of each.
+
+Usage:
+    python -m benchmarks.bulk_grading --students 10000 --questions 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from app.models.mcq import OPTION_KEYS
+from app.services.grading import encode_answers, grade_bulk
+from app.services.quiz_store import QuizStore
+
+def make_class(num_questions: int, students: int, seed: int):
+    rng = random.Random(seed)
+    questions = [{
+        "question": f"Question {i}?",
+        "options": {key: f"option {key}" for key in OPTION_KEYS},
+        "correct_answer": rng.choice(OPTION_KEYS),
+        "explanation": "Because."
+    } for i in range(num_questions)]
+    sheets = []
+    for _ in range(students):
+        ability = rng.random()
+        sheet = []
+        for q in questions:
+            roll = rng.random()
+            if roll < 0.03:
+                sheet.append("")
+            elif roll < 0.03 + ability:
+                sheet.append(q["correct_answer"])
+            else:
+                sheet.append(rng.choice(OPTION_KEYS))
+        sheets.append(sheet)
+    return questions, sheets
+
+def grade_loop(quiz, sheets):
+    """What a client had to do before: grade each sheet, then tally item statistics itself"""
+    evaluations = [quiz.grade(sheet) for sheet in sheets]
+    total = len(quiz)
+    percent_correct = [sum(e["results"][i]["is_correct"] for e in evaluations) / len(evaluations) * 100 for i in range(total)]
+    counts = [{key: sum(1 for sheet in sheets if sheet[i] == key) for key in OPTION_KEYS} for i in range(total)]
+    return [e["score"] for e in evaluations], percent_correct, counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    questions, sheets = make_class(args.questions, args.students, args.seed)
+    store = QuizStore()
+    quiz = store.get(store.create("benchmark", questions))
+    
+    start = time.perf_counter()
+    loop_scores, loop_percent, _ = grade_loop(quiz, sheets)
+    loop_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    responses = encode_answers(sheets, len(quiz))
+    encode_time = time.perf_counter() - start
+    bulk = grade_bulk(quiz, responses)
+    bulk_time = time.perf_counter() - start
+    
+    assert bulk["scores"] == loop_scores
+    assert all(abs(item["percent_correct"] - p) < 0.01 for item, p in zip(bulk["items"], loop_percent))
+    
+    print(f"{args.students} sheets x {args.questions} questions")
+    print(f"per-sheet loop: {loop_time * 1000:8.1f}ms")
+    print(f"vectorized:     {bulk_time * 1000:8.1f}ms (encode {encode_time * 1000:.1f}ms)  {loop_time / bulk_time:.0f}x")
+    hardest = min(bulk["items"], key=lambda item: item["percent_correct"])
+    print(f"hardest item: {hardest['question']} {hardest['percent_correct']}% correct, discrimination {hardest['discrimination']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Upstream call count under a burst of identical requests.
+
+Simulates a class all sending the same quiz request at once: N concurrent
+detect_mcq_intent + generate_mcqs calls for one message, against a stubbed
+client with a fixed latency. Reports how many completions actually reach
+the provider with single-flight coalescing on and off. The local intent
+fast path and the question bank are disabled so every call would
+otherwise go upstream.
+
+Usage:
+    python -m benchmarks.burst_coalescing --clients 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["INTENT_FAST_PATH_ENABLED"] = "false"
+os.environ["QUESTION_BANK_ENABLED"] = "false"
+
+from app.services.llm import llm_service
+from app.utils.singleflight import SingleFlight
+from benchmarks.stubs import StubCompletions, stub_client
+
+MESSAGE = "generate 5 MCQs on photosynthesis"
+INTENT_REPLY = "mcq_expected: true\ntopic: photosynthesis\nnum_questions: 5"
+MCQ_REPLY = json.dumps({"questions": [{
+    "question": f"Question {i}?",
+    "options": {"A": "a", "B": "b", "C": "c", "D": "d"},
+    "correct_answer": "A",
+    "explanation": "Because."
+} for i in range(5)]})
+
+class BurstStub(StubCompletions):
+    def reply(self, messages, tools):
+        return INTENT_REPLY if "mcq_expected" in messages[-1]["content"] else MCQ_REPLY
+
+async def student():
+    intent = await llm_service.detect_mcq_intent(MESSAGE)
+    return await llm_service.generate_mcqs(intent["topic"], intent["num_questions"])
+
+async def burst(clients: int, latency: float, coalesce: bool):
+    completions = BurstStub(ttft=latency)
+    llm_service.client = stub_client(completions)
+    llm_service.single_flight = SingleFlight() if coalesce else None
+    
+    start = time.perf_counter()
+    results = await asyncio.gather(*(student() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    
+    assert all(len(questions) == 5 for questions in results)
+    print(f"single-flight {'on ' if coalesce else 'off'}: {completions.calls:4d} upstream calls for {clients} clients in {elapsed:.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=40, help="Concurrent identical requests")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per stubbed completion")
+    args = parser.parse_args()
+    asyncio.run(burst(args.clients, args.latency, coalesce=False))
+    asyncio.run(burst(args.clients, args.latency, coalesce=True))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for /api/chat.
+
+Fires N concurrent chat requests at the FastAPI app with the LLM client
+replaced by a stub that takes a fixed time per completion. With a truly
+async client the whole burst finishes in roughly one request's worth of
+round trips; with a blocking client it takes N times as long.
+
+Usage:
+    python -m benchmarks.concurrent_chat --requests 20 --latency 0.5
+    python -m benchmarks.concurrent_chat --requests 20 --latency 0.5 --blocking
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import httpx
+
+from main import app
+from app.services.llm import llm_service
+from benchmarks.stubs import StubCompletions, stub_client
+
+INTENT_REPLY = "mcq_expected: false\ntopic: \nnum_questions: 4"
+ANSWER_REPLY = "Recursion is when a function calls itself."
+
+class ChatStub(StubCompletions):
+    """Stand-in for client.chat.completions with a fixed round-trip time"""
+    def __init__(self, latency: float, blocking: bool):
+        super().__init__(ttft=latency)
+        self.blocking = blocking
+
+    def reply(self, messages, tools):
+        return INTENT_REPLY if "mcq_expected" in messages[-1]["content"] else ANSWER_REPLY
+
+    async def wait(self, seconds: float):
+        if self.blocking:
+            # Emulates the old synchronous client: the event loop is stuck
+            time.sleep(seconds)
+        else:
+            await asyncio.sleep(seconds)
+
+async def run(num_requests: int, latency: float, blocking: bool):
+    completions = ChatStub(latency, blocking)
+    llm_service.client = stub_client(completions)
+
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/api/chat", json={"message": f"What is recursion? ({i})"})
+            for i in range(num_requests)
+        ))
+        elapsed = time.perf_counter() - start
+
+    failures = sum(1 for r in responses if r.status_code != 200)
+    # A chat message makes one or two sequential completions, depending on
+    # whether the local intent classifier could skip the LLM intent call
+    round_trip = latency * completions.calls / num_requests
+    print(f"mode:              {'blocking' if blocking else 'async'}")
+    print(f"requests:          {num_requests} ({failures} failed)")
+    print(f"upstream calls:    {completions.calls}")
+    print(f"single round trip: {round_trip:.3f}s")
+    print(f"wall clock:        {elapsed:.3f}s ({elapsed / round_trip:.1f} round trips)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Number of concurrent /api/chat requests")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per stubbed completion")
+    parser.add_argument("--blocking", action="store_true", help="Emulate a synchronous client for comparison")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.latency, args.blocking))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tail latency of completions across deployments, with and without hedging.
+
+Three stubbed deployments answer with log-normal latency plus a heavy
+tail: the primary is fast but now and then stalls, the second is a bit
+slower with rarer stalls, and the third is slow and fails some calls.
+The same stream of distinct completions is run through LLMService three
+ways: primary deployment only, routed across all three on their latency
+and error EWMAs, and routed with hedging at the chosen deployment's p95.
+Reports p50/p95/p99, failures, and how many extra upstream calls the
+hedges cost.
+
+Usage:
+    python -m benchmarks.hedging --calls 600 --concurrency 16
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["QUESTION_BANK_ENABLED"] = "false"
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+from openai import InternalServerError
+from app.services.llm import llm_service
+from app.services.router import Deployment, DeploymentRouter
+from benchmarks.stubs import StubCompletions, http_error, percentile, stub_client
+
+class DeploymentStub(StubCompletions):
+    """Completions endpoint with a log-normal latency, an occasional stall and a failure rate"""
+
+    def __init__(self, median: float, stall_rate: float, stall: float, error_rate: float, rng: random.Random):
+        super().__init__()
+        self.median = median
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.error_rate = error_rate
+        self.rng = rng
+
+    def reply(self, messages, tools):
+        return "An answer."
+
+    def delay(self, messages, tokens):
+        latency = self.median * self.rng.lognormvariate(0, 0.25)
+        if self.rng.random() < self.stall_rate:
+            latency += self.stall
+        return latency
+
+    async def create(self, **kwargs):
+        response = await super().create(**kwargs)
+        if self.rng.random() < self.error_rate:
+            raise http_error(InternalServerError, 500, "injected failure")
+        return response
+
+def build_stubs(args, seed: int):
+    rng = random.Random(seed)
+    return [
+        ("primary", DeploymentStub(args.median, 0.05, args.stall, 0.0, rng)),
+        ("secondary", DeploymentStub(args.median * 1.3, 0.02, args.stall, 0.0, rng)),
+        ("degraded", DeploymentStub(args.median * 3, 0.05, args.stall, 0.2, rng)),
+    ]
+
+async def run(args, routed: bool, hedge: bool):
+    stubs = build_stubs(args, args.seed)
+    deployments = [Deployment(stub_client(stub), name, name) for name, stub in stubs]
+    llm_service.router = DeploymentRouter(
+        deployments if routed else deployments[:1],
+        hedge=hedge, hedge_quantile=args.quantile, hedge_min_delay=args.min_delay
+    )
+    llm_service.single_flight = None
+
+    latencies, failures = [], 0
+    counter = iter(range(args.calls))
+
+    async def worker():
+        nonlocal failures
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                await llm_service._complete([{"role": "user", "content": f"Question {i}"}], temperature=0.7, max_tokens=100)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    calls = {name: stub.calls for name, stub in stubs}
+    return latencies, failures, calls
+
+async def main_async(args):
+    print(f"{'mode':16s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'failed':>7s} {'extra':>7s}  calls per deployment")
+    for label, routed, hedge in (("primary only", False, False), ("routed", True, False), ("routed + hedge", True, True)):
+        latencies, failures, calls = await run(args, routed, hedge)
+        extra = sum(calls.values()) / args.calls - 1
+        print(f"{label:16s} {percentile(latencies, 0.50) * 1000:6.0f}ms {percentile(latencies, 0.95) * 1000:6.0f}ms "
+              f"{percentile(latencies, 0.99) * 1000:6.0f}ms {failures:7d} {extra:7.1%}  "
+              + ", ".join(f"{name} {count}" for name, count in calls.items()))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--median", type=float, default=0.05, help="Median seconds per call on the primary")
+    parser.add_argument("--stall", type=float, default=0.5, help="Seconds added to a stalled call")
+    parser.add_argument("--quantile", type=float, default=0.95, help="Hedge after this latency percentile")
+    parser.add_argument("--min-delay", type=float, default=0.02, help="Floor of the hedge delay in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # Failovers to the degraded deployment's siblings are expected here
+    logging.disable(logging.WARNING)
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Hit rate and accuracy of the local intent classifier.
+
+Runs classify_intent over a labelled set of chat messages and reports how
+many are decided locally at the given confidence threshold, how accurate
+those local decisions are, and the per-message classification cost.
+Messages below the threshold would go to the detect_mcq_intent LLM prompt.
+
+Usage:
+    python -m benchmarks.intent_fast_path
+    python -m benchmarks.intent_fast_path --threshold 0.85 --show-errors
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.intent_classifier import classify_intent
+
+DEFAULT_DATASET = Path(__file__).resolve().parent / "data" / "intent_labelled.jsonl"
+
+def load_dataset(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def evaluate(rows, threshold: float, show_errors: bool):
+    decided = correct_intent = correct_topic = correct_count = mcq_decided = 0
+    for row in rows:
+        result, confidence = classify_intent(row["message"])
+        if confidence < threshold:
+            continue
+        decided += 1
+        intent_ok = result["mcq_expected"] == row["mcq_expected"]
+        correct_intent += intent_ok
+        if row["mcq_expected"] and result["mcq_expected"]:
+            mcq_decided += 1
+            correct_topic += result["topic"].lower() == row["topic"].lower()
+            correct_count += result["num_questions"] == row["num_questions"]
+        if show_errors and (not intent_ok or (row["mcq_expected"] and (
+                result["topic"].lower() != row["topic"].lower()
+                or result["num_questions"] != row["num_questions"]))):
+            print(f"  MISS {row['message']!r}: got {result} ({confidence:.2f})")
+    
+    # Time the classifier on its own, many passes over the set
+    passes = 200
+    start = time.perf_counter()
+    for _ in range(passes):
+        for row in rows:
+            classify_intent(row["message"])
+    per_call_us = (time.perf_counter() - start) / (passes * len(rows)) * 1e6
+    
+    total = len(rows)
+    print(f"messages:          {total}")
+    print(f"threshold:         {threshold}")
+    print(f"fast-path hits:    {decided} ({decided / total:.1%}), {total - decided} sent to the LLM")
+    if decided:
+        print(f"intent accuracy:   {correct_intent / decided:.1%} of local decisions")
+    if mcq_decided:
+        print(f"topic exact match: {correct_topic / mcq_decided:.1%} of local MCQ decisions")
+        print(f"count match:       {correct_count / mcq_decided:.1%} of local MCQ decisions")
+    print(f"cost per message:  {per_call_us:.1f}us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET, help="JSONL file of labelled messages")
+    parser.add_argument("--threshold", type=float, default=0.9, help="Minimum confidence to skip the LLM")
+    parser.add_argument("--show-errors", action="store_true", help="Print local decisions that disagree with the label")
+    args = parser.parse_args()
+    evaluate(load_dataset(args.dataset), args.threshold, args.show_errors)
+
+if __name__ == "__main__":
+    main()
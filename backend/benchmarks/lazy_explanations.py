@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Time to quiz and grading latency with inline and lazy MCQ explanations.
+
+A stubbed deployment waits a time to first token, then generates its
+reply at a fixed token rate, drawing questions and explanations from
+benchmarks/data/mcq_samples.jsonl. Each quiz is generated, served through
+create_quiz, answered for a fixed think time and then graded, once per
+MCQ_EXPLANATIONS mode:
+
+    inline       explanations are written with the questions
+    on_submit    questions only; one batched call explains the quiz when it is graded
+    speculative  questions only; the batched call starts as soon as the quiz is served
+
+Reports time to quiz, the time grading spent waiting for explanations,
+completion tokens per quiz, and the share of results that carried an
+explanation.
+
+Usage:
+    python -m benchmarks.lazy_explanations --quizzes 20 --questions 10
+    python -m benchmarks.lazy_explanations --think-seconds 3 --token-rate 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["QUESTION_BANK_ENABLED"] = "false"
+os.environ["MCQ_SHARDING_ENABLED"] = "false"
+
+from app.services.explanations import create_quiz, ensure_explanations, ExplanationStats
+from app.services.llm import llm_service
+from app.services.quiz_store import quiz_store
+import app.services.explanations as explanations
+from benchmarks.stubs import StubCompletions, percentile, stub_client
+
+SAMPLES = Path(__file__).resolve().parent / "data" / "mcq_samples.jsonl"
+MODES = ("inline", "on_submit", "speculative")
+
+class SampleStub(StubCompletions):
+    """Compact MCQ and explanation replies drawn from the sample questions"""
+
+    def __init__(self, samples, ttft: float, token_rate: float, seed: int):
+        super().__init__(ttft, token_rate)
+        self.samples = samples
+        self.rng = random.Random(seed)
+
+    def reply(self, messages, tools):
+        prompt = messages[-1]["content"]
+        explain = re.search(r"each of these (\d+) questions", prompt)
+        if explain:
+            return json.dumps({"e": [self.rng.choice(self.samples)["explanation"] for _ in range(int(explain.group(1)))]}, separators=(",", ":"))
+        num_questions = int(re.search(r"Create (\d+)", prompt).group(1))
+        with_explanation = "explanation]" in prompt
+        return json.dumps({"q": [
+            [f"{q['question']} (#{self.rng.randrange(10 ** 6)})", *q["options"].values(), q["correct_answer"], *([q["explanation"]] if with_explanation else [])]
+            for q in self.rng.sample(self.samples, num_questions)
+        ]}, separators=(",", ":"))
+
+async def run(args, samples, mode: str):
+    stub = SampleStub(samples, args.ttft, args.token_rate, args.seed)
+    llm_service.client = stub_client(stub)
+    llm_service.explanation_mode = mode
+    llm_service.mcq_format = "compact" if mode == "inline" else "brief"
+    explanations.explanation_stats = stats = ExplanationStats()
+    to_quiz, grading, explained = [], [], 0
+
+    async def one(i):
+        nonlocal explained
+        start = time.perf_counter()
+        questions = await llm_service.generate_mcqs(f"explanations topic {i}", args.questions)
+        quiz_id = create_quiz(f"explanations topic {i}", questions)
+        to_quiz.append(time.perf_counter() - start)
+        await asyncio.sleep(args.think_seconds)
+        start = time.perf_counter()
+        quiz = quiz_store.get(quiz_id)
+        await ensure_explanations(quiz)
+        results = quiz.grade(["A"] * len(quiz))["results"]
+        grading.append(time.perf_counter() - start)
+        explained += sum(bool(r["explanation"]) for r in results)
+
+    await asyncio.gather(*(one(i) for i in range(args.quizzes)))
+    ready = f"  ready at submit {stats.ready_at_submit}/{stats.graded}" if mode != "inline" else ""
+    print(f"  {mode:12s} to quiz mean {statistics.mean(to_quiz):5.2f}s p95 {percentile(to_quiz, 0.95):5.2f}s  "
+          f"grading wait mean {statistics.mean(grading):5.2f}s p95 {percentile(grading, 0.95):5.2f}s  "
+          f"{stub.completion_tokens / args.quizzes:5.0f} tokens/quiz  explained {explained / (args.quizzes * args.questions):.0%}{ready}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quizzes", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--think-seconds", type=float, default=10.0, help="Time between serving a quiz and grading it")
+    parser.add_argument("--ttft", type=float, default=0.4, help="Stub seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=50, help="Stub completion tokens per second")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    samples = [json.loads(line) for line in SAMPLES.read_text().splitlines() if line.strip()]
+    print(f"{args.quizzes} quizzes of {args.questions}, {args.ttft}s to first token, {args.token_rate:.0f} tokens/s, "
+          f"graded {args.think_seconds}s after serving")
+    for mode in MODES:
+        asyncio.run(run(args, samples, mode))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Load test of the full request path against a local mock provider.
+
+Starts benchmarks.mock_openai and the FastAPI app (uvicorn main:app) as
+subprocesses on free ports, with the app pointed at the mock through
+OPENAI_BASE_URL. Then drives each scenario at a fixed concurrency and
+reports throughput and latency percentiles:
+
+    chat           POST /api/chat with a plain question
+    chat_stream    POST /api/chat/stream, timed until the done event
+    mcq_generate   POST /api/mcq/generate
+    mcq_evaluate   POST /api/mcq/evaluate by quiz_id
+
+The question bank and response cache are disabled so every request goes
+upstream. Results can be saved as a JSON baseline and later runs compared
+against it; a comparison exits non-zero when p95 latency, throughput or
+the error rate regress past the tolerance.
+
+Usage:
+    python -m benchmarks.loadtest --concurrency 16 --requests 200
+    python -m benchmarks.loadtest --save-baseline
+    python -m benchmarks.loadtest --compare --tolerance 0.25
+    python -m benchmarks.loadtest --rate-limit-rate 0.1 --scenarios chat
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.stubs import percentile
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "loadtest.json"
+SCENARIOS = ("chat", "chat_stream", "mcq_generate", "mcq_evaluate")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_processes(args):
+    mock_port, app_port = free_port(), free_port()
+    mock = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.mock_openai", "--port", str(mock_port),
+        "--latency", str(args.latency), "--token-rate", str(args.token_rate),
+        "--error-rate", str(args.error_rate), "--rate-limit-rate", str(args.rate_limit_rate),
+        "--retry-after", str(args.retry_after)
+    ], cwd=BACKEND_DIR)
+    env = dict(
+        os.environ,
+        LLM_PROVIDER="openai",
+        OPENAI_API_KEY="loadtest",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{mock_port}/v1",
+        QUESTION_BANK_ENABLED="false",
+        RESPONSE_CACHE_ENABLED="false",
+        LOG_LEVEL="WARNING",
+    )
+    app = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port), "--log-level", "warning"
+    ], cwd=BACKEND_DIR, env=env)
+    return mock, app, f"http://127.0.0.1:{app_port}"
+
+async def wait_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/api/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"App did not become ready at {base_url}")
+
+async def chat(client: httpx.AsyncClient, i: int, context) -> bool:
+    response = await client.post("/api/chat", json={"message": f"Explain topic number {i} in simple terms"})
+    return response.status_code == 200
+
+async def chat_stream(client: httpx.AsyncClient, i: int, context) -> bool:
+    async with client.stream("POST", "/api/chat/stream", json={"message": f"Explain topic number {i} in simple terms"}) as response:
+        if response.status_code != 200:
+            return False
+        async for line in response.aiter_lines():
+            if line.startswith("event: error"):
+                return False
+            if line.startswith("event: done"):
+                return True
+    return False
+
+async def mcq_generate(client: httpx.AsyncClient, i: int, context) -> bool:
+    response = await client.post("/api/mcq/generate", json={"topic": f"load test topic {i}", "num_questions": 4})
+    return response.status_code == 200 and bool(response.json().get("questions"))
+
+async def mcq_evaluate(client: httpx.AsyncClient, i: int, context) -> bool:
+    response = await client.post("/api/mcq/evaluate", json={"quiz_id": context["quiz_id"], "answers": ["A", "B", "C", "D"]})
+    return response.status_code == 200
+
+async def prepare_context(client: httpx.AsyncClient) -> dict:
+    response = await client.post("/api/mcq/generate", json={"topic": "load test setup", "num_questions": 4})
+    response.raise_for_status()
+    return {"quiz_id": response.json()["quiz_id"]}
+
+async def run_scenario(client: httpx.AsyncClient, name: str, requests: int, concurrency: int, context) -> dict:
+    fn = globals()[name]
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                ok = await fn(client, i, context)
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4),
+        "rps": round(requests / elapsed, 2),
+        "p50": round(percentile(latencies, 0.50), 4),
+        "p95": round(percentile(latencies, 0.95), 4),
+        "p99": round(percentile(latencies, 0.99), 4),
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Scenario metrics that regressed beyond tolerance relative to the baseline"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if current["p95"] > base["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95']:.3f}s vs baseline {base['p95']:.3f}s")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {current['rps']:.1f} rps vs baseline {base['rps']:.1f}")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {current['error_rate']:.2%} vs baseline {base['error_rate']:.2%}")
+    return regressions
+
+async def drive(args, base_url: str) -> dict:
+    await wait_ready(base_url)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        context = await prepare_context(client) if "mcq_evaluate" in args.scenarios else {}
+        scenarios = {}
+        for name in args.scenarios:
+            scenarios[name] = await run_scenario(client, name, args.requests, args.concurrency, context)
+            s = scenarios[name]
+            print(f"{name:13s} {s['rps']:8.1f} rps  p50 {s['p50'] * 1000:7.1f}ms  p95 {s['p95'] * 1000:7.1f}ms  "
+                  f"p99 {s['p99'] * 1000:7.1f}ms  errors {s['errors']}/{s['requests']}")
+    return scenarios
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS), help="Comma-separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=300, help="Mock completion tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock fraction of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Mock fraction of 429 responses")
+    parser.add_argument("--retry-after", type=float, default=1)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write results to the baseline file")
+    parser.add_argument("--compare", action="store_true", help="Fail if results regress against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--output", type=Path, help="Also write results as JSON here")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    mock, app, base_url = start_processes(args)
+    try:
+        scenarios = asyncio.run(drive(args, base_url))
+    finally:
+        for process in (app, mock):
+            process.terminate()
+            process.wait(timeout=10)
+
+    results = {
+        "config": {key: getattr(args, key) for key in ("concurrency", "requests", "latency", "token_rate", "error_rate", "rate_limit_rate")},
+        "environment": {"python": platform.python_version(), "machine": platform.machine()},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "scenarios": scenarios,
+    }
+    for path in filter(None, (args.output, args.baseline if args.save_baseline else None)):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {path}")
+
+    if args.compare:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["config"] != results["config"]:
+            print("Warning: baseline was recorded with a different configuration", baseline["config"])
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Cost of recovering from cut-off and malformed MCQ replies.
+
+A stubbed deployment answers in the compact format at a fixed token rate.
+Some replies are cut off part-way, as when max_tokens is hit, and some
+carry one malformed question. The same quizzes are built two ways:
+
+    full retry   any short reply is thrown away and the whole quiz asked
+                 for again, up to three attempts (what callers had to do
+                 when a parse failure failed the request)
+    salvage      complete questions are kept and follow-ups ask for only
+                 the missing ones (generate_mcqs, MCQ_REPAIR_ATTEMPTS rounds)
+
+Sharding is turned off so each quiz starts as a single completion.
+Reports completion tokens per quiz, mean and p95 latency, upstream calls
+and quizzes that still came back short.
+
+Usage:
+    python -m benchmarks.mcq_salvage --quizzes 40 --questions 10
+    python -m benchmarks.mcq_salvage --truncate-rate 0.3 --malformed-rate 0.2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["QUESTION_BANK_ENABLED"] = "false"
+os.environ["MCQ_SHARDING_ENABLED"] = "false"
+
+from app.services.llm import llm_service
+from benchmarks.stubs import Reply, StubCompletions, percentile, stub_client
+
+SAMPLES = Path(__file__).resolve().parent / "data" / "mcq_samples.jsonl"
+
+class FaultyStub(StubCompletions):
+    """Compact MCQ replies, some cut off part-way and some with one malformed question"""
+
+    def __init__(self, samples, ttft: float, token_rate: float, truncate_rate: float, malformed_rate: float, seed: int):
+        super().__init__(ttft, token_rate)
+        self.samples = samples
+        self.truncate_rate = truncate_rate
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+
+    def reply(self, messages, tools):
+        prompt = messages[-1]["content"]
+        num_questions = int(re.search(r"Create (\d+)", prompt).group(1))
+        # Distinct questions, none of those the prompt says already exist
+        fresh = [q for q in self.samples if q["question"] not in prompt]
+        items = []
+        for q in self.rng.sample(fresh, min(num_questions, len(fresh))):
+            item = [f"{q['question']} (#{self.rng.randrange(10 ** 6)})", *q["options"].values(), q["correct_answer"], q["explanation"]]
+            items.append(json.dumps(item))
+        if num_questions > 1 and self.rng.random() < self.malformed_rate:
+            bad = self.rng.randrange(num_questions)
+            items[bad] = items[bad].replace('","', '",', 1)
+        content = '{"q":[' + ",".join(items) + "]}"
+        if self.rng.random() < self.truncate_rate:
+            return Reply(content[:int(len(content) * self.rng.uniform(0.4, 0.95))], "length")
+        return content
+
+async def full_retry(topic: str, num_questions: int):
+    for _ in range(3):
+        try:
+            questions = await llm_service._generate_mcqs(topic, num_questions, repair=False)
+        except Exception:
+            continue
+        if len(questions) >= num_questions:
+            return questions
+    return []
+
+async def salvage(topic: str, num_questions: int):
+    try:
+        return await llm_service.generate_mcqs(topic, num_questions)
+    except Exception:
+        return []
+
+async def run(args, samples, label: str, build):
+    stub = FaultyStub(samples, args.ttft, args.token_rate, args.truncate_rate, args.malformed_rate, args.seed)
+    llm_service.client = stub_client(stub)
+    latencies, short = [], 0
+
+    async def one(i):
+        nonlocal short
+        start = time.perf_counter()
+        questions = await build(f"salvage topic {i}", args.questions)
+        latencies.append(time.perf_counter() - start)
+        short += len(questions) < args.questions
+
+    await asyncio.gather(*(one(i) for i in range(args.quizzes)))
+    print(f"  {label:12s} {stub.completion_tokens / args.quizzes:7.0f} tokens/quiz  mean {statistics.mean(latencies):5.2f}s  "
+          f"p95 {percentile(latencies, 0.95):5.2f}s  calls {stub.calls / args.quizzes:4.2f}/quiz  short {short}/{args.quizzes}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quizzes", type=int, default=40)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--truncate-rate", type=float, default=0.2, help="Share of replies cut off part-way")
+    parser.add_argument("--malformed-rate", type=float, default=0.1, help="Share of replies with one malformed question")
+    parser.add_argument("--ttft", type=float, default=0.4, help="Stub seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=200, help="Stub completion tokens per second")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # Cut-off and malformed replies are the point here, not news
+    logging.disable(logging.ERROR)
+
+    samples = [json.loads(line) for line in SAMPLES.read_text().splitlines() if line.strip()]
+    print(f"{args.quizzes} quizzes of {args.questions}, {args.truncate_rate:.0%} replies cut off, {args.malformed_rate:.0%} with a malformed question")
+    asyncio.run(run(args, samples, "full retry", full_retry))
+    asyncio.run(run(args, samples, "salvage", salvage))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Latency of MCQ generation against shard size.
+
+A stubbed deployment waits a time to first token, then generates the
+compact reply at a fixed token rate, so a completion's latency grows with
+the questions it holds. Each reply draws its questions from
+benchmarks/data/mcq_samples.jsonl, and a share of them are rephrasings of
+a few overview questions that every shard tends to ask, so merging has
+near-duplicates to drop.
+
+For each shard size, generate_mcqs is run several times and the mean
+latency, upstream calls, prompt tokens sent, duplicates dropped and final
+quiz size are reported. A final run lets the fitted latency model choose
+the shard size (MCQ_SHARD_SIZE=0), after warming it up with a few calls.
+
+Usage:
+    python -m benchmarks.mcq_sharding --questions 10 --runs 5
+    python -m benchmarks.mcq_sharding --questions 20 --max-shards 6 --token-rate 80
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["QUESTION_BANK_ENABLED"] = "false"
+
+from app.core.config import settings
+from app.services.llm import llm_service
+from app.services.mcq_sharding import ShardLatencyModel
+from benchmarks.stubs import StubCompletions, stub_client
+
+SAMPLES = Path(__file__).resolve().parent / "data" / "mcq_samples.jsonl"
+OVERVIEW_STEMS = (
+    "What is {topic} mainly concerned with?",
+    "Which statement best describes what {topic} is mainly concerned with?",
+    "Which option best summarises what {topic} is concerned with?",
+)
+
+class ShardStub(StubCompletions):
+    """Compact MCQ replies at a fixed token rate, with some overview questions repeated across calls"""
+
+    def __init__(self, samples, ttft: float, token_rate: float, duplicate_rate: float, seed: int):
+        super().__init__(ttft, token_rate)
+        self.samples = samples
+        self.duplicate_rate = duplicate_rate
+        self.rng = random.Random(seed)
+
+    def question(self, topic: str):
+        if self.rng.random() < self.duplicate_rate:
+            stem = self.rng.choice(OVERVIEW_STEMS).format(topic=topic)
+            return [stem, f"The study of {topic}", "Weather patterns", "Ancient poetry", "Tax law", "A", f"{topic} is the study of {topic}."]
+        q = self.rng.choice(self.samples)
+        return [f"{q['question']} (#{self.rng.randrange(10 ** 6)})", *q["options"].values(), q["correct_answer"], q["explanation"]]
+
+    def reply(self, messages, tools):
+        match = re.search(r"Create (\d+) multiple-choice questions about (.+?)\.\s", messages[-1]["content"])
+        return json.dumps({"q": [self.question(match.group(2)) for _ in range(int(match.group(1)))]}, separators=(",", ":"))
+
+def duplicates_dropped() -> float:
+    return REGISTRY.get_sample_value("llm_mcq_duplicates_dropped_total")
+
+async def measure(args, stub, label: str):
+    latencies, sizes = [], []
+    calls, prompt_tokens, dropped = stub.calls, stub.prompt_tokens, duplicates_dropped()
+    for run in range(args.runs):
+        start = time.perf_counter()
+        questions = await llm_service.generate_mcqs(f"benchmark topic {label} {run}", args.questions)
+        latencies.append(time.perf_counter() - start)
+        sizes.append(len(questions))
+    print(f"  {label:>6s}  {statistics.mean(latencies):6.2f}s  calls {(stub.calls - calls) / args.runs:4.1f}  "
+          f"prompt tokens {(stub.prompt_tokens - prompt_tokens) / args.runs:6.0f}  "
+          f"duplicates dropped {(duplicates_dropped() - dropped) / args.runs:4.1f}  questions {min(sizes)}-{max(sizes)}")
+
+async def main_async(args):
+    samples = [json.loads(line) for line in SAMPLES.read_text().splitlines() if line.strip()]
+    stub = ShardStub(samples, args.ttft, args.token_rate, args.duplicate_rate, args.seed)
+    llm_service.client = stub_client(stub)
+    settings.MCQ_MAX_SHARDS = args.max_shards
+    # Every size is measured, however small the quiz
+    settings.MCQ_SHARD_MIN_QUESTIONS = 0
+
+    print(f"{args.questions} questions, {args.ttft}s to first token, {args.token_rate:.0f} tokens/s, "
+          f"{args.duplicate_rate:.0%} overview questions, {args.runs} runs each")
+    print("  shard size")
+    for size in sorted({args.questions, *args.sizes}, reverse=True):
+        settings.MCQ_SHARD_SIZE = size
+        await measure(args, stub, str(size))
+
+    settings.MCQ_SHARD_SIZE = 0
+    llm_service.mcq_latency = ShardLatencyModel()
+    for warmup in range(6):
+        await llm_service._generate_mcqs(f"warm-up {warmup}", 1 + warmup % 3 * 2)
+    fit = llm_service.mcq_latency.stats()
+    chosen = llm_service.mcq_latency.shard_size(args.questions, args.max_shards)
+    print(f"  fitted {fit['fixed_seconds']}s fixed + {fit['seconds_per_question']}s per question -> shard size {chosen}")
+    await measure(args, stub, "auto")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")], default=[5, 4, 3, 2, 1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-shards", type=int, default=4)
+    parser.add_argument("--ttft", type=float, default=0.4, help="Stub seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=50, help="Stub completion tokens per second")
+    parser.add_argument("--duplicate-rate", type=float, default=0.15, help="Share of questions that rephrase an overview question")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Completion tokens and latency of the verbose and compact MCQ formats.
+
+Token statistics render the sample questions in
+benchmarks/data/mcq_samples.jsonl the way each prompt asks for them:
+verbose as the indented {"questions": [{...}]} of formulate_mcqs, compact
+as the positional {"q": [[...]]} of formulate_mcqs_compact. Tokens are
+counted with tiktoken's cl100k_base when it is installed and its encoding
+is cached, otherwise with a regex approximation of its pre-tokenizer.
+Reports tokens per question (mean, p95, max) and the fixed overhead.
+
+Latency runs generate_mcqs end to end, unsharded, against a stub that
+waits a time to first token and then emits the rendered reply at a fixed
+token rate, recording the max_tokens each call requested.
+
+Usage:
+    python -m benchmarks.mcq_wire_format
+    python -m benchmarks.mcq_wire_format --token-rate 40 --ttft 0.4 --sizes 1,4,10
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["QUESTION_BANK_ENABLED"] = "false"
+# One completion per quiz, so latency and max_tokens reflect the format alone
+os.environ["MCQ_SHARDING_ENABLED"] = "false"
+
+from app.services.llm import llm_service
+from benchmarks.stubs import StubCompletions, percentile, stub_client
+
+SAMPLES = Path(__file__).resolve().parent / "data" / "mcq_samples.jsonl"
+# Approximates cl100k_base pre-tokenization: common words, short digit runs and punctuation runs are one token each
+_PRETOKEN = re.compile(r"'s|'t|'re|'ve|'m|'ll|'d| ?[A-Za-z]+| ?\d{1,3}| ?[^\sA-Za-z\d]+|\s+(?!\S)|\s+")
+
+def token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken cl100k_base"
+    except Exception:
+        return lambda text: len(_PRETOKEN.findall(text)), "regex approximation of cl100k_base"
+
+def render(questions, wire_format: str) -> str:
+    if wire_format == "verbose":
+        return json.dumps({"questions": [
+            {k: q[k] for k in ("question", "options", "correct_answer", "explanation")} for q in questions
+        ]}, indent=2, ensure_ascii=False)
+    return json.dumps({"q": [
+        [q["question"], *q["options"].values(), q["correct_answer"], q["explanation"]] for q in questions
+    ]}, separators=(",", ":"), ensure_ascii=False)
+
+def token_stats(samples, count):
+    stats = {}
+    for wire_format in ("verbose", "compact"):
+        overhead = count(render([], wire_format))
+        per_question = sorted(count(render([q], wire_format)) - overhead for q in samples)
+        stats[wire_format] = {
+            "overhead": overhead,
+            "mean": statistics.mean(per_question),
+            "p95": percentile(per_question, 0.95),
+            "max": per_question[-1],
+            "all": count(render(samples, wire_format)),
+        }
+    return stats
+
+class FormatStub(StubCompletions):
+    """Answers MCQ prompts in whichever format they ask for, at a fixed token rate"""
+
+    def __init__(self, samples, count, ttft: float, token_rate: float):
+        super().__init__(ttft, token_rate)
+        self.samples = samples
+        self.count = count
+
+    def count_tokens(self, text: str) -> int:
+        return self.count(text)
+
+    def reply(self, messages, tools):
+        prompt = messages[-1]["content"]
+        num_questions = int(re.search(r"Create (\d+)", prompt).group(1))
+        wire_format = "compact" if '{"q"' in prompt else "verbose"
+        return render([self.samples[i % len(self.samples)] for i in range(num_questions)], wire_format)
+
+async def latency(args, samples, count):
+    stub = FormatStub(samples, count, args.ttft, args.token_rate)
+    llm_service.client = stub_client(stub)
+    rows = []
+    for size in args.sizes:
+        for wire_format in ("verbose", "compact"):
+            llm_service.mcq_format = wire_format
+            start = time.perf_counter()
+            questions = await llm_service.generate_mcqs(f"benchmark topic {size}", size)
+            elapsed = time.perf_counter() - start
+            rows.append((size, wire_format, elapsed, stub.max_tokens[-1], len(questions)))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ttft", type=float, default=0.4, help="Stub seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=50, help="Stub completion tokens per second")
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")], default=[1, 4, 10])
+    args = parser.parse_args()
+
+    samples = [json.loads(line) for line in SAMPLES.read_text().splitlines() if line.strip()]
+    count, counter_name = token_counter()
+    print(f"Completion tokens per question over {len(samples)} sample questions ({counter_name})")
+    stats = token_stats(samples, count)
+    for wire_format, s in stats.items():
+        print(f"  {wire_format:8s} mean {s['mean']:6.1f}  p95 {s['p95']:4d}  max {s['max']:4d}  overhead {s['overhead']:3d}  "
+              f"all {len(samples)} questions {s['all']:5d}")
+    saved = 1 - stats["compact"]["all"] / stats["verbose"]["all"]
+    print(f"  compact saves {saved:.0%} of completion tokens")
+
+    print(f"\ngenerate_mcqs latency at {args.ttft}s to first token, {args.token_rate:.0f} tokens/s")
+    for size, wire_format, elapsed, max_tokens, returned in asyncio.run(latency(args, samples, count)):
+        print(f"  {size:3d} questions  {wire_format:8s} {elapsed:6.2f}s  max_tokens {max_tokens:5d}  returned {returned}")
+
+if __name__ == "__main__":
+    main()
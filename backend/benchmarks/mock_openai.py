@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+Answers /v1/chat/completions (and the Azure deployment path) with replies
+shaped for this app's prompts: a YAML intent block for intent detection,
+a JSON quiz with the requested number of questions for MCQ generation
+(verbose, compact or compact without explanations, whichever the prompt
+asks for), one explanation per question for explain_mcqs, a make_quiz
+tool call when a request offering tools asks for a quiz, and plain
+prose otherwise. Every reply waits a fixed time to first token
+and then "generates" at a fixed token rate, streamed as SSE chunks when
+the request asks for stream=true. A fraction of requests can be failed
+with 500 or rejected with 429 and a Retry-After header.
+
+Usage:
+    python -m benchmarks.mock_openai --port 8900 --latency 0.2 --token-rate 300
+    python -m benchmarks.mock_openai --port 8900 --rate-limit-rate 0.05 --retry-after 1
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+import uuid
+from typing import Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+_USER_MESSAGE = re.compile(r'User message: "(.*)"', re.DOTALL)
+_MCQ_REQUEST = re.compile(r"Create (\d+) multiple-choice questions about (.+?)\.\s")
+_EXPLAIN_REQUEST = re.compile(r"Explain the correct answer to each of these (\d+) questions")
+_QUIZ_WORDS = ("mcq", "quiz", "multiple choice", "questions on")
+_word_ids = itertools.count(1)
+
+def quiz_request(message: str) -> Optional[Tuple[str, int]]:
+    """(topic, number of questions) if the message asks for a quiz, otherwise None"""
+    message = message.lower()
+    if not any(word in message for word in _QUIZ_WORDS):
+        return None
+    topic = message.rsplit(" on ", 1)[-1].strip(" ?.!") or "general knowledge"
+    count = re.search(r"\b(\d+)\b", message)
+    return topic, int(count.group(1)) if count else 4
+
+def intent_reply(prompt: str) -> str:
+    match = _USER_MESSAGE.search(prompt)
+    quiz = quiz_request(match.group(1) if match else "")
+    if quiz is None:
+        return "mcq_expected: false\ntopic: \nnum_questions: 4"
+    return f"mcq_expected: true\ntopic: {quiz[0]}\nnum_questions: {quiz[1]}"
+
+def _concepts(num_questions: int):
+    # Distinct wording per question, so questions from concurrent shards are not near-duplicates
+    return [" ".join(f"w{next(_word_ids)}" for _ in range(4)) for _ in range(num_questions)]
+
+def mcq_reply(num_questions: int, topic: str) -> str:
+    return json.dumps({"questions": [{
+        "question": f"Which statement about {concept} in {topic} is correct?",
+        "options": {key: f"Statement {key} about {concept}" for key in "ABCD"},
+        "correct_answer": "ABCD"[i % 4],
+        "explanation": f"Statement {'ABCD'[i % 4]} describes {concept} accurately."
+    } for i, concept in enumerate(_concepts(num_questions))]}, indent=2)
+
+def compact_mcq_reply(num_questions: int, topic: str, explain: bool = True) -> str:
+    return json.dumps({"q": [[
+        f"Which statement about {concept} in {topic} is correct?",
+        *(f"Statement {key} about {concept}" for key in "ABCD"),
+        "ABCD"[i % 4],
+        *([f"Statement {'ABCD'[i % 4]} describes {concept} accurately."] if explain else [])
+    ] for i, concept in enumerate(_concepts(num_questions))]}, separators=(",", ":"))
+
+def explanations_reply(num_questions: int) -> str:
+    return json.dumps({"e": [f"That statement describes concept {i + 1} accurately." for i in range(num_questions)]}, separators=(",", ":"))
+
+def answer_reply(words: int) -> str:
+    return " ".join(f"word{i % 50}" for i in range(words)) + "."
+
+def reply_for(prompt: str, answer_tokens: int) -> str:
+    """The reply to one of this app's prompts, told apart by its wording"""
+    if "mcq_expected" in prompt:
+        return intent_reply(prompt)
+    explain = _EXPLAIN_REQUEST.search(prompt)
+    if explain:
+        return explanations_reply(int(explain.group(1)))
+    quiz = _MCQ_REQUEST.search(prompt)
+    if quiz:
+        if '{"q"' not in prompt:
+            return mcq_reply(int(quiz.group(1)), quiz.group(2))
+        return compact_mcq_reply(int(quiz.group(1)), quiz.group(2), explain="explanation]" in prompt)
+    return answer_reply(answer_tokens)
+
+class MockProvider:
+    def __init__(self, args: argparse.Namespace):
+        self.latency = args.latency
+        self.token_rate = args.token_rate
+        self.answer_tokens = args.answer_tokens
+        self.error_rate = args.error_rate
+        self.rate_limit_rate = args.rate_limit_rate
+        self.retry_after = args.retry_after
+        self.rng = random.Random(args.seed)
+
+    def reply_for(self, messages) -> str:
+        return reply_for(messages[-1]["content"], self.answer_tokens)
+
+    @staticmethod
+    def tokens(text: str):
+        # Roughly four characters per token, like the real tokenizer on English
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    async def completions(self, request: Request):
+        body = await request.json()
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded", "code": "429"}},
+                status_code=429,
+                headers={"retry-after": str(self.retry_after)}
+            )
+        if roll < self.rate_limit_rate + self.error_rate:
+            return JSONResponse({"error": {"message": "Injected failure", "type": "server_error"}}, status_code=500)
+
+        quiz = quiz_request(body["messages"][-1]["content"]) if body.get("tools") else None
+        if quiz is None:
+            content = self.reply_for(body["messages"])
+        else:
+            content = json.dumps({"topic": quiz[0], "num_questions": quiz[1]})
+        pieces = self.tokens(content)
+        prompt_tokens = (sum(len(m["content"]) for m in body["messages"]) + len(json.dumps(body.get("tools") or ""))) // 4
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model", "mock")
+        finish_reason = "stop" if quiz is None else "tool_calls"
+        call = {"index": 0, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "function", "function": {"name": "make_quiz"}}
+
+        if not body.get("stream"):
+            await asyncio.sleep(self.latency + len(pieces) / self.token_rate)
+            if quiz is None:
+                message = {"role": "assistant", "content": content}
+            else:
+                message = {"role": "assistant", "content": None, "tool_calls": [{**call, "function": {"name": "make_quiz", "arguments": content}}]}
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(pieces), "total_tokens": prompt_tokens + len(pieces)}
+            })
+
+        async def events():
+            await asyncio.sleep(self.latency)
+            for i, piece in enumerate(pieces):
+                if quiz is None:
+                    delta = {"content": piece}
+                elif i == 0:
+                    # The first fragment names the function, later ones only extend its arguments
+                    delta = {"tool_calls": [{**call, "function": {"name": "make_quiz", "arguments": piece}}]}
+                else:
+                    delta = {"tool_calls": [{"index": 0, "function": {"arguments": piece}}]}
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(1 / self.token_rate)
+            final = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+def build_app(args: argparse.Namespace) -> Starlette:
+    provider = MockProvider(args)
+    return Starlette(routes=[
+        Route("/v1/chat/completions", provider.completions, methods=["POST"]),
+        Route("/openai/deployments/{deployment}/chat/completions", provider.completions, methods=["POST"]),
+    ])
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=300, help="Completion tokens generated per second")
+    parser.add_argument("--answer-tokens", type=int, default=150, help="Length of prose answers, in words")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failed with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests rejected with 429")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    uvicorn.run(build_app(args), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
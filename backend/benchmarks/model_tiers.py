@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Accuracy and latency of each deployment on each operation's model tier.
+
+Runs a recorded query set through the app's own prompts and parsers on
+every candidate deployment, one operation at a time:
+
+    intent  detect_mcq_intent on benchmarks/data/intent_labelled.jsonl with the
+            local fast path off; accuracy of mcq_expected, and of topic and
+            num_questions on quiz requests
+    chat    generate_response on the labelled messages that are not quiz
+            requests; share of non-empty answers
+    mcq     one quiz per labelled quiz topic, without repair; share of the
+            requested questions that came back valid
+
+--record DIR sends the set to each live deployment (the LLM_PROVIDER one,
+then every LLM_DEPLOYMENTS entry) and writes its completions to
+DIR/<deployment>.jsonl, replacing an earlier recording. --replay DIR
+replays every cassette in DIR at its recorded timing, so tiers can be
+compared offline and repeatably. Prompts, temperatures and max_tokens
+(LLM_INTENT_MAX_TOKENS, LLM_CHAT_MAX_TOKENS, MCQ_WIRE_FORMAT) must match
+between recording and replay.
+
+Reports p50 and p95 latency per call, completion tokens per call and the
+accuracy figures, per deployment and operation.
+
+Usage:
+    python -m benchmarks.model_tiers --record cassettes/tiers
+    python -m benchmarks.model_tiers --replay cassettes/tiers --operations intent,mcq
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+if "--replay" in sys.argv:
+    # No endpoint or API key needed to replay
+    os.environ["LLM_PROVIDER"] = "replay"
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["QUESTION_BANK_ENABLED"] = "false"
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+os.environ["INTENT_FAST_PATH_ENABLED"] = "false"
+os.environ["MCQ_SHARDING_ENABLED"] = "false"
+os.environ["LLM_HEDGE_ENABLED"] = "false"
+
+from app.services.llm import llm_service
+from app.services.replay import Cassette, RecordingClient, ReplayClient
+from app.services.router import Deployment
+
+DATASET = Path(__file__).resolve().parent / "data" / "intent_labelled.jsonl"
+OPERATIONS = ("intent", "chat", "mcq")
+# Operation label of each harness operation's calls, for the token counter
+_LABELS = {"intent": "intent", "chat": "chat", "mcq": "mcqs"}
+
+def completion_tokens(operation: str) -> float:
+    return REGISTRY.get_sample_value("llm_tokens_total", {"operation": _LABELS[operation], "kind": "completion"}) or 0.0
+
+async def score_intent(row):
+    result = await llm_service.detect_mcq_intent(row["message"])
+    intent_ok = result["mcq_expected"] == row["mcq_expected"]
+    if not row["mcq_expected"]:
+        return {"intent": intent_ok}
+    return {
+        "intent": intent_ok,
+        "topic": intent_ok and result["topic"].strip().lower() == row["topic"].lower(),
+        "count": intent_ok and result["num_questions"] == row["num_questions"],
+    }
+
+async def score_chat(row):
+    answer = await llm_service.generate_response(row["message"])
+    return {"answered": bool(answer.strip())}
+
+async def score_mcq(row):
+    try:
+        questions = await llm_service._generate_mcqs(row["topic"], row["num_questions"], repair=False)
+    except Exception:
+        questions = []
+    return {"valid": min(len(questions), row["num_questions"]) / row["num_questions"]}
+
+def cases(rows, operation: str):
+    if operation == "intent":
+        return rows, score_intent
+    if operation == "chat":
+        return [row for row in rows if not row["mcq_expected"]], score_chat
+    # One quiz per distinct topic
+    quizzes = {row["topic"].lower(): row for row in rows if row["mcq_expected"]}
+    return list(quizzes.values()), score_mcq
+
+async def evaluate(rows, operation: str, concurrency: int):
+    selected, score = cases(rows, operation)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, scores = [], []
+    tokens = completion_tokens(operation)
+
+    async def one(row):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await score(row)
+            except Exception as e:
+                print(f"    failed on {row['message']!r}: {e}")
+                return
+            latencies.append(time.perf_counter() - start)
+            scores.append(result)
+
+    await asyncio.gather(*(one(row) for row in selected))
+    latencies.sort()
+    summary = {
+        "calls": len(selected),
+        "failed": len(selected) - len(scores),
+        "p50": latencies[len(latencies) // 2] if latencies else None,
+        "p95": latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+        "completion_tokens": (completion_tokens(operation) - tokens) / max(1, len(scores)),
+    }
+    for metric in sorted({metric for result in scores for metric in result}):
+        values = [result[metric] for result in scores if metric in result]
+        summary[metric] = sum(values) / len(values)
+    return summary
+
+def report(name: str, operation: str, summary):
+    latency = "no successful calls" if summary["p50"] is None else f"p50 {summary['p50']:6.2f}s  p95 {summary['p95']:6.2f}s"
+    accuracy = "  ".join(f"{metric} {summary[metric]:6.1%}" for metric in ("intent", "topic", "count", "answered", "valid") if metric in summary)
+    print(f"  {name:20s} {operation:7s} {latency}  {summary['completion_tokens']:6.0f} tokens/call  "
+          f"failed {summary['failed']}/{summary['calls']}  {accuracy}")
+
+def candidates(args):
+    """(name, deployment) pairs to evaluate, each set up to record to or replay from its cassette"""
+    directory = Path(args.replay or args.record)
+    if args.replay:
+        paths = sorted(directory.glob("*.jsonl"))
+        if not paths:
+            sys.exit(f"No cassettes in {directory}; record them with --record {directory}")
+        return [(path.stem, Deployment(ReplayClient(Cassette(str(path)), speed=args.speed), path.stem, path.stem)) for path in paths]
+    pairs = []
+    for deployment in list(llm_service.router.deployments):
+        path = directory / f"{deployment.name}.jsonl"
+        if path.exists():
+            path.unlink()
+        pairs.append((deployment.name, Deployment(RecordingClient(deployment.client, Cassette(str(path))), deployment.model, deployment.name)))
+    return pairs
+
+async def main_async(args):
+    with open(args.dataset, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    results = {}
+    for name, deployment in candidates(args):
+        # Every tier of this run goes to the one candidate
+        llm_service.router.deployments = [deployment]
+        llm_service.router.tiers = {}
+        for operation in args.operations:
+            results.setdefault(name, {})[operation] = summary = await evaluate(rows, operation, args.concurrency)
+            report(name, operation, summary)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--record", metavar="DIR", help="Record each live deployment's completions to DIR/<deployment>.jsonl")
+    mode.add_argument("--replay", metavar="DIR", help="Replay every cassette in DIR")
+    parser.add_argument("--operations", type=lambda s: s.split(","), default=list(OPERATIONS), help="Comma-separated subset of " + ",".join(OPERATIONS))
+    parser.add_argument("--dataset", default=str(DATASET))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--speed", type=float, default=1, help="Replay speed; 1 keeps recorded latency")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+    unknown = set(args.operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"unknown operation(s): {', '.join(sorted(unknown))}")
+    # Unparseable replies are scored, not news
+    logging.disable(logging.ERROR)
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
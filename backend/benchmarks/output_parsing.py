@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark and fuzz run for structured-output parsing.
+
+Compares app.utils.structured_output with the extraction chain it
+replaced (regex, fence splitting, global true/True replacement, line
+parsing, yaml.safe_load, keyword fallback), over a corpus of model outputs
+in benchmarks/data/llm_outputs.jsonl. For each parser it reports how many
+outputs were understood correctly and the mean cost per parse, over the
+whole corpus and over the clean replies (marked "clean": exactly the
+requested format, nothing to repair). A fuzz pass
+then mutates the corpus (truncation, stray fences, surrounding prose) and
+checks the new parser only ever raises StructuredOutputError.
+
+The legacy chain needs PyYAML, which is no longer a dependency; without it
+only the new parser is measured.
+
+Usage:
+    python -m benchmarks.output_parsing
+    python -m benchmarks.output_parsing --fuzz-cases 20000
+"""
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.structured_output import parse_intent, parse_mcqs, StructuredOutputError
+
+CORPUS = Path(__file__).resolve().parent / "data" / "llm_outputs.jsonl"
+NO_INTENT = {"mcq_expected": False, "topic": "", "num_questions": 4}
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+def legacy_intent(content):
+    """The detect_mcq_intent parsing chain as it was before the shared parser"""
+    try:
+        cleaned_content = content
+        match = re.search(r"```(?:yaml)?(.*?)```", content, re.DOTALL)
+        if match:
+            cleaned_content = match.group(1).strip()
+        elif "```" in content:
+            parts = content.split("```")
+            if len(parts) >= 3:
+                middle_part = parts[1]
+                if middle_part.startswith("yaml"):
+                    middle_part = middle_part[4:].strip()
+                cleaned_content = middle_part.strip()
+            else:
+                cleaned_content = content.replace("```yaml", "").replace("```", "").strip()
+        cleaned_content = cleaned_content.replace("true", "True").replace("false", "False")
+        if "mcq_expected:" in cleaned_content and "topic:" in cleaned_content:
+            mcq_expected, topic, num_questions = False, "", 4
+            for line in cleaned_content.strip().split("\n"):
+                line = line.strip()
+                if line.startswith("mcq_expected:"):
+                    mcq_expected = line.split("mcq_expected:")[1].strip().lower() in ["true", "yes", "1"]
+                elif line.startswith("topic:"):
+                    topic = line.split("topic:")[1].strip()
+                    if topic.startswith('"') and topic.endswith('"'):
+                        topic = topic[1:-1]
+                    elif topic.startswith("'") and topic.endswith("'"):
+                        topic = topic[1:-1]
+                elif line.startswith("num_questions:"):
+                    try:
+                        num_questions = int(line.split("num_questions:")[1].strip())
+                    except (ValueError, TypeError):
+                        pass
+            return {"mcq_expected": mcq_expected, "topic": topic, "num_questions": num_questions}
+        result = yaml.safe_load(cleaned_content)
+        mcq_expected = result.get("mcq_expected", False)
+        if isinstance(mcq_expected, str):
+            mcq_expected = mcq_expected.lower() in ["true", "yes", "1"]
+        return {"mcq_expected": mcq_expected, "topic": result.get("topic", ""), "num_questions": result.get("num_questions", 4)}
+    except Exception:
+        if "true" in content.lower() and any(k in content.lower() for k in ["javascript", "python", "physics"]):
+            topics = re.findall(r"topic:\s*([A-Za-z0-9 ]+)", content)
+            return {"mcq_expected": True, "topic": topics[0] if topics else "", "num_questions": 4}
+    return dict(NO_INTENT)
+
+def legacy_mcqs(content):
+    """The generate_mcqs parsing as it was before the shared parser"""
+    content = content.strip()
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+    return json.loads(content).get("questions", [])
+
+def new_intent(content):
+    try:
+        return parse_intent(content)
+    except StructuredOutputError:
+        return dict(NO_INTENT)
+
+def new_mcqs(content):
+    questions, _ = parse_mcqs(content)
+    return questions
+
+def judge(row, intent_fn, mcq_fn):
+    """True if the parser understood the output as labelled"""
+    try:
+        if row["kind"] == "intent":
+            return intent_fn(row["output"]) == (row["expected"] or NO_INTENT)
+        questions = mcq_fn(row["output"])
+        valid = [q for q in questions if isinstance(q, dict) and q.get("correct_answer") in ("A", "B", "C", "D")
+                 and isinstance(q.get("options"), dict) and sorted(q["options"]) == ["A", "B", "C", "D"]]
+        if row["expected"]["valid"] is None:
+            return False
+        return len(valid) == len(questions) == row["expected"]["valid"]
+    except Exception:
+        return row["kind"] == "mcqs" and row["expected"]["valid"] is None
+
+def time_parses(rows, intent_fn, mcq_fn, repeat):
+    if not rows:
+        return 0.0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for row in rows:
+            try:
+                (intent_fn if row["kind"] == "intent" else mcq_fn)(row["output"])
+            except Exception:
+                pass
+    return (time.perf_counter() - start) / (repeat * len(rows)) * 1e6
+
+def mutate(text, rng):
+    choice = rng.randrange(5)
+    if choice == 0:
+        return text[:rng.randrange(len(text) + 1)]
+    if choice == 1:
+        pos = rng.randrange(len(text) + 1)
+        return text[:pos] + "```" + text[pos:]
+    if choice == 2:
+        return "Here you go:\n" + text + "\nHope this helps!"
+    if choice == 3:
+        pos = rng.randrange(len(text) + 1)
+        return text[:pos] + rng.choice(["{", "}", "[", "]", ",", '"', ":", "\n", "//"]) + text[pos:]
+    return text.swapcase()
+
+def fuzz(rows, cases, seed):
+    rng = random.Random(seed)
+    unexpected = 0
+    for _ in range(cases):
+        row = rng.choice(rows)
+        text = mutate(row["output"], rng)
+        try:
+            if row["kind"] == "intent":
+                parse_intent(text)
+            else:
+                parse_mcqs(text)
+        except StructuredOutputError:
+            pass
+        except Exception as e:
+            unexpected += 1
+            if unexpected <= 5:
+                print(f"  unexpected {type(e).__name__}: {e} for {text[:80]!r}")
+    return unexpected
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Timing passes over the corpus")
+    parser.add_argument("--fuzz-cases", type=int, default=5000, help="Number of mutated outputs to parse")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # Rejected questions are logged one by one, which would drown the report and the timings
+    logging.disable(logging.WARNING)
+    
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    
+    candidates = [("structured_output", new_intent, new_mcqs)]
+    if yaml is not None:
+        candidates.insert(0, ("legacy chain", legacy_intent, legacy_mcqs))
+    clean = {kind: [row for row in rows if row.get("clean") and row["kind"] == kind] for kind in ("intent", "mcqs")}
+    for name, intent_fn, mcq_fn in candidates:
+        correct = sum(judge(row, intent_fn, mcq_fn) for row in rows)
+        print(f"{name:18s} correct {correct}/{len(rows)}  "
+              f"{time_parses(rows, intent_fn, mcq_fn, args.repeat):6.1f}us per parse; clean replies: "
+              + ", ".join(f"{time_parses(clean[kind], intent_fn, mcq_fn, args.repeat):5.1f}us {kind}" for kind in clean))
+    
+    unexpected = fuzz(rows, args.fuzz_cases, args.seed)
+    print(f"fuzz: {args.fuzz_cases} mutated outputs, {unexpected} unexpected exception(s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Behaviour at the deployment quota, with and without client-side scheduling.
+
+A stubbed provider enforces a tokens-per-minute quota as a bucket holding
+one second of quota, charging each call its prompt estimate plus
+max_tokens as Azure does, and answers 429 with Retry-After when it is
+exceeded. A mixed burst
+of interactive chat answers and bulk MCQ generations is sent twice: once
+with the limiter's quotas unset (only 429 handling) and once with them set
+to the provider's quota. Reports 429s, failures and p50/p95 latency per
+priority.
+
+Usage:
+    python -m benchmarks.quota_scheduler --chats 30 --quizzes 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["QUESTION_BANK_ENABLED"] = "false"
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+from openai import RateLimitError
+from app.core.config import settings
+from app.services.llm import llm_service
+from app.services.rate_limiter import RateLimiter, TokenBucket, PRIORITY_BULK, estimate_tokens
+from benchmarks.stubs import StubCompletions, http_error, percentile, stub_client
+
+MCQ_REPLY = '{"questions": [{"question": "Q?", "options": {"A": "a", "B": "b", "C": "c", "D": "d"}, "correct_answer": "A"}]}'
+
+class QuotaStub(StubCompletions):
+    """Provider stub enforcing a tokens-per-minute quota"""
+
+    def __init__(self, tokens_per_minute: int, latency: float):
+        super().__init__(ttft=latency)
+        self.quota = TokenBucket(tokens_per_minute, burst_seconds=1)
+        self.rejected = 0
+
+    def reply(self, messages, tools):
+        return MCQ_REPLY if "questions" in messages[0]["content"].lower() else "An answer."
+
+    async def create(self, messages, max_tokens, **kwargs):
+        cost = estimate_tokens(messages, max_tokens)
+        if self.quota.delay(cost, time.monotonic()) > 0:
+            self.rejected += 1
+            raise http_error(RateLimitError, 429, "quota exceeded", {"retry-after": "1"})
+        self.quota.take(cost)
+        return await super().create(messages, max_tokens, **kwargs)
+
+async def timed(coro, latencies, failures):
+    start = time.perf_counter()
+    try:
+        await coro
+        latencies.append(time.perf_counter() - start)
+    except Exception:
+        failures.append(1)
+
+async def run(args, scheduled: bool):
+    stub = QuotaStub(args.tpm, args.latency)
+    llm_service.client = stub_client(stub)
+    llm_service.single_flight = None
+    quota = args.tpm if scheduled else 0
+    llm_service.rate_limiter = RateLimiter(tokens_per_minute=quota, burst_seconds=1)
+    
+    chat_latencies, quiz_latencies, failures = [], [], []
+    jobs = [timed(llm_service.generate_mcqs(f"topic {i}", 4, priority=PRIORITY_BULK), quiz_latencies, failures) for i in range(args.quizzes)]
+    jobs += [timed(llm_service.generate_response(f"question {i}"), chat_latencies, failures) for i in range(args.chats)]
+    start = time.perf_counter()
+    await asyncio.gather(*jobs)
+    elapsed = time.perf_counter() - start
+    
+    print(f"limiter {'on ' if scheduled else 'off'}: {elapsed:5.2f}s, {stub.rejected:3d} x 429, {len(failures)} failed | "
+          f"chat p50 {percentile(chat_latencies, 0.5):.2f}s p95 {percentile(chat_latencies, 0.95):.2f}s | "
+          f"mcq p50 {percentile(quiz_latencies, 0.5):.2f}s p95 {percentile(quiz_latencies, 0.95):.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=30, help="Interactive chat answers in the burst")
+    parser.add_argument("--quizzes", type=int, default=10, help="Bulk MCQ generations in the burst")
+    parser.add_argument("--tpm", type=int, default=600000, help="Provider tokens-per-minute quota")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds per accepted completion")
+    parser.add_argument("--retries", type=int, default=settings.LLM_MAX_RETRIES)
+    args = parser.parse_args()
+    settings.LLM_MAX_RETRIES = args.retries
+    asyncio.run(run(args, scheduled=False))
+    asyncio.run(run(args, scheduled=True))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Chat latency with the two-step and the single-call chat pipeline.
+
+A stubbed deployment waits a time to first token, then generates its
+reply at a fixed token rate. Every message in
+benchmarks/data/intent_labelled.jsonl goes through process_chat once per
+CHAT_PIPELINE:
+
+    two_step     detect_mcq_intent, then the answer or the quiz
+    single_call  one completion offering the make_quiz tool, which answers
+                 plain messages directly; quiz requests still generate the
+                 quiz in a second call
+
+The local intent fast path, response cache and speculative answering are
+off, so every turn reaches the LLM. Reports p50 and p95 latency, upstream
+calls and prompt tokens per turn, separately for plain messages and quiz
+requests. "routed" counts turns served as their label says; the stub
+decides with the same keyword rule in both pipelines, so it checks the
+dispatch rather than a model's judgement.
+
+Usage:
+    python -m benchmarks.single_call_router --concurrency 8
+    python -m benchmarks.single_call_router --ttft 0.8 --token-rate 60 --answer-tokens 200
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["QUESTION_BANK_ENABLED"] = "false"
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+os.environ["INTENT_FAST_PATH_ENABLED"] = "false"
+os.environ["SPECULATIVE_CHAT_POLICY"] = "never"
+os.environ["MCQ_SHARDING_ENABLED"] = "false"
+os.environ["LLM_HEDGE_ENABLED"] = "false"
+
+from app.api.chat import process_chat
+from app.models.chat import ChatRequest
+from app.services.llm import CHAT_PIPELINES, llm_service
+from benchmarks.stubs import MockCompletions, percentile, stub_client
+
+DATASET = Path(__file__).resolve().parent / "data" / "intent_labelled.jsonl"
+# Calls and prompt tokens of the turn the current task is serving
+_turn: ContextVar[dict] = ContextVar("turn")
+
+class TurnStub(MockCompletions):
+    """MockCompletions that also charges each call to the turn it serves"""
+
+    async def create(self, messages, **kwargs):
+        response = await super().create(messages, **kwargs)
+        turn = _turn.get(None)
+        if turn is not None:
+            turn["calls"] += 1
+            turn["prompt_tokens"] += response.usage.prompt_tokens
+        return response
+
+async def run(args, rows, pipeline: str):
+    llm_service.client = stub_client(TurnStub(args.ttft, args.token_rate, args.answer_tokens))
+    llm_service.chat_pipeline = pipeline
+    semaphore = asyncio.Semaphore(args.concurrency)
+    turns = {"plain": [], "quiz": []}
+
+    async def one(row):
+        async with semaphore:
+            turn = {"calls": 0, "prompt_tokens": 0}
+            _turn.set(turn)
+            start = time.perf_counter()
+            response = await process_chat(ChatRequest(message=row["message"]))
+            turn["seconds"] = time.perf_counter() - start
+            turn["quiz"] = "questions" in json.loads(response.body)
+            turns["quiz" if row["mcq_expected"] else "plain"].append(turn)
+
+    await asyncio.gather(*(asyncio.create_task(one(row)) for row in rows))
+    for kind, done in turns.items():
+        if not done:
+            continue
+        routed = sum(turn["quiz"] == (kind == "quiz") for turn in done)
+        print(f"  {pipeline:11s} {kind:5s} p50 {percentile([t['seconds'] for t in done], 0.5):5.2f}s  "
+              f"p95 {percentile([t['seconds'] for t in done], 0.95):5.2f}s  "
+              f"{sum(t['calls'] for t in done) / len(done):4.2f} calls/turn  "
+              f"{sum(t['prompt_tokens'] for t in done) / len(done):5.0f} prompt tokens/turn  "
+              f"routed {routed}/{len(done)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default=str(DATASET))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--ttft", type=float, default=0.4, help="Stub seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=100, help="Stub completion tokens per second")
+    parser.add_argument("--answer-tokens", type=int, default=120, help="Words in a plain answer")
+    args = parser.parse_args()
+    # Per-call logging would drown the report
+    logging.disable(logging.ERROR)
+
+    with open(args.dataset, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    print(f"{len(rows)} messages, {args.ttft}s to first token, {args.token_rate:.0f} tokens/s, concurrency {args.concurrency}")
+    for pipeline in CHAT_PIPELINES:
+        asyncio.run(run(args, rows, pipeline))
+
+if __name__ == "__main__":
+    main()
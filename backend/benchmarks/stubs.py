@@ -0,0 +1,97 @@
+"""
+Stand-ins for client.chat.completions shared by the benchmarks.
+
+StubCompletions counts each call, waits a time to first token plus the
+reply's tokens at a fixed token rate, and returns a ChatCompletion-shaped
+object with just the fields LLMService reads. A benchmark subclasses it
+and chooses the reply in reply(), and can change how long a call takes
+with delay() or how its tokens are counted with count_tokens().
+MockCompletions answers the app's prompts the way benchmarks.mock_openai
+does, without the HTTP server.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+import httpx
+
+from benchmarks.mock_openai import quiz_request, reply_for
+
+class Reply(NamedTuple):
+    content: Optional[str]
+    finish_reason: str = "stop"
+    # make_quiz tool call arguments, sent instead of content
+    arguments: Optional[str] = None
+
+def stub_client(completions) -> SimpleNamespace:
+    """A client exposing completions as client.chat.completions, for llm_service.client or a Deployment"""
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+def http_error(error_class, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+    """An openai APIStatusError subclass as the client raises it for an error status"""
+    request = httpx.Request("POST", "https://stub/chat/completions")
+    return error_class(message, response=httpx.Response(status, headers=headers, request=request), body=None)
+
+def percentile(values, share: float) -> float:
+    """The value share (0-1) of the way through values in order, NaN when there are none"""
+    ordered = sorted(values)
+    return ordered[int(share * (len(ordered) - 1))] if ordered else float("nan")
+
+class StubCompletions:
+    """Completions at a fixed time to first token and token rate; subclasses choose the reply"""
+
+    def __init__(self, ttft: float = 0.0, token_rate: float = 0.0):
+        self.ttft = ttft
+        self.token_rate = token_rate
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.max_tokens: List[Optional[int]] = []
+
+    def reply(self, messages: List[Dict[str, str]], tools: Optional[List[Dict[str, Any]]]) -> Union[str, Reply]:
+        raise NotImplementedError
+
+    def count_tokens(self, text: str) -> int:
+        # Roughly four characters per token, like the real tokenizer on English
+        return len(text) // 4
+
+    def delay(self, messages: List[Dict[str, str]], tokens: int) -> float:
+        """Seconds a call generating tokens takes; a token_rate of 0 leaves only the time to first token"""
+        return self.ttft + (tokens / self.token_rate if self.token_rate else 0)
+
+    async def wait(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+    async def create(self, messages, max_tokens=None, tools=None, **kwargs):
+        reply = self.reply(messages, tools)
+        if isinstance(reply, str):
+            reply = Reply(reply)
+        prompt_tokens = self.count_tokens("".join(m["content"] for m in messages) + json.dumps(tools or ""))
+        tokens = self.count_tokens(reply.content or reply.arguments or "")
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += tokens
+        self.max_tokens.append(max_tokens)
+        await self.wait(self.delay(messages, tokens))
+        tool_calls = None
+        if reply.arguments is not None:
+            tool_calls = [SimpleNamespace(index=0, id="call_0", type="function", function=SimpleNamespace(name="make_quiz", arguments=reply.arguments))]
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=reply.content, tool_calls=tool_calls), finish_reason="tool_calls" if tool_calls else reply.finish_reason)],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=tokens)
+        )
+
+class MockCompletions(StubCompletions):
+    """Intent, answer, make_quiz, MCQ and explanation replies as benchmarks.mock_openai sends them"""
+
+    def __init__(self, ttft: float = 0.0, token_rate: float = 0.0, answer_tokens: int = 150):
+        super().__init__(ttft, token_rate)
+        self.answer_tokens = answer_tokens
+
+    def reply(self, messages, tools):
+        prompt = messages[-1]["content"]
+        quiz = quiz_request(prompt) if tools else None
+        if quiz is not None:
+            return Reply(None, arguments=json.dumps({"topic": quiz[0], "num_questions": quiz[1]}))
+        return reply_for(prompt, self.answer_tokens)
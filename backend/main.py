@@ -1,13 +1,15 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.cors import CORSMiddleware as StarletteCORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import logging
-import traceback
-from app.api import chat, mcq
+import time
 import uvicorn
 import os
 from pathlib import Path
+from app.core.config import settings
+from app.core.logging_config import setup_logging, parse_sample_rates, RouteSampler
+from app.core.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_FLIGHT, render_metrics
 
 # Determine logs directory: use /tmp/logs if it exists, otherwise use logs
 tmp_logs_dir = Path("/tmp/logs")
@@ -20,17 +22,20 @@ else:
 # Create logs directory if it doesn't exist
 logs_dir.mkdir(exist_ok=True)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(logs_dir / "app.log")
-    ]
+# Configure logging before the app modules log during import.
+# Records are written by a background thread, so requests never block on disk.
+setup_logging(
+    level=settings.LOG_LEVEL,
+    log_file=logs_dir / "app.log",
+    log_format=settings.LOG_FORMAT
 )
+debug_sampler = RouteSampler(settings.LOG_DEBUG_SAMPLE_RATE, parse_sample_rates(settings.LOG_DEBUG_SAMPLE_RATES))
 logger = logging.getLogger(__name__)
 
+from app.api import chat, mcq
+from app.services.llm import llm_service
+from app.utils.prompt_loader import prompt_registry
+
 app = FastAPI()
 
 # Get frontend URL from environment or use default for local development
@@ -44,7 +49,7 @@ try:
     ]
     logger.info("Removed existing CORS middleware")
 except Exception as e:
-    logger.warning(f"Could not remove existing CORS middleware: {str(e)}")
+    logger.warning("Could not remove existing CORS middleware: %s", e)
 
 # Add CORS middleware with proper configuration
 app.add_middleware(
@@ -63,18 +68,45 @@ logger.info("Added CORS middleware with wildcard origin and localhost developmen
 # Global exception handler
 @app.middleware("http")
 async def global_exception_middleware(request: Request, call_next):
+    debug_sampler.start_request(request.url.path)
+    start = time.perf_counter()
+    status = 500
+    HTTP_REQUESTS_IN_FLIGHT.inc()
     try:
-        logger.debug(f"Processing request: {request.method} {request.url.path}")
+        logger.debug("Processing request: %s %s", request.method, request.url.path)
         response = await call_next(request)
-        logger.debug(f"Response status code: {response.status_code}")
+        status = response.status_code
+        logger.debug("Response status code: %s", response.status_code)
         return response
     except Exception as e:
-        logger.error(f"Unhandled exception: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Unhandled exception: %s", e)
         return JSONResponse(
             status_code=500,
             content={"detail": f"Internal server error: {str(e)}"}
         )
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        # Label by route template, not raw path, to keep the series count bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(request.method, getattr(route, "path", "unmatched"), status).observe(time.perf_counter() - start)
+
+# Pre-warm pooled LLM connections so the first requests skip the TCP/TLS handshake
+@app.on_event("startup")
+async def warm_llm_connections():
+    await llm_service.warmup()
+
+@app.on_event("shutdown")
+async def close_llm_connections():
+    await llm_service.aclose()
+
+# Prompts are served from memory; edited files are picked up by a background mtime check
+@app.on_event("startup")
+async def watch_prompts():
+    prompt_registry.watch(settings.PROMPT_RELOAD_INTERVAL)
+
+@app.on_event("shutdown")
+async def stop_watching_prompts():
+    await prompt_registry.stop()
 
 # Include the routers
 app.include_router(chat.router, prefix="/api")
@@ -90,6 +122,12 @@ def read_root():
     logger.info("Root endpoint accessed")
     return {"message": "Welcome to the Chat MCQ App!"}
 
+# Prometheus scrape endpoint
+@app.get("/metrics")
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # Health check endpoint for debugging
 @app.get("/api/health")
 def health_check():
@@ -0,0 +1,7 @@
+import os
+
+# The LLM service is built at import time; tests replace its calls, so it only needs a key to start
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("QUESTION_BANK_ENABLED", "false")
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
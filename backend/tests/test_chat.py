@@ -0,0 +1,128 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.chat import chat_event_stream, process_chat
+from app.models.chat import ChatRequest
+from app.core.config import settings
+from app.services.llm import llm_service
+from app.services.rate_limiter import QuotaExceededError
+
+# Without quiz vocabulary or a plain-question opener, so intent detection asks the LLM
+MESSAGE = "Test my knowledge of physics"
+
+async def out_of_quota_for_intent(*args, operation=None, **kwargs):
+    # Only intent detection is throttled, so a swallowed error would still produce a chat answer
+    if operation == "intent":
+        raise QuotaExceededError(12.0)
+    raise AssertionError(f"{operation} called after intent detection ran out of quota")
+
+def collect(events):
+    async def drain():
+        return [event async for event in events]
+    return asyncio.run(drain())
+
+def test_intent_quota_returns_503(monkeypatch):
+    monkeypatch.setattr(llm_service, "_complete", out_of_quota_for_intent)
+    monkeypatch.setattr(llm_service, "chat_pipeline", "two_step")
+    response = asyncio.run(process_chat(ChatRequest(message=MESSAGE)))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "12"
+    assert json.loads(response.body)["type"] == "QuotaExceededError"
+
+def test_intent_quota_ends_stream_with_retry_after(monkeypatch):
+    monkeypatch.setattr(llm_service, "_complete", out_of_quota_for_intent)
+    monkeypatch.setattr(llm_service, "chat_pipeline", "two_step")
+    events = collect(chat_event_stream(MESSAGE))
+    assert len(events) == 1
+    assert events[0].startswith("event: error\n")
+    assert json.loads(events[0].split("data: ", 1)[1])["retry_after"] == 12.0
+
+def _tool_call(arguments, index=0, name="make_quiz"):
+    return SimpleNamespace(index=index, id=f"call_{index}", type="function", function=SimpleNamespace(name=name, arguments=arguments))
+
+def routed_reply(content=None, arguments=None):
+    """A fake _complete answering every route_chat call with content or a make_quiz call"""
+    calls = []
+
+    async def complete(messages, operation=None, tools=None, **kwargs):
+        calls.append(operation)
+        if operation == "intent":
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{"mcq_expected": false, "topic": "", "num_questions": 4}'))])
+        tool_calls = [_tool_call(arguments)] if arguments is not None else None
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content, tool_calls=tool_calls))])
+
+    return complete, calls
+
+@pytest.fixture
+def single_call(monkeypatch):
+    monkeypatch.setattr(llm_service, "chat_pipeline", "single_call")
+    monkeypatch.setattr(settings, "INTENT_FAST_PATH_ENABLED", False)
+
+def test_route_chat_answers_plain_message_in_one_call(monkeypatch, single_call):
+    complete, calls = routed_reply(content="Recursion is a function calling itself.")
+    monkeypatch.setattr(llm_service, "_complete", complete)
+    response = asyncio.run(process_chat(ChatRequest(message="What is recursion?")))
+    assert json.loads(response.body)["message"] == "Recursion is a function calling itself."
+    assert calls == ["chat_route"]
+
+def test_route_chat_make_quiz_call_generates_quiz(monkeypatch, single_call):
+    complete, calls = routed_reply(arguments='{"topic": "recursion", "num_questions": 3}')
+    requested = []
+
+    async def generate_mcqs(topic, num_questions):
+        requested.append((topic, num_questions))
+        return [{"question": f"Q{i}?", "options": {"A": "1", "B": "2", "C": "3", "D": "4"}, "correct_answer": "A", "explanation": "x"} for i in range(num_questions)]
+
+    monkeypatch.setattr(llm_service, "_complete", complete)
+    monkeypatch.setattr(llm_service, "generate_mcqs", generate_mcqs)
+    body = json.loads(asyncio.run(process_chat(ChatRequest(message="Quiz me on recursion, 3 questions"))).body)
+    assert requested == [("recursion", 3)]
+    assert len(body["questions"]) == 3 and body["quiz_id"]
+    assert calls == ["chat_route"]
+
+@pytest.mark.parametrize("content, arguments", [
+    # make_quiz called without a topic
+    (None, '{"num_questions": 3}'),
+    # Neither an answer nor a tool call
+    ("", None),
+])
+def test_route_chat_falls_back_to_intent_detection(monkeypatch, single_call, content, arguments):
+    complete, calls = routed_reply(content=content, arguments=arguments)
+    monkeypatch.setattr(llm_service, "_complete", complete)
+    intent, answer = asyncio.run(llm_service.route_chat("Tell me something"))
+    assert intent["mcq_expected"] is False and answer is None
+    assert calls == ["chat_route", "intent"]
+
+def test_stream_route_chat_assembles_tool_call_fragments(monkeypatch, single_call):
+    fragments = ['{"topic": "re', 'cursion", "num_', 'questions": 2}']
+
+    async def complete(messages, operation=None, **kwargs):
+        async def chunks():
+            # A leading chunk without choices, as Azure sends
+            yield SimpleNamespace(choices=[])
+            for i, fragment in enumerate(fragments):
+                call = _tool_call(fragment, name="make_quiz" if i == 0 else None)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None, tool_calls=[call]))])
+        return chunks()
+
+    async def drain():
+        return [item async for item in llm_service.stream_route_chat("Quiz me on recursion")]
+
+    monkeypatch.setattr(llm_service, "_complete", complete)
+    assert asyncio.run(drain()) == [("quiz", {"mcq_expected": True, "topic": "recursion", "num_questions": 2})]
+
+def test_stream_route_chat_streams_answer_tokens(monkeypatch, single_call):
+    async def complete(messages, operation=None, **kwargs):
+        async def chunks():
+            for text in ["Recursion ", "calls ", "itself."]:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text, tool_calls=None))])
+        return chunks()
+
+    monkeypatch.setattr(llm_service, "_complete", complete)
+    events = collect(chat_event_stream("What is recursion?"))
+    tokens = [json.loads(event.split("data: ", 1)[1])["content"] for event in events if event.startswith("event: token")]
+    assert "".join(tokens) == "Recursion calls itself."
+    assert events[-1].startswith("event: done")
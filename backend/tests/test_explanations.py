@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import explanations
+from app.services.explanations import ExplanationStats, create_quiz, ensure_explanations
+from app.services.llm import llm_service
+from app.services.quiz_store import QuizStore
+from app.utils.structured_output import parse_explanations
+
+QUESTIONS = [
+    {"question": f"Question {i}?", "options": {"A": "1", "B": "2", "C": "3", "D": "4"}, "correct_answer": key}
+    for i, key in enumerate("BAD")
+]
+
+@pytest.fixture
+def store(monkeypatch):
+    store = QuizStore()
+    monkeypatch.setattr(explanations, "quiz_store", store)
+    return store
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = ExplanationStats()
+    monkeypatch.setattr(explanations, "explanation_stats", stats)
+    return stats
+
+def fake_explainer(monkeypatch, delay=0.0, fail=False):
+    calls = []
+
+    async def explain_mcqs(topic, questions, priority):
+        calls.append((topic, len(questions), priority))
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("upstream down")
+        return [f"Because {q['correct_answer']}." for q in questions]
+
+    monkeypatch.setattr(llm_service, "explain_mcqs", explain_mcqs)
+    return calls
+
+def test_inline_mode_leaves_grading_alone(monkeypatch, store, stats):
+    monkeypatch.setattr(llm_service, "explanation_mode", "inline")
+    calls = fake_explainer(monkeypatch)
+
+    async def scenario():
+        quiz = store.get(create_quiz("topic", QUESTIONS))
+        await ensure_explanations(quiz)
+        return quiz
+
+    quiz = asyncio.run(scenario())
+    assert calls == []
+    assert quiz.explanations == ["", "", ""]
+    assert stats.graded == 0
+
+def test_on_submit_explains_whole_quiz_in_one_call(monkeypatch, store, stats):
+    monkeypatch.setattr(llm_service, "explanation_mode", "on_submit")
+    calls = fake_explainer(monkeypatch)
+
+    async def scenario():
+        quiz = store.get(create_quiz("topic", QUESTIONS))
+        await ensure_explanations(quiz)
+        await ensure_explanations(quiz)
+        return quiz
+
+    quiz = asyncio.run(scenario())
+    assert len(calls) == 1 and calls[0][:2] == ("topic", 3)
+    assert quiz.grade(["B", "C", "D"])["results"][1]["explanation"] == "Because A."
+    assert (stats.graded, stats.ready_at_submit, stats.speculated) == (2, 1, 0)
+
+def test_speculative_call_is_shared_with_grading(monkeypatch, store, stats):
+    monkeypatch.setattr(llm_service, "explanation_mode", "speculative")
+    calls = fake_explainer(monkeypatch, delay=0.05)
+
+    async def scenario():
+        quiz = store.get(create_quiz("topic", QUESTIONS))
+        # Graded while the speculative call is still running
+        await ensure_explanations(quiz)
+        return quiz
+
+    quiz = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(quiz.explanations)
+    assert (stats.speculated, stats.graded, stats.ready_at_submit) == (1, 1, 0)
+
+def test_slow_explanations_do_not_hold_up_grading(monkeypatch, store, stats):
+    monkeypatch.setattr(llm_service, "explanation_mode", "on_submit")
+    monkeypatch.setattr(settings, "MCQ_EXPLANATION_WAIT_SECONDS", 0.01)
+    calls = fake_explainer(monkeypatch, delay=0.1)
+
+    async def scenario():
+        quiz = store.get(create_quiz("topic", QUESTIONS))
+        await ensure_explanations(quiz)
+        graded_without = not any(quiz.explanations)
+        # The call keeps running for the next grading
+        await quiz.explaining
+        return quiz, graded_without
+
+    quiz, graded_without = asyncio.run(scenario())
+    assert graded_without
+    assert all(quiz.explanations)
+    assert len(calls) == 1
+    assert stats.timed_out == 1
+
+def test_failed_explanations_retried_at_next_grading(monkeypatch, store, stats):
+    monkeypatch.setattr(llm_service, "explanation_mode", "on_submit")
+    calls = fake_explainer(monkeypatch, fail=True)
+
+    async def scenario():
+        quiz = store.get(create_quiz("topic", QUESTIONS))
+        await ensure_explanations(quiz)
+        assert quiz.explaining is None
+        fake_explainer(monkeypatch)
+        await ensure_explanations(quiz)
+        return quiz
+
+    quiz = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(quiz.explanations)
+    assert stats.failed == 1
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"e": ["One.", " Two. "]}', ["One.", "Two.", ""]),
+    ('["One.", 2, "Three.", "Four."]', ["One.", "", "Three."]),
+])
+def test_explanations_line_up_with_questions(text, expected):
+    assert parse_explanations(text, 3) == expected
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import pytest
+
+from app.api.mcq import evaluate_mcqs_bulk
+from app.models.mcq import MCQBulkSubmission
+from app.services.grading import BLANK, encode_answers, grade_bulk
+from app.services.quiz_store import QuizStore, quiz_store
+
+QUESTIONS = [
+    {"question": f"Question {i}?", "options": {}, "correct_answer": key, "explanation": "Because."}
+    for i, key in enumerate("BADC")
+]
+
+def make_quiz():
+    store = QuizStore()
+    return store.get(store.create("topic", QUESTIONS))
+
+@pytest.mark.parametrize("sheets", [
+    # One character per answer
+    [["B", "A", "D", "C"], ["b", "a", "", "C"], ["A", " ", "E", "c"]],
+    # Padded, labelled and worded answers
+    [[" B", "Banana", "B) x", "c "], ["b\n", "A ", "d", "C) y"], ["", "a", "Delta", " c"]],
+])
+def test_bulk_scores_match_single_grading(sheets):
+    quiz = make_quiz()
+    bulk = grade_bulk(quiz, encode_answers(sheets, len(quiz)))
+    assert bulk["scores"] == [quiz.grade(sheet)["score"] for sheet in sheets]
+
+def test_encode_answers_normalises_like_single_grading():
+    encoded = encode_answers([[" B", "banana", "B) x", "d"]], 4)
+    assert encoded.tolist() == [[1, BLANK, BLANK, 3]]
+
+def test_encode_answers_checks_sheet_length():
+    with pytest.raises(ValueError):
+        encode_answers([["A", "B"]], 4)
+    assert encode_answers([], 4).shape == (0, 4)
+
+def test_item_statistics():
+    quiz = make_quiz()
+    sheets = [["B", "A", "D", "C"], ["B", "A", "D", "A"], ["C", "B", "", "A"], ["C", "B", "A", "A"]]
+    result = grade_bulk(quiz, encode_answers(sheets, len(quiz)))
+    assert result["scores"] == [4, 3, 0, 0]
+    assert result["mean_score"] == 1.75
+    first = result["items"][0]
+    assert first["percent_correct"] == 50.0
+    assert first["option_counts"] == {"A": 0, "B": 2, "C": 2, "D": 0}
+    assert result["items"][2]["blank"] == 1
+    # The top scorer gets it right and the bottom scorer does not
+    assert first["discrimination"] == 1.0
+
+def test_bulk_endpoint_returns_the_declared_model():
+    quiz_id = quiz_store.create("topic", QUESTIONS)
+    response = asyncio.run(evaluate_mcqs_bulk(MCQBulkSubmission(quiz_id=quiz_id, submissions=[[" b", "A", "D", "C"]])))
+    body = json.loads(response.body)
+    assert body["scores"] == [4]
+    assert set(body["items"][0]) == {"question", "correct_answer", "percent_correct", "option_counts", "blank", "discrimination"}
@@ -0,0 +1,52 @@
+import pytest
+
+from app.core.config import settings
+from app.services.intent_classifier import classify_intent
+
+THRESHOLD = settings.INTENT_FAST_PATH_THRESHOLD
+
+@pytest.mark.parametrize("message, topic, count", [
+    ("Generate 5 MCQs on JavaScript Promises", "JavaScript Promises", 5),
+    ("Create a quiz for me on python", "python", 4),
+    ("Could you prepare 8 MCQs covering cell biology?", "cell biology", 8),
+    ("Give me two MCQs about recursion please", "recursion", 2),
+])
+def test_clear_quiz_requests_decided_locally(message, topic, count):
+    result, confidence = classify_intent(message)
+    assert confidence >= THRESHOLD
+    assert result == {"mcq_expected": True, "topic": topic, "num_questions": count}
+
+@pytest.mark.parametrize("message", [
+    "make a quiz for me",
+    "make 5 mcqs for my students",
+    "I need a quiz for tomorrow",
+    "quiz me on my notes",
+    "quiz me",
+])
+def test_quiz_without_a_subject_goes_to_the_llm(message):
+    result, confidence = classify_intent(message)
+    assert result["mcq_expected"]
+    assert confidence < THRESHOLD
+
+@pytest.mark.parametrize("message", ["hi", "Thanks, that was helpful!", "What is recursion?", "Why is the sky blue?"])
+def test_greetings_and_plain_questions_decided_locally(message):
+    result, confidence = classify_intent(message)
+    assert not result["mcq_expected"]
+    assert confidence >= THRESHOLD
+
+@pytest.mark.parametrize("message", [
+    # Quiz requests in other words
+    "Test my knowledge of physics",
+    "give me some practice problems on algebra",
+    # Anything else is left to the LLM
+    "Write a Python function to reverse a string",
+    "Give me 5 tips for studying effectively",
+    "Hi, can you make me some flashcards on the French Revolution and then check my answers?",
+])
+def test_other_messages_go_to_the_llm(message):
+    _, confidence = classify_intent(message)
+    assert confidence < THRESHOLD
+
+def test_info_question_about_quizzes_goes_to_the_llm():
+    _, confidence = classify_intent("How do I write good multiple choice questions for my students?")
+    assert confidence < THRESHOLD
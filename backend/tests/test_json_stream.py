@@ -0,0 +1,51 @@
+import json
+
+from app.utils.json_stream import JSONArrayStreamParser
+
+QUESTIONS = [
+    {"question": "What does {\"a\": [1]} decode to?", "correct_answer": "A"},
+    {"question": "Which escape is \\\\ or \\\"?", "correct_answer": "B"},
+    {"question": "Nested", "options": {"A": "[x]", "B": "{y}"}, "correct_answer": "C"},
+]
+DOCUMENT = "```json\n" + json.dumps({"topic": "JSON", "questions": QUESTIONS, "extra": [{"ignored": True}]}) + "\n```"
+
+def feed_in_chunks(parser, text, size):
+    items = []
+    for i in range(0, len(text), size):
+        items += parser.feed(text[i:i + size])
+    return items
+
+def test_items_returned_whole_for_any_chunking():
+    for size in (1, 2, 3, 7, 64, len(DOCUMENT)):
+        parser = JSONArrayStreamParser()
+        assert feed_in_chunks(parser, DOCUMENT, size) == QUESTIONS
+        assert parser.finished
+        assert parser.items_seen == len(QUESTIONS)
+
+def test_item_returned_as_soon_as_it_closes():
+    parser = JSONArrayStreamParser()
+    first = json.dumps(QUESTIONS[0])
+    assert parser.feed('{"questions": [' + first[:-1]) == []
+    assert parser.feed(first[-1]) == [QUESTIONS[0]]
+
+def test_other_keys_and_nested_arrays_ignored():
+    parser = JSONArrayStreamParser(key="q")
+    text = json.dumps({"questions": [[1]], "meta": {"q": [[2]]}, "q": [[3], [4]]})
+    assert parser.feed(text) == [[3], [4]]
+
+def test_malformed_item_skipped():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('{"questions": [{"a": 1}, {"b": 2,}, {"c": 3}]}') == [{"a": 1}, {"c": 3}]
+    assert (parser.items_seen, parser.items_invalid) == (3, 1)
+
+def test_text_after_root_object_ignored():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('{"questions": [{"a": 1}]} {"questions": [{"b": 2}]}') == [{"a": 1}]
+    assert parser.feed('{"questions": [{"c": 3}]}') == []
+
+def test_cut_off_stream_keeps_complete_items():
+    parser = JSONArrayStreamParser()
+    text = json.dumps({"questions": QUESTIONS})
+    cut = text.index(json.dumps(QUESTIONS[2])) + 10
+    assert parser.feed(text[:cut]) == QUESTIONS[:2]
+    assert not parser.finished
@@ -0,0 +1,74 @@
+import contextvars
+import json
+import logging
+
+import pytest
+
+from app.core.logging_config import (
+    DebugSampler, JSONFormatter, RouteSampler, debug_sampled, parse_sample_rates, setup_logging, shutdown_logging
+)
+
+@pytest.fixture
+def root_logger():
+    # setup_logging replaces the root handlers, pytest's capture handler included
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+def make_record(level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_json_formatter_includes_extra_fields_and_route():
+    entry = json.loads(JSONFormatter().format(make_record(route="/api/chat", topic="physics")))
+    assert entry["msg"] == "hello world"
+    assert (entry["level"], entry["logger"], entry["route"], entry["topic"]) == ("INFO", "app.test", "/api/chat", "physics")
+
+def test_parse_sample_rates():
+    assert parse_sample_rates(" /api/chat=0.1, /api/mcq/generate=0.5 ,") == {"/api/chat": 0.1, "/api/mcq/generate": 0.5}
+
+@pytest.mark.parametrize("rates, route, kept", [
+    ({"/api/chat": 0.0}, "/api/chat", False),
+    ({"/api/chat": 0.0}, "/api/mcq/generate", True),
+    ({"/api/chat": 1.0}, "/api/chat", True),
+])
+def test_debug_records_kept_per_route(rates, route, kept):
+    def decide():
+        RouteSampler(1.0, rates).start_request(route)
+        return debug_sampled.get()
+
+    assert contextvars.copy_context().run(decide) is kept
+
+def test_debug_sampler_only_drops_debug():
+    def check():
+        debug_sampled.set(False)
+        sampler = DebugSampler()
+        return sampler.filter(make_record(logging.DEBUG)), sampler.filter(make_record(logging.INFO))
+
+    assert contextvars.copy_context().run(check) == (False, True)
+
+def test_records_written_by_background_writer(root_logger, tmp_path):
+    log_file = tmp_path / "app.log"
+    setup_logging("INFO", log_file, "json")
+    topics = ["physics"]
+    logging.getLogger("app.test").info("topics %s", topics, extra={"count": 1})
+    # The message is resolved when logged, not when written
+    topics.append("later")
+    logging.getLogger("app.test").debug("not written at INFO")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("app.test").exception("failed")
+    shutdown_logging()
+
+    entries = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    assert [entry["msg"] for entry in entries] == ["topics ['physics']", "failed"]
+    assert entries[0]["count"] == 1
+    assert "ValueError: boom" in entries[1]["exc"]
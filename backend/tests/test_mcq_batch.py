@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.mcq import generate_mcq_batch, mcq_batch_event_stream
+from app.core.config import settings
+from app.models.mcq import MCQBatchRequest, MCQRequest
+from app.services.llm import llm_service
+from app.services.rate_limiter import PRIORITY_BULK
+
+QUESTION = {"question": "Q?", "options": {"A": "1", "B": "2", "C": "3", "D": "4"}, "correct_answer": "A"}
+
+def parse_events(events):
+    parsed = []
+    for event in events:
+        name, data = event.strip().split("\n")
+        parsed.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return parsed
+
+def collect(requests):
+    async def drain():
+        return [event async for event in mcq_batch_event_stream(requests)]
+    return parse_events(asyncio.run(drain()))
+
+def test_topics_reported_as_they_finish(monkeypatch):
+    priorities = []
+
+    async def generate_mcqs(topic, num_questions, priority):
+        priorities.append(priority)
+        # Later topics finish first
+        await asyncio.sleep({"slow": 0.05, "fast": 0.0, "broken": 0.01}[topic])
+        if topic == "broken":
+            raise ValueError("no questions")
+        return [QUESTION] * num_questions
+
+    monkeypatch.setattr(llm_service, "generate_mcqs", generate_mcqs)
+    events = collect([MCQRequest(topic="slow", num_questions=2), MCQRequest(topic="fast"), MCQRequest(topic="broken")])
+
+    assert events[0] == ("batch", {"count": 3})
+    assert [(name, data["index"]) for name, data in events[1:-1]] == [("result", 1), ("failed", 2), ("result", 0)]
+    assert len(events[3][1]["questions"]) == 2 and events[3][1]["quiz_id"]
+    assert "no questions" in events[2][1]["detail"]
+    assert events[-1] == ("done", {"count": 3, "succeeded": 2, "failed": 1})
+    assert set(priorities) == {PRIORITY_BULK}
+
+def test_batch_size_checked():
+    with pytest.raises(HTTPException) as empty:
+        asyncio.run(generate_mcq_batch(MCQBatchRequest(requests=[])))
+    too_many = MCQBatchRequest(requests=[MCQRequest(topic=str(i)) for i in range(settings.MCQ_BATCH_MAX_TOPICS + 1)])
+    with pytest.raises(HTTPException) as large:
+        asyncio.run(generate_mcq_batch(too_many))
+    assert empty.value.status_code == large.value.status_code == 400
+
+def test_concurrency_bounded(monkeypatch):
+    running, peak = [0], [0]
+
+    async def generate_mcqs(topic, num_questions, priority):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return [QUESTION]
+
+    monkeypatch.setattr(llm_service, "generate_mcqs", generate_mcqs)
+    monkeypatch.setattr(settings, "MCQ_BATCH_CONCURRENCY", 2)
+    events = collect([MCQRequest(topic=str(i)) for i in range(6)])
+    assert events[-1][1]["succeeded"] == 6
+    assert peak[0] == 2
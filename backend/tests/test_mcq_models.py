@@ -0,0 +1,38 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models.mcq import MCQQuestion
+
+OPTIONS = {"A": "Paris", "B": "Rome", "C": "Madrid", "D": "Berlin"}
+
+@pytest.mark.parametrize("answer, letter", [
+    ("B", "B"),
+    ("b", "B"),
+    ("B)", "B"),
+    ("(B)", "B"),
+    ("B. Rome", "B"),
+    ("Option B", "B"),
+    ("option c", "C"),
+    ("Answer: D", "D"),
+    ("Correct answer: a", "A"),
+])
+def test_answer_letter_normalised(answer, letter):
+    question = MCQQuestion(question="Capital of Italy?", options=OPTIONS, correct_answer=answer)
+    assert question.correct_answer == letter
+
+@pytest.mark.parametrize("answer", ["Rome", "Apple", "E", "", "Option"])
+def test_answer_without_letter_rejected(answer):
+    with pytest.raises(ValidationError):
+        MCQQuestion(question="Capital of Italy?", options=OPTIONS, correct_answer=answer)
+
+def test_options_reordered_and_checked():
+    question = MCQQuestion(question="q", options={"D": "4", "C": "3", "B": "2", "A": "1"}, correct_answer="A")
+    assert list(question.options) == ["A", "B", "C", "D"]
+    with pytest.raises(ValidationError):
+        MCQQuestion(question="q", options={"A": "1", "B": "2", "C": "3"}, correct_answer="A")
+    with pytest.raises(ValidationError):
+        MCQQuestion(question="q", options={**OPTIONS, "B": " "}, correct_answer="A")
+
+def test_blank_stem_rejected():
+    with pytest.raises(ValidationError):
+        MCQQuestion(question="  ", options=OPTIONS, correct_answer="A")
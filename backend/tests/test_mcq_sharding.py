@@ -0,0 +1,40 @@
+from app.services.mcq_sharding import ShardLatencyModel, merge_questions, spare_questions, split_evenly
+
+def question(stem, answer="Paris"):
+    return {"question": stem, "options": {"A": answer, "B": "x", "C": "y", "D": "z"}, "correct_answer": "A"}
+
+def test_split_evenly():
+    assert split_evenly(12, 3) == [3, 3, 3, 3]
+    assert split_evenly(10, 4) == [4, 3, 3]
+    assert split_evenly(3, 10) == [3]
+    assert spare_questions(10) == 2
+
+def test_merge_interleaves_and_drops_near_duplicates():
+    first = [question("What is the capital of France?"), question("Which river flows through Paris?", "Seine")]
+    second = [question("What is the capital city of France?"), question("Who designed the Eiffel Tower?", "Eiffel")]
+    merged, dropped = merge_questions([first, second], 10, 0.6)
+    assert [q["question"] for q in merged] == [
+        "What is the capital of France?", "Which river flows through Paris?", "Who designed the Eiffel Tower?"
+    ]
+    assert dropped == 1
+
+def test_limited_merge_is_a_prefix_of_the_full_merge():
+    shards = [[question(f"Shard {s} question {i} about w{s}x{i}", f"a{s}{i}") for i in range(3)] for s in range(3)]
+    full, _ = merge_questions(shards, 9, 0.6)
+    limited, _ = merge_questions(shards, 4, 0.6)
+    assert limited == full[:4]
+
+def test_merge_avoids_seen_questions():
+    seen = [question("What is the capital of France?")]
+    merged, dropped = merge_questions([[question("What is the capital of France?")]], 5, 0.6, seen=seen)
+    assert (merged, dropped) == ([], 1)
+
+def test_latency_model_fit():
+    model = ShardLatencyModel()
+    assert model.fit() == (0.5, 1.0)
+    for size in (1, 3, 5) * 5:
+        model.observe(size, 0.8 + 0.2 * size)
+    fixed, per_question = model.fit()
+    assert abs(fixed - 0.8) < 1e-6 and abs(per_question - 0.2) < 1e-6
+    assert model.shard_size(12, 4) == 4
+    assert model.shard_size(12, 2) == 6
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from app.utils.prompt_loader import PromptRegistry, prompt_registry
+
+def write(path, text, mtime):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+def test_shipped_prompts_load():
+    prompt = prompt_registry.get("simple_request/prompt.txt")
+    assert prompt.fields == {"user_query"}
+    assert "Why is the sky blue?" in prompt.format(user_query="Why is the sky blue?")
+
+def test_prompt_fields_and_format(tmp_path):
+    write(tmp_path / "ask" / "prompt.txt", "Answer {user_query} in {style}.\n", 1)
+    write(tmp_path / "ask" / "system.txt", "Be brief.", 1)
+    registry = PromptRegistry(tmp_path)
+    prompt = registry.get("ask/prompt.txt")
+    assert prompt.fields == {"user_query", "style"}
+    assert prompt.format(user_query="why", style="brief") == "Answer why in brief."
+    # Prompts without placeholders are served as they are
+    assert registry.get("ask/system.txt").format(user_query="ignored") == "Be brief."
+    with pytest.raises(ValueError):
+        registry.get("ask/missing.txt")
+
+def test_refresh_reloads_only_changed_files(tmp_path):
+    write(tmp_path / "ask" / "prompt.txt", "one", 1)
+    write(tmp_path / "ask" / "system.txt", "system", 1)
+    registry = PromptRegistry(tmp_path)
+    version = registry.bundle_version("ask")
+    assert registry.refresh() == 0
+
+    write(tmp_path / "ask" / "prompt.txt", "two", 2)
+    assert registry.refresh() == 1
+    assert registry.get("ask/prompt.txt").text == "two"
+    assert registry.bundle_version("ask") != version
+
+    (tmp_path / "ask" / "system.txt").unlink()
+    assert registry.refresh() == 1
+    with pytest.raises(ValueError):
+        registry.get("ask/system.txt")
@@ -0,0 +1,66 @@
+import asyncio
+
+from app.services.question_bank import QuestionBank, normalize_topic
+
+def make_questions(count, start=0):
+    return [{
+        "question": f"Question {i}?",
+        "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+        "correct_answer": "A",
+    } for i in range(start, start + count)]
+
+def stems(questions):
+    return {q["question"] for q in questions}
+
+def test_normalize_topic():
+    assert normalize_topic(" The Python. ") == normalize_topic("python") == "python"
+    assert normalize_topic("C++") == "c++"
+
+def test_small_pool_misses_until_it_is_large_enough():
+    async def scenario():
+        bank = QuestionBank(":memory:", pool_factor=3)
+        assert await bank.sample("python", 4) is None
+        await bank.add("python", make_questions(4))
+        # One generation's worth would hand every caller the same quiz
+        assert await bank.sample("python", 4) is None
+        await bank.add("Python", make_questions(8, start=4))
+        assert len(await bank.sample("python", 4)) == 4
+        assert (bank.hits, bank.misses) == (1, 2)
+
+    asyncio.run(scenario())
+
+def test_consecutive_draws_differ():
+    async def scenario():
+        bank = QuestionBank(":memory:", pool_factor=2)
+        await bank.add("python", make_questions(8))
+        previous = stems(await bank.sample("python", 4))
+        seen = set(previous)
+        for _ in range(20):
+            current = stems(await bank.sample("python", 4))
+            assert len(current) == 4
+            assert not current & previous
+            seen |= current
+            previous = current
+        assert seen == stems(make_questions(8))
+
+    asyncio.run(scenario())
+
+def test_invalid_and_duplicate_questions_not_banked():
+    async def scenario():
+        bank = QuestionBank(":memory:")
+        invalid = {**make_questions(1)[0], "correct_answer": "E"}
+        assert await bank.add("python", make_questions(2) + [invalid]) == 2
+        assert await bank.add("python", make_questions(3)) == 1
+        assert bank.stats()["questions"] == 3
+
+    asyncio.run(scenario())
+
+def test_pool_and_topic_bounds():
+    async def scenario():
+        bank = QuestionBank(":memory:", max_topics=1, max_per_topic=5)
+        await bank.add("python", make_questions(8))
+        assert bank.stats()["questions"] == 5
+        await bank.add("rust", make_questions(2))
+        assert bank.stats() == {"topics": 1, "questions": 2, "hits": 0, "misses": 0}
+
+    asyncio.run(scenario())
@@ -0,0 +1,43 @@
+import pytest
+
+from app.services.quiz_store import QuizStore
+
+QUESTIONS = [
+    {"question": "One?", "options": {}, "correct_answer": "A", "explanation": "Because."},
+    {"question": "Two?", "options": {}, "correct_answer": "C"},
+]
+
+def test_grade_against_stored_key():
+    store = QuizStore()
+    quiz = store.get(store.create("topic", QUESTIONS))
+    result = quiz.grade([" a", "B"])
+    assert (result["score"], result["total"], result["percentage"]) == (1, 2, 50.0)
+    assert [r["is_correct"] for r in result["results"]] == [True, False]
+    assert [r["correct_answer"] for r in result["results"]] == ["A", "C"]
+    assert result["results"][0]["explanation"] == "Because."
+
+def test_grade_requires_one_answer_per_question():
+    store = QuizStore()
+    with pytest.raises(ValueError):
+        store.get(store.create("topic", QUESTIONS)).grade(["A"])
+
+def test_unexplained_questions_kept_for_later():
+    store = QuizStore()
+    quiz = store.get(store.create("topic", QUESTIONS))
+    assert list(quiz.unexplained) == [1]
+
+def test_expired_quiz_is_gone():
+    store = QuizStore(ttl_seconds=-1)
+    quiz_id = store.create("topic", QUESTIONS)
+    assert store.get(quiz_id) is None
+    assert store.stats()["expired"] == 1
+
+def test_least_recently_used_quiz_evicted():
+    store = QuizStore(max_quizzes=2)
+    first = store.create("one", QUESTIONS)
+    second = store.create("two", QUESTIONS)
+    store.get(first)
+    third = store.create("three", QUESTIONS)
+    assert store.get(second) is None
+    assert store.get(first) is not None and store.get(third) is not None
+    assert store.stats()["evictions"] == 1
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from app.services.rate_limiter import PRIORITY_BULK, PRIORITY_INTERACTIVE, RateLimiter, backoff_delay
+
+def test_unlimited_limiter_never_waits():
+    async def scenario():
+        limiter = RateLimiter()
+        assert await limiter.acquire(10 ** 6) == 0.0
+        assert limiter.granted == 1
+
+    asyncio.run(scenario())
+
+def test_interactive_callers_served_before_queued_bulk():
+    async def scenario():
+        # Two requests of burst, then one every 50ms
+        limiter = RateLimiter(requests_per_minute=1200, burst_seconds=0.1)
+        order = []
+
+        async def call(name, priority):
+            await limiter.acquire(1, priority)
+            order.append(name)
+
+        await call("first", PRIORITY_BULK)
+        await call("second", PRIORITY_BULK)
+        bulk = [asyncio.create_task(call(f"bulk{i}", PRIORITY_BULK)) for i in range(3)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive", PRIORITY_INTERACTIVE))
+        await asyncio.gather(*bulk, interactive)
+        assert order == ["first", "second", "interactive", "bulk0", "bulk1", "bulk2"]
+        assert limiter.stats()["queue_depth"] == 0
+
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_does_not_block_the_queue():
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=1200, burst_seconds=0.05)
+        await limiter.acquire(1)
+        waiting = asyncio.create_task(limiter.acquire(1))
+        behind = asyncio.create_task(limiter.acquire(1))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.wait_for(behind, 1)
+
+    asyncio.run(scenario())
+
+def test_pause_holds_every_caller():
+    async def scenario():
+        limiter = RateLimiter(tokens_per_minute=10 ** 6)
+        limiter.pause(0.1)
+        start = time.monotonic()
+        await limiter.acquire(1)
+        assert time.monotonic() - start >= 0.09
+        assert limiter.throttled == 1
+
+    asyncio.run(scenario())
+
+def test_backoff_delay_honours_retry_after():
+    assert 2.0 <= backoff_delay(0, 2.0, 1, 30) <= 2.5
+    assert 4.0 <= backoff_delay(2, None, 1, 30) <= 5.0
+    assert backoff_delay(10, None, 1, 30) <= 30 * 1.25
@@ -0,0 +1,127 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.replay import Cassette, RecordingClient, ReplayClient, ReplayMissError, interaction_key
+
+MESSAGES = [{"role": "user", "content": "What is recursion?"}]
+
+def _completion(content):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content, tool_calls=None))],
+        usage=SimpleNamespace(prompt_tokens=5, completion_tokens=3)
+    )
+
+def _chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=None))])
+
+class FakeCompletions:
+    """Answers every request with the same text, plain or streamed"""
+
+    def __init__(self, text):
+        self.text = text
+
+    async def create(self, messages, temperature, max_tokens, stream=False, **kwargs):
+        if stream:
+            return self._stream()
+        return _completion(self.text)
+
+    async def _stream(self):
+        for word in self.text.split(" "):
+            yield _chunk(word + " ")
+
+def _recorder(cassette, text):
+    completions = FakeCompletions(text)
+    return RecordingClient(SimpleNamespace(chat=SimpleNamespace(completions=completions), base_url="http://upstream"), cassette)
+
+def test_key_ignores_model_and_stream():
+    key = interaction_key(MESSAGES, 0.7, 100)
+    assert key == interaction_key(list(MESSAGES), 0.7, 100, None, None)
+    assert key != interaction_key(MESSAGES, 0.2, 100)
+    assert key != interaction_key(MESSAGES, 0.7, 100, {"type": "json_object"})
+
+def test_recorded_completion_replays_offline(tmp_path):
+    path = tmp_path / "llm.jsonl"
+
+    async def record():
+        client = _recorder(Cassette(str(path)), "A function calling itself.")
+        return await client.chat.completions.create(model="gpt", messages=MESSAGES, temperature=0.7, max_tokens=100)
+
+    async def replay():
+        client = ReplayClient(Cassette(str(path)))
+        return await client.chat.completions.create(model="other", messages=MESSAGES, temperature=0.7, max_tokens=100)
+
+    recorded = asyncio.run(record())
+    replayed = asyncio.run(replay())
+    assert replayed.choices[0].message.content == recorded.choices[0].message.content
+    assert replayed.usage.completion_tokens == 3
+
+def test_recorded_stream_replays_chunk_by_chunk(tmp_path):
+    path = tmp_path / "llm.jsonl"
+
+    async def consume(client):
+        stream = await client.chat.completions.create(model="gpt", messages=MESSAGES, temperature=0.7, max_tokens=100, stream=True)
+        return [chunk.choices[0].delta.content async for chunk in stream]
+
+    recorded = asyncio.run(consume(_recorder(Cassette(str(path)), "calls itself again")))
+    replayed = asyncio.run(consume(ReplayClient(Cassette(str(path)))))
+    assert replayed == recorded == ["calls ", "itself ", "again "]
+
+def test_abandoned_stream_is_not_recorded(tmp_path):
+    path = tmp_path / "llm.jsonl"
+
+    async def abandon():
+        client = _recorder(Cassette(str(path)), "calls itself again")
+        stream = await client.chat.completions.create(model="gpt", messages=MESSAGES, temperature=0.7, max_tokens=100, stream=True)
+        async for _ in stream:
+            break
+        await stream.aclose()
+
+    asyncio.run(abandon())
+    assert not path.exists()
+
+def test_repeated_requests_replay_in_order_and_cycle(tmp_path):
+    path = tmp_path / "llm.jsonl"
+    cassette = Cassette(str(path))
+    key = interaction_key(MESSAGES, 0.7, 100)
+    cassette.append({"key": key, "chunks": [[0, "first"]], "usage": None})
+    cassette.append({"key": key, "chunks": [[0, "second"]], "usage": None})
+
+    async def replay(times):
+        client = ReplayClient(Cassette(str(path)))
+        return [
+            (await client.chat.completions.create(messages=MESSAGES, temperature=0.7, max_tokens=100)).choices[0].message.content
+            for _ in range(times)
+        ]
+
+    assert asyncio.run(replay(3)) == ["first", "second", "first"]
+
+def test_unrecorded_request_raises(tmp_path):
+    client = ReplayClient(Cassette(str(tmp_path / "empty.jsonl")))
+    with pytest.raises(ReplayMissError):
+        asyncio.run(client.chat.completions.create(messages=MESSAGES, temperature=0.7, max_tokens=100))
+
+def test_tool_calls_replay_whole(tmp_path):
+    path = tmp_path / "llm.jsonl"
+    tools = [{"type": "function", "function": {"name": "make_quiz"}}]
+    cassette = Cassette(str(path))
+    cassette.append({
+        "key": interaction_key(MESSAGES, 0.7, 100, None, tools),
+        "chunks": [[0, ""]],
+        "usage": None,
+        "tool_calls": [{"name": "make_quiz", "arguments": "{\"topic\": \"recursion\"}"}]
+    })
+
+    async def replay():
+        client = ReplayClient(Cassette(str(path)))
+        return await client.chat.completions.create(messages=MESSAGES, temperature=0.7, max_tokens=100, tools=tools)
+
+    choice = asyncio.run(replay()).choices[0]
+    assert choice.finish_reason == "tool_calls"
+    assert choice.message.content is None
+    assert choice.message.tool_calls[0].function.name == "make_quiz"
+
+def test_recording_client_passes_through_other_attributes(tmp_path):
+    client = _recorder(Cassette(str(tmp_path / "llm.jsonl")), "x")
+    assert client.base_url == "http://upstream"
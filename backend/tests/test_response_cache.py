@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.llm import llm_service
+from app.services.response_cache import CACHE_NO_CACHE, CACHE_NO_STORE, ResponseCache, make_cache_key, normalize_query
+
+def test_trivially_different_questions_share_a_key():
+    assert normalize_query("  What is   Recursion?? ") == normalize_query("what is recursion") == "what is recursion"
+    assert make_cache_key("What is recursion?", "v1", "gpt") == make_cache_key("what is recursion", "v1", "gpt")
+    assert make_cache_key("what is recursion", "v1", "gpt") != make_cache_key("what is recursion", "v2", "gpt")
+
+def test_least_recently_used_entry_evicted():
+    async def scenario():
+        cache = ResponseCache(max_entries=2)
+        await cache.set("a", "1")
+        await cache.set("b", "2")
+        assert await cache.get("a") == "1"
+        await cache.set("c", "3")
+        return cache, [await cache.get(key) for key in "abc"]
+
+    cache, values = asyncio.run(scenario())
+    assert values == ["1", None, "3"]
+    assert cache.evictions == 1
+
+def test_expired_entry_missed():
+    async def scenario():
+        cache = ResponseCache(ttl_seconds=-1)
+        await cache.set("a", "1")
+        return await cache.get("a")
+
+    assert asyncio.run(scenario()) is None
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "responses.db")
+
+    async def scenario():
+        first = ResponseCache(disk_path=path)
+        await first.set("a", "1")
+        first.close()
+        second = ResponseCache(disk_path=path)
+        try:
+            return await second.get("a"), second.stats()["disk_hits"]
+        finally:
+            second.close()
+
+    assert asyncio.run(scenario()) == ("1", 1)
+
+def test_generate_response_honours_cache_control(monkeypatch):
+    calls = []
+
+    async def complete(messages, **kwargs):
+        calls.append(kwargs["operation"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"answer {len(calls)}"))])
+
+    monkeypatch.setattr(llm_service, "_complete", complete)
+    monkeypatch.setattr(llm_service, "response_cache", ResponseCache())
+
+    async def scenario():
+        return [
+            await llm_service.generate_response("What is recursion?"),
+            await llm_service.generate_response("what is recursion"),
+            # Fresh answer, stored for later lookups
+            await llm_service.generate_response("what is recursion", cache_control=CACHE_NO_CACHE),
+            await llm_service.generate_response("what is recursion"),
+            # Neither read nor written
+            await llm_service.generate_response("what is recursion", cache_control=CACHE_NO_STORE),
+            await llm_service.generate_response("what is recursion"),
+        ]
+
+    assert asyncio.run(scenario()) == ["answer 1", "answer 1", "answer 2", "answer 2", "answer 3", "answer 2"]
+    assert len(calls) == 3
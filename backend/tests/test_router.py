@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from openai import BadRequestError, InternalServerError
+
+from app.core.config import settings
+from app.services.llm import llm_service
+from app.services.router import Deployment, DeploymentRouter, is_retryable
+
+def status_error(cls, status):
+    request = httpx.Request("POST", "https://stub/chat/completions")
+    return cls("injected", response=httpx.Response(status, request=request), body=None)
+
+def make_router(count=2, **kwargs):
+    return DeploymentRouter([Deployment(name=f"d{i}") for i in range(count)], explore_rate=0, **kwargs)
+
+def test_retryable_errors():
+    assert is_retryable(status_error(InternalServerError, 500))
+    assert is_retryable(asyncio.TimeoutError())
+    assert not is_retryable(status_error(BadRequestError, 400))
+    assert not is_retryable(ValueError("bad request body"))
+
+def test_server_error_fails_over_and_counts_against_deployment():
+    async def scenario():
+        router = make_router()
+        tried = []
+
+        async def fn(deployment):
+            tried.append(deployment.name)
+            if deployment.name == "d0":
+                raise status_error(InternalServerError, 500)
+            return "ok"
+
+        assert await router.call(fn) == "ok"
+        assert tried == ["d0", "d1"]
+        assert router.failovers == 1
+        assert router.deployments[0].errors == 1
+
+    asyncio.run(scenario())
+
+def test_client_error_raised_without_failover_or_penalty():
+    async def scenario():
+        router = make_router()
+        tried = []
+
+        async def fn(deployment):
+            tried.append(deployment.name)
+            raise status_error(BadRequestError, 400)
+
+        with pytest.raises(BadRequestError):
+            await router.call(fn)
+        assert tried == ["d0"]
+        assert router.failovers == 0
+        assert router.deployments[0].ewma_error == 0.0
+
+    asyncio.run(scenario())
+
+def test_latency_tracked_per_operation_and_only_for_whole_completions():
+    async def scenario():
+        router = make_router(count=1)
+
+        def sleeper(seconds):
+            async def fn(deployment):
+                await asyncio.sleep(seconds)
+                return "ok"
+            return fn
+
+        await router.call(sleeper(0.01), operation="intent")
+        await router.call(sleeper(0.05), operation="mcqs")
+        await router.call(sleeper(0.02), operation="chat_stream", timed=False)
+        deployment = router.primary
+        assert set(deployment.ewma_latency) == {"intent", "mcqs"}
+        assert deployment.ewma_latency["mcqs"] > deployment.ewma_latency["intent"]
+        assert deployment.calls == 3
+
+    asyncio.run(scenario())
+
+def test_slow_operation_not_hedged_on_a_fast_operation_percentile():
+    async def scenario():
+        router = make_router(hedge=True, hedge_min_delay=0.001)
+        calls = []
+
+        async def fast(deployment):
+            return "ok"
+
+        async def slow(deployment):
+            calls.append(deployment.name)
+            await asyncio.sleep(0.02)
+            return "ok"
+
+        for _ in range(30):
+            await router.call(fast, operation="intent")
+        await router.call(slow, operation="mcqs")
+        assert calls == ["d0"]
+        assert router.hedged == 0
+
+    asyncio.run(scenario())
+
+def test_malformed_deployment_specs_are_skipped(monkeypatch):
+    specs = [
+        {"name": "no-model", "provider": "openai", "api_key": "k"},
+        "not-an-object",
+        {"name": "extra", "provider": "openai", "model": "gpt-4o-mini", "api_key": "k"},
+    ]
+    monkeypatch.setattr(settings, "LLM_DEPLOYMENTS", json.dumps(specs))
+    monkeypatch.setattr(llm_service.router, "deployments", list(llm_service.router.deployments))
+    before = len(llm_service.router.deployments)
+    llm_service._init_deployments()
+    assert [d.name for d in llm_service.router.deployments[before:]] == ["extra"]
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import speculation
+from app.services.llm import llm_service
+from app.services.speculation import SpeculationStats, detect_intent_with_speculation, should_speculate
+
+NOT_MCQ = {"mcq_expected": False, "topic": "", "num_questions": 4}
+
+@pytest.fixture
+def stats(monkeypatch):
+    fresh = SpeculationStats()
+    monkeypatch.setattr(speculation, "speculation_stats", fresh)
+    return fresh
+
+def fake_llm(monkeypatch, intent, streamed):
+    # Intent detection returns between the first and the second delta
+    async def detect_mcq_intent(user_query):
+        await asyncio.sleep(0.06)
+        return intent
+
+    async def stream_response(user_query, cache_control=None):
+        for delta in ["Plain ", "answer"]:
+            await asyncio.sleep(0.04)
+            streamed.append(delta)
+            yield delta
+
+    monkeypatch.setattr(llm_service, "detect_mcq_intent", detect_mcq_intent)
+    monkeypatch.setattr(llm_service, "stream_response", stream_response)
+
+@pytest.mark.parametrize("policy, message, expected", [
+    ("never", "Write a Python function to reverse a string", False),
+    ("always", "Write a Python function to reverse a string", True),
+    # Decided by the local classifier, so there is no LLM round trip to overlap
+    ("always", "What is recursion?", False),
+    # "prior" bets on a plain answer only when the classifier leans that way
+    ("prior", "Write a Python function to reverse a string", True),
+    ("prior", "Test my knowledge of physics", False),
+    ("sometimes", "Write a Python function to reverse a string", False),
+])
+def test_should_speculate(monkeypatch, policy, message, expected):
+    monkeypatch.setattr(settings, "SPECULATIVE_CHAT_POLICY", policy)
+    assert should_speculate(message) is expected
+
+def test_plain_answer_used(monkeypatch, stats):
+    monkeypatch.setattr(settings, "SPECULATIVE_CHAT_POLICY", "always")
+    fake_llm(monkeypatch, NOT_MCQ, [])
+
+    async def scenario():
+        intent, answer = await detect_intent_with_speculation("Write a haiku")
+        return intent, await answer
+
+    assert asyncio.run(scenario()) == (NOT_MCQ, "Plain answer")
+    assert (stats.speculated, stats.used, stats.cancelled) == (1, 1, 0)
+
+def test_answer_cancelled_for_quiz_request(monkeypatch, stats):
+    monkeypatch.setattr(settings, "SPECULATIVE_CHAT_POLICY", "always")
+    quiz = {"mcq_expected": True, "topic": "physics", "num_questions": 4}
+    streamed = []
+    fake_llm(monkeypatch, quiz, streamed)
+
+    async def scenario():
+        result = await detect_intent_with_speculation("Write a haiku")
+        await asyncio.sleep(0.15)
+        return result
+
+    assert asyncio.run(scenario()) == (quiz, None)
+    assert (stats.speculated, stats.used, stats.cancelled) == (1, 0, 1)
+    # Cancelled after the first delta: the second is never generated
+    assert stats.wasted_completion_tokens == len(streamed) == 1
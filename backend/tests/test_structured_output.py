@@ -0,0 +1,101 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.mcq import MCQQuestion
+from app.utils.structured_output import (
+    StructuredOutputError, expand_compact_question, extract_payload, loads_tolerant, parse_explanations,
+    parse_intent, parse_mcqs, parse_quiz_call, validate_questions
+)
+
+QUESTION = {
+    "question": "Capital of Italy?",
+    "options": {"A": "Paris", "B": "Rome", "C": "Madrid", "D": "Berlin"},
+    "correct_answer": "B",
+    "explanation": "Rome is the capital.",
+}
+COMPACT = ["Capital of Italy?", "Paris", "Rome", "Madrid", "Berlin", "B", "Rome is the capital."]
+
+def test_extract_payload_fenced_and_unterminated():
+    assert extract_payload("Sure:\n```yaml\na: 1\n```\nbye") == "a: 1"
+    assert extract_payload("```json\n{\"a\": 1") == "{\"a\": 1"
+    assert extract_payload("  plain  ") == "plain"
+
+def test_loads_tolerant_skips_prose_comments_and_trailing_commas():
+    assert loads_tolerant('Here you go: {"a": [1, 2,], // note\n "b": "x, ]"} thanks') == {"a": [1, 2], "b": "x, ]"}
+    with pytest.raises(StructuredOutputError):
+        loads_tolerant("no json here")
+
+@pytest.mark.parametrize("text, expected", [
+    ("mcq_expected: true\ntopic: Python\nnum_questions: 5", (True, "Python", 5)),
+    ("```yaml\nresponse:\n  mcq_expected: false\n  topic: null\n  num_questions: 4\n```", (False, "", 4)),
+    ("mcq_expected: yes  # quiz\ntopic: \"true crime\"\nnum_questions: lots", (True, "true crime", 4)),
+    ('{"response": {"mcq_expected": "true", "topic": "AI", "num_questions": "3"}}', (True, "AI", 3)),
+])
+def test_parse_intent(text, expected):
+    intent = parse_intent(text)
+    assert (intent["mcq_expected"], intent["topic"], intent["num_questions"]) == expected
+
+def test_parse_intent_requires_mcq_expected():
+    with pytest.raises(StructuredOutputError):
+        parse_intent("topic: Python")
+
+def test_parse_quiz_call():
+    intent = parse_quiz_call('{"topic": " rivers ", "num_questions": "3"}')
+    assert intent == {"mcq_expected": True, "topic": "rivers", "num_questions": 3}
+    with pytest.raises(StructuredOutputError):
+        parse_quiz_call('{"num_questions": 3}')
+
+@pytest.mark.parametrize("text", [
+    json.dumps({"questions": [QUESTION]}),
+    "```json\n" + json.dumps({"q": [COMPACT]}) + "\n```",
+    "Questions: " + json.dumps([QUESTION]),
+])
+def test_parse_mcqs_formats(text):
+    questions, rejected = parse_mcqs(text)
+    assert rejected == 0
+    assert questions == [QUESTION]
+
+@pytest.mark.parametrize("item", [
+    QUESTION,
+    {k: v for k, v in QUESTION.items() if k != "explanation"},
+    {**QUESTION, "explanation": None},
+    {**QUESTION, "explanation": ""},
+    {**QUESTION, "correct_answer": "b"},
+    {**QUESTION, "options": dict(reversed(QUESTION["options"].items()))},
+    {**QUESTION, "options": {**QUESTION["options"], "C": " "}},
+    {**QUESTION, "question": " "},
+    {**QUESTION, "options": "ABCD"},
+    {**QUESTION, "hint": "extra"},
+    COMPACT,
+])
+def test_fast_path_agrees_with_model_validation(item):
+    # Replies already in the exact shape skip the model; the result must be the same either way
+    try:
+        expected = [MCQQuestion.model_validate(expand_compact_question(item)).model_dump(exclude_none=True)]
+    except ValidationError:
+        expected = []
+    assert validate_questions([item]) == (expected, 1 - len(expected))
+
+def test_parse_mcqs_rejects_invalid_items():
+    bad = {**QUESTION, "correct_answer": "E"}
+    questions, rejected = parse_mcqs(json.dumps({"questions": [QUESTION, bad]}))
+    assert len(questions) == 1 and rejected == 1
+
+def test_parse_mcqs_salvages_cut_off_reply():
+    text = json.dumps({"q": [COMPACT, COMPACT, COMPACT]})
+    questions, rejected = parse_mcqs(text[:len(text) - 20])
+    assert len(questions) == 2 and rejected == 0
+
+def test_parse_mcqs_without_questions():
+    with pytest.raises(StructuredOutputError):
+        parse_mcqs('{"answers": []}')
+    with pytest.raises(StructuredOutputError):
+        parse_mcqs('{"q": [["cut off')
+
+def test_parse_explanations_lines_up_with_questions():
+    assert parse_explanations('{"e": [" one ", 2, "three", "four"]}', 3) == ["one", "", "three"]
+    assert parse_explanations('["one"]', 3) == ["one", "", ""]
+    with pytest.raises(StructuredOutputError):
+        parse_explanations('{"x": 1}', 2)